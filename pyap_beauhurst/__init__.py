@@ -2,7 +2,8 @@
 API hooks
 """
 from .api import parse
+from .batch import parse_many
 from .parser import AddressParser
 from .utils import findall, match
 
-__all__ = ("AddressParser", "parse", "match", "findall")
+__all__ = ("AddressParser", "parse", "parse_many", "match", "findall")
@@ -5,48 +5,221 @@
     Contains class for constructing Address object which holds information
     about address and its components.
 
+    Address is a pydantic model when pydantic is installed, otherwise it is
+    the lightweight SlotsAddress which has the same fields and behaviour.
+
     :copyright: (c) 2015 by Vladimir Goncharov.
     :license: MIT, see LICENSE for more details.
 """
-from typing import Any, Optional, Union
+from typing import Any, Dict, Optional, Type, Union
+
+FIELDS = (
+    "building_id",
+    "city",
+    "country",
+    "country_id",
+    "floor",
+    "full_address",
+    "full_street",
+    "match_end",
+    "match_start",
+    "occupancy",
+    "postal_code",
+    "region1",
+    "route_id",
+    "state",
+    "street",
+    "street_name",
+    "street_number",
+    "street_type",
+    "source_start",
+    "source_end",
+)
+
+STRIP_CHARS = " ,;:"
+# source_start/source_end are kept as is, so that an offset of 0 is not lost
+STRIPPED_FIELDS = FIELDS[:-2]
+
+
+def strip_chars(v: Any) -> Any:
+    """Strips separators around strings, turns other falsy values into None"""
+    if isinstance(v, str):
+        return v.strip(STRIP_CHARS)
+    if v:
+        return v
+    return None
+
 
-from pydantic import BaseModel, field_validator
+class SlotsAddress:
+    """Address without validation overhead, keeps its fields in __slots__"""
 
+    __slots__ = FIELDS
 
-class Address(BaseModel):
-    building_id: Optional[str] = None
-    city: Optional[str] = None
-    country: Optional[str] = None
-    country_id: Optional[str] = None
-    floor: Optional[str] = None
+    building_id: Optional[str]
+    city: Optional[str]
+    country: Optional[str]
+    country_id: Optional[str]
+    floor: Optional[str]
     full_address: str
-    full_street: Optional[str] = None
-    match_end: Optional[Union[int, str]] = None
-    match_start: Optional[Union[int, str]] = None
-    occupancy: Optional[str] = None
-    postal_code: Optional[str] = None
-    region1: Optional[str] = None
-    route_id: Optional[str] = None
-    state: Optional[str] = None
-    street: Optional[str] = None
-    street_name: Optional[str] = None
-    street_number: Optional[str] = None
-    street_type: Optional[str] = None
-
-    @field_validator("*", mode="before")
-    @classmethod
-    def strip_chars(cls, v: Any) -> Any:
-        if isinstance(v, str):
-            return v.strip(" ,;:")
-        if v:
-            return v
+    full_street: Optional[str]
+    match_end: Optional[Union[int, str]]
+    match_start: Optional[Union[int, str]]
+    occupancy: Optional[str]
+    postal_code: Optional[str]
+    region1: Optional[str]
+    route_id: Optional[str]
+    state: Optional[str]
+    street: Optional[str]
+    street_name: Optional[str]
+    street_number: Optional[str]
+    street_type: Optional[str]
+    source_start: Optional[int]
+    source_end: Optional[int]
+
+    def __init__(
+        self,
+        *,
+        building_id: Optional[str] = None,
+        city: Optional[str] = None,
+        country: Optional[str] = None,
+        country_id: Optional[str] = None,
+        floor: Optional[str] = None,
+        full_address: str,
+        full_street: Optional[str] = None,
+        match_end: Optional[Union[int, str]] = None,
+        match_start: Optional[Union[int, str]] = None,
+        occupancy: Optional[str] = None,
+        postal_code: Optional[str] = None,
+        region1: Optional[str] = None,
+        route_id: Optional[str] = None,
+        state: Optional[str] = None,
+        street: Optional[str] = None,
+        street_name: Optional[str] = None,
+        street_number: Optional[str] = None,
+        street_type: Optional[str] = None,
+        source_start: Optional[int] = None,
+        source_end: Optional[int] = None,
+        # unknown parts of the match are ignored, same as with pydantic
+        **_: Any,
+    ) -> None:
+        # same as strip_chars, spelled out as it runs for every address found
+        self.building_id = (
+            None if building_id is None else building_id.strip(STRIP_CHARS)
+        )
+        self.city = None if city is None else city.strip(STRIP_CHARS)
+        self.country = None if country is None else country.strip(STRIP_CHARS)
+        self.country_id = None if country_id is None else country_id.strip(STRIP_CHARS)
+        self.floor = None if floor is None else floor.strip(STRIP_CHARS)
+        self.full_address = full_address.strip(STRIP_CHARS)
+        self.full_street = (
+            None if full_street is None else full_street.strip(STRIP_CHARS)
+        )
+        self.match_end = match_end or None
+        self.match_start = match_start or None
+        self.occupancy = None if occupancy is None else occupancy.strip(STRIP_CHARS)
+        self.postal_code = (
+            None if postal_code is None else postal_code.strip(STRIP_CHARS)
+        )
+        self.region1 = None if region1 is None else region1.strip(STRIP_CHARS)
+        self.route_id = None if route_id is None else route_id.strip(STRIP_CHARS)
+        self.state = None if state is None else state.strip(STRIP_CHARS)
+        self.street = None if street is None else street.strip(STRIP_CHARS)
+        self.street_name = (
+            None if street_name is None else street_name.strip(STRIP_CHARS)
+        )
+        self.street_number = (
+            None if street_number is None else street_number.strip(STRIP_CHARS)
+        )
+        self.street_type = (
+            None if street_type is None else street_type.strip(STRIP_CHARS)
+        )
+        self.source_start = source_start
+        self.source_end = source_end
+
+    def dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in FIELDS}
+
+    model_dump = dict
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, SlotsAddress):
+            return NotImplemented
+        return self.dict() == other.dict()
+
+    def __repr__(self) -> str:
+        return "{name}({fields})".format(
+            name=type(self).__name__,
+            fields=", ".join(
+                "{}={!r}".format(field, getattr(self, field)) for field in FIELDS
+            ),
+        )
 
     def __str__(self) -> str:
         # Address object is represented as textual address
-        address = ""
-        try:
-            address = self.full_address
-        except AttributeError:
-            pass
+        return self.full_address
+
+
+try:
+    from pydantic import BaseModel, field_validator
+
+    HAS_PYDANTIC = True
+except ImportError:  # pydantic is an optional dependency
+    HAS_PYDANTIC = False
+
+if HAS_PYDANTIC:
+
+    class Address(BaseModel):
+        building_id: Optional[str] = None
+        city: Optional[str] = None
+        country: Optional[str] = None
+        country_id: Optional[str] = None
+        floor: Optional[str] = None
+        full_address: str
+        full_street: Optional[str] = None
+        match_end: Optional[Union[int, str]] = None
+        match_start: Optional[Union[int, str]] = None
+        occupancy: Optional[str] = None
+        postal_code: Optional[str] = None
+        region1: Optional[str] = None
+        route_id: Optional[str] = None
+        state: Optional[str] = None
+        street: Optional[str] = None
+        street_name: Optional[str] = None
+        street_number: Optional[str] = None
+        street_type: Optional[str] = None
+        # position of the address in the text passed to the parser
+        source_start: Optional[int] = None
+        source_end: Optional[int] = None
+
+        @field_validator(*STRIPPED_FIELDS, mode="before")
+        @classmethod
+        def strip_chars(cls, v: Any) -> Any:
+            return strip_chars(v)
+
+        def __str__(self) -> str:
+            # Address object is represented as textual address
+            address = ""
+            try:
+                address = self.full_address
+            except AttributeError:
+                pass
+
+            return address
+
+else:
+    Address = SlotsAddress  # type: ignore[misc,assignment]
+
+
+RESULT_TYPES: Dict[str, Type[Any]] = {"slots": SlotsAddress}
+if HAS_PYDANTIC:
+    RESULT_TYPES["pydantic"] = Address
+
 
-        return address
+def get_address_class(result_type: Optional[str] = None) -> Type[Any]:
+    """Returns class used for found addresses: pydantic Address if it is
+    available, unless result_type asks for "slots" or "pydantic" explicitly.
+    Raises KeyError for an unknown or unavailable result_type.
+    """
+    if result_type is None:
+        return Address
+    return RESULT_TYPES[result_type]
@@ -0,0 +1,367 @@
+"""
+    pyap.analysis
+    ~~~~~~~~~~~~~~~~
+
+    This module finds quantifiers in detection rules which may make the
+    regex engine backtrack a lot on text which almost matches:
+
+    - exponential: iterations of an unbounded repeat can split the same
+      text in many ways, like `(?:\\w+\\s?)+`
+    - polynomial: repeats next to each other can match the same
+      characters, like `[\\w\\s]+\\s{1,3}`, or a bounded repeat splits
+      text like an exponential one. At least one of the repeats has to grow
+      with the text: be unbounded or inside an unbounded repeat, bounded
+      ones only backtrack over a few characters
+    - ambiguous: a repeat is next to an optional item which can match the
+      same character, so the text between them can be split in two ways
+
+    Each finding names the rule component (named group) the quantifiers
+    belong to and comes with an attack string: text leading to the
+    quantifiers, the overlapping character repeated and a character
+    which makes the match fail.
+
+    Run `python -m pyap_beauhurst.analysis [country ...] [--verify]` to
+    analyze full_address of countries, --verify times the attack strings
+    and drops findings whose time doesn't grow faster than their length.
+
+    :copyright: (c) 2015 by Vladimir Goncharov.
+    :license: MIT, see LICENSE for more details.
+"""
+import importlib
+import re
+import string
+import sys
+import timeit
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional, Sequence
+
+from .utils import DEFAULT_FLAGS, REPEAT_OPS, SINGLE_CHAR_OPS, sre_compile, sre_parse
+
+COUNTRIES = ("US", "CA", "GB")
+
+# characters quantifiers are checked against, in order of preference for
+# attack strings
+ALPHABET = (
+    string.ascii_lowercase
+    + string.ascii_uppercase
+    + string.digits
+    + " ,.-'#&/()\t\n\xa0éÉ"
+    + "".join(c for c in string.punctuation if c not in ",.-'#&/()")
+)
+# characters tried to make the match fail after the pumped text
+_FAILING = "!\x00~"
+_TYPE_FLAGS = re.ASCII | re.LOCALE | re.UNICODE
+_POSSESSIVE_REPEAT = getattr(sre_parse, "POSSESSIVE_REPEAT", None)
+
+KINDS = ("exponential", "polynomial", "ambiguous")
+# how many times attack strings repeat their pump when timed
+REPEATS = (64, 128, 256)
+
+
+class Quantifier(NamedTuple):
+    low: int
+    high: int
+    lazy: bool
+    # characters a single repetition can be, a run of them can be split
+    # between this quantifier and an overlapping one
+    chars: FrozenSet[str]
+    component: str
+    # shortest text leading to the quantifier from the start of the rules
+    prefix: str
+    # whether it can repeat as often as the text is long, being unbounded or
+    # inside an unbounded repeat
+    grows: bool
+
+    def __str__(self) -> str:
+        if self.high == sre_parse.MAXREPEAT:
+            bounds = "{{{},}}".format(self.low)
+        else:
+            bounds = "{{{},{}}}".format(self.low, self.high)
+        return "{chars}{bounds}{lazy}".format(
+            chars=describe_chars(self.chars) if self.chars else "(...)",
+            bounds=bounds,
+            lazy="?" * self.lazy,
+        )
+
+
+class Finding(NamedTuple):
+    kind: str
+    component: str
+    description: str
+    prefix: str
+    pump: str
+    suffix: str
+
+    def attack(self, repeat: int = 1000) -> str:
+        """Returns text which makes the rules backtrack over pump repeated"""
+        return self.prefix + self.pump * repeat + self.suffix
+
+
+class _Piece:
+    """What a part of the rules can match, as far as analysis goes"""
+
+    __slots__ = ("nullable", "example", "heads", "tails")
+
+    def __init__(self) -> None:
+        self.nullable = True
+        self.example = ""
+        # quantifiers which can match the first/last characters of the piece
+        self.heads: List[Quantifier] = []
+        self.tails: List[Quantifier] = []
+
+
+def describe_chars(chars: FrozenSet[str]) -> str:
+    """Renders characters of ALPHABET as a short character class"""
+    if len(chars) == 1:
+        return re.escape(next(iter(chars)))
+    parts = []
+    rest = set(chars)
+    for name, group in (
+        ("a-z", string.ascii_lowercase),
+        ("A-Z", string.ascii_uppercase),
+        ("0-9", string.digits),
+        (r"\s", " \t\n\xa0"),
+    ):
+        if set(group) <= rest:
+            parts.append(name)
+            rest -= set(group)
+    parts.extend(re.escape(c) for c in ALPHABET if c in rest)
+    return "[{}]".format("".join(parts))
+
+
+class _Analyzer:
+    def __init__(self, pattern: Any) -> None:
+        self.state = pattern.state
+        self.names = {index: name for name, index in pattern.state.groupdict.items()}
+        self.findings: Dict[Any, Finding] = {}
+        self._chars: Dict[Any, FrozenSet[str]] = {}
+        # unbounded repeats the current item is inside of
+        self._unbounded = 0
+
+    def sequence(self, items: Any, flags: int, component: str, prefix: str) -> "_Piece":
+        piece = _Piece()
+        for item in items:
+            found = self.item(item, flags, component, prefix + piece.example)
+            for tail in piece.tails:
+                for head in found.heads:
+                    self._adjacent(tail, head)
+            if piece.nullable:
+                piece.heads = piece.heads + found.heads
+            piece.tails = found.tails + (piece.tails if found.nullable else [])
+            piece.nullable = piece.nullable and found.nullable
+            piece.example += found.example
+        return piece
+
+    def item(self, item: Any, flags: int, component: str, prefix: str) -> "_Piece":
+        op, av = item
+        if op in SINGLE_CHAR_OPS:
+            piece = _Piece()
+            piece.nullable = False
+            chars = self.chars(sre_parse.SubPattern(self.state, [item]), flags)
+            piece.example = next((c for c in ALPHABET if c in chars), "")
+            return piece
+        if op is sre_parse.SUBPATTERN:
+            group, add_flags, del_flags, pattern = av
+            if add_flags & _TYPE_FLAGS:
+                flags &= ~_TYPE_FLAGS
+            flags = (flags | add_flags) & ~del_flags
+            component = self.names.get(group, component)
+            return self.sequence(pattern, flags, component, prefix)
+        if op is sre_parse.BRANCH:
+            return self._either(
+                [self.sequence(a, flags, component, prefix) for a in av[1]]
+            )
+        if op is sre_parse.GROUPREF_EXISTS:
+            _, yes, no = av
+            return self._either(
+                [
+                    self.sequence(yes, flags, component, prefix),
+                    self.sequence(no or [], flags, component, prefix),
+                ]
+            )
+        if op in REPEAT_OPS:
+            return self._repeat(op, av, flags, component, prefix)
+        if op is sre_parse.ASSERT or op is sre_parse.ASSERT_NOT:
+            # lookarounds don't consume text, but may backtrack themselves
+            self.sequence(av[1], flags, component, prefix)
+        # anchors, backreferences and atomic groups
+        return _Piece()
+
+    def chars(self, pattern: Any, flags: int) -> FrozenSet[str]:
+        """Returns characters of ALPHABET which pattern matches on their own"""
+        low, high = pattern.getwidth()
+        if low > 1 or high < 1:
+            return frozenset()
+        key = (repr(pattern), flags)
+        if key not in self._chars:
+            # rules flags are in state, scoped ones come from enclosing groups
+            add_flags = flags & ~self.state.flags
+            del_flags = self.state.flags & ~flags & ~_TYPE_FLAGS
+            scoped = sre_parse.SubPattern(
+                self.state,
+                [(sre_parse.SUBPATTERN, (None, add_flags, del_flags, pattern))],
+            )
+            compiled = sre_compile.compile(scoped)
+            self._chars[key] = frozenset(c for c in ALPHABET if compiled.fullmatch(c))
+        return self._chars[key]
+
+    @staticmethod
+    def _either(alternatives: List["_Piece"]) -> "_Piece":
+        piece = _Piece()
+        piece.nullable = any(a.nullable for a in alternatives)
+        piece.example = alternatives[0].example
+        piece.heads = [q for a in alternatives for q in a.heads]
+        piece.tails = [q for a in alternatives for q in a.tails]
+        return piece
+
+    def _repeat(
+        self, op: Any, av: Any, flags: int, component: str, prefix: str
+    ) -> "_Piece":
+        low, high, pattern = av
+        unbounded = high == sre_parse.MAXREPEAT
+        self._unbounded += unbounded
+        body = self.sequence(pattern, flags, component, prefix)
+        self._unbounded -= unbounded
+        piece = _Piece()
+        piece.nullable = low == 0 or body.nullable
+        piece.example = body.example * low
+        if op is _POSSESSIVE_REPEAT:
+            # possessive repeats don't give back what they matched
+            return piece
+        quantifier = Quantifier(
+            low,
+            high,
+            op is sre_parse.MIN_REPEAT,
+            self.chars(pattern, flags),
+            component,
+            prefix,
+            unbounded or self._unbounded > 0,
+        )
+        if high >= 2:
+            # last repeat of an iteration competes with first of the next one
+            for tail in body.tails:
+                for head in body.heads:
+                    overlap = tail.chars & head.chars
+                    if not overlap or max(tail.high, head.high) < 2:
+                        continue
+                    if unbounded or quantifier.grows or tail.grows or head.grows:
+                        self._add(
+                            "exponential" if unbounded else "polynomial",
+                            [quantifier, tail, head],
+                            "{} over {} then {}".format(quantifier, tail, head),
+                            overlap,
+                        )
+        if quantifier.chars and low < high:
+            piece.heads = piece.tails = [quantifier]
+        else:
+            # a fixed count of characters can't be split in different ways,
+            # longer repetitions may have quantifiers at their edges which
+            # compete with the ones next to the repeat
+            piece.heads, piece.tails = body.heads, body.tails
+        return piece
+
+    def _adjacent(self, tail: Quantifier, head: Quantifier) -> None:
+        overlap = tail.chars & head.chars
+        if not overlap or max(tail.high, head.high) < 2:
+            # two optional characters can only be split in two ways
+            return
+        if min(tail.high, head.high) < 2:
+            kind = "ambiguous"
+        elif tail.grows or head.grows:
+            kind = "polynomial"
+        else:
+            # bounded repeats split a few characters in a few ways
+            return
+        self._add(kind, [tail, head], "{} then {}".format(tail, head), overlap)
+
+    def _add(
+        self,
+        kind: str,
+        quantifiers: Sequence[Quantifier],
+        description: str,
+        overlap: FrozenSet[str],
+    ) -> None:
+        component = " + ".join(
+            dict.fromkeys(q.component for q in quantifiers if q.component)
+        )
+        key = (kind, component, description)
+        if key in self.findings:
+            return
+        used = frozenset().union(*(q.chars for q in quantifiers))
+        self.findings[key] = Finding(
+            kind=kind,
+            component=component,
+            description=description,
+            prefix=quantifiers[0].prefix,
+            pump=next(c for c in ALPHABET if c in overlap),
+            suffix=next((c for c in _FAILING if c not in used), ""),
+        )
+
+
+def analyze(regex: str, flags: int = DEFAULT_FLAGS) -> List[Finding]:
+    """Returns backtracking risks in regex, most severe first"""
+    pattern = sre_parse.parse(regex, flags)
+    analyzer = _Analyzer(pattern)
+    analyzer.sequence(pattern, pattern.state.flags, "", "")
+    return sorted(analyzer.findings.values(), key=lambda f: KINDS.index(f.kind))
+
+
+def analyze_country(country: str) -> List[Finding]:
+    """Returns backtracking risks in full_address of country"""
+    data = importlib.import_module("pyap_beauhurst.source_" + country.upper() + ".data")
+    return analyze(data.full_address)
+
+
+def time_attack(
+    pattern: Any, finding: Finding, repeats: Sequence[int] = REPEATS
+) -> List[float]:
+    """Returns seconds pattern takes to search attack strings of finding"""
+    return [
+        min(timeit.repeat(lambda: pattern.search(finding.attack(n)), number=1))
+        for n in repeats
+    ]
+
+
+def grows(timings: Sequence[float], repeats: Sequence[int] = REPEATS) -> bool:
+    """Returns whether timings of attack strings grow faster than their
+    length, searching any text takes at least linear time
+    """
+    # twice as fast as linear, timings of short strings are noisy
+    return timings[-1] > timings[0] * 2 * repeats[-1] / repeats[0]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = sys.argv[1:] if argv is None else argv
+    verify = "--verify" in args
+    countries = [arg for arg in args if not arg.startswith("-")] or COUNTRIES
+    for country in countries:
+        findings = analyze_country(country)
+        timings: Dict[Finding, List[float]] = {}
+        if verify:
+            data = importlib.import_module(
+                "pyap_beauhurst.source_" + country.upper() + ".data"
+            )
+            pattern = re.compile(data.full_address, DEFAULT_FLAGS)
+            for finding in findings:
+                timings[finding] = time_attack(pattern, finding)
+            # the engine copes with the rest
+            findings = [f for f in findings if grows(timings[f])]
+        print(
+            "{country}: {count} findings".format(country=country, count=len(findings))
+        )
+        for finding in findings:
+            print(
+                "  {kind:<12}{component:<32}{description}".format(**finding._asdict())
+            )
+            print("  {:<44}attack: {!r}".format("", finding.attack(8)))
+            if finding in timings:
+                print(
+                    "  {:<44}n={}: {}".format(
+                        "",
+                        "/".join(str(n) for n in REPEATS),
+                        " ".join("{:.4f}s".format(t) for t in timings[finding]),
+                    )
+                )
+
+
+if __name__ == "__main__":
+    main()
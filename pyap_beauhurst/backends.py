@@ -0,0 +1,94 @@
+"""
+    pyap.backends
+    ~~~~~~~~~~~~~~~~
+
+    This module contains matcher backends, regular expression engines
+    which compile and run country detection rules. Stdlib `re` is always
+    available, the `regex` backend is available when the third-party
+    `regex` package is installed.
+
+    :copyright: (c) 2015 by Vladimir Goncharov.
+    :license: MIT, see LICENSE for more details.
+"""
+import re
+from typing import Any, Dict, Iterator, Optional
+
+DEFAULT_BACKEND = "re"
+
+
+class Backend:
+    """Stdlib `re` backend, other backends override its methods"""
+
+    name = "re"
+    # whether finditer can give up after `timeout` seconds
+    supports_timeout = False
+
+    def compile(self, regex: str, flags: int) -> Any:
+        return re.compile(regex, flags)
+
+    def finditer(
+        self,
+        pattern: Any,
+        text: str,
+        pos: int = 0,
+        endpos: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> Iterator[Any]:
+        """Yields matches of pattern in text[pos:endpos]. Backends which
+        support timeout raise TimeoutError once it is exceeded.
+        """
+        return pattern.finditer(  # type: ignore[no-any-return]
+            text, pos, len(text) if endpos is None else endpos
+        )
+
+    def match(self, pattern: Any, text: str, pos: int = 0) -> Optional[Any]:
+        return pattern.match(text, pos)
+
+    def groupdict(self, match: Any) -> Dict[str, Any]:
+        """Returns text matched by named groups"""
+        return match.groupdict()  # type: ignore[no-any-return]
+
+
+class RegexBackend(Backend):
+    """Third-party `regex` package, which also offers atomic groups,
+    possessive quantifiers and timeouts
+    """
+
+    name = "regex"
+    supports_timeout = True
+
+    def __init__(self, module: Any) -> None:
+        self.module = module
+
+    def compile(self, regex: str, flags: int) -> Any:
+        # VERSION0 is the default, it is compatible with stdlib `re`
+        return self.module.compile(regex, flags)
+
+    def finditer(
+        self,
+        pattern: Any,
+        text: str,
+        pos: int = 0,
+        endpos: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> Iterator[Any]:
+        return pattern.finditer(  # type: ignore[no-any-return]
+            text, pos, endpos, timeout=timeout
+        )
+
+
+BACKENDS: Dict[str, Backend] = {DEFAULT_BACKEND: Backend()}
+
+try:
+    import regex  # type: ignore[import]
+except ImportError:  # regex is an optional dependency
+    pass
+else:
+    BACKENDS["regex"] = RegexBackend(regex)
+
+
+def get_backend(name: Optional[str] = None) -> Backend:
+    """Returns backend by its name, stdlib `re` one by default.
+    Raises KeyError for an unknown or unavailable backend.
+    """
+    return BACKENDS[DEFAULT_BACKEND if name is None else name]
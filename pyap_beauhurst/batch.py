@@ -0,0 +1,189 @@
+"""
+    pyap.batch
+    ~~~~~~~~~~~~~~~~
+
+    This module contains batch parsing of many documents over a reusable
+    pool of worker processes.
+
+    :copyright: (c) 2015 by Vladimir Goncharov.
+    :license: MIT, see LICENSE for more details.
+"""
+import atexit
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from . import parser
+from .address import Address
+
+# Wall time a single chunk should take in a worker. Long enough to amortise
+# inter-process overhead, short enough to keep all workers busy to the end.
+TARGET_CHUNK_SECONDS = 0.05
+# Number of documents parsed in-process to estimate per-document cost
+SAMPLE_SIZE = 16
+MAX_CHUNKSIZE = 4096
+
+OptionsKey = Tuple[Tuple[str, Any], ...]
+
+
+class DocumentResult(NamedTuple):
+    """Addresses found in a single document of a batch"""
+
+    # where the document is in the input
+    position: int
+    addresses: List[Address]
+    error: Optional[str] = None
+
+
+_pools: Dict[Tuple[int, OptionsKey], ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+_worker_parser: Optional[parser.AddressParser] = None
+
+
+def _init_worker(options: OptionsKey) -> None:
+    """Builds parser (and compiles country rules) once per worker process"""
+    global _worker_parser
+    _worker_parser = parser.AddressParser(**dict(options))
+
+
+def _parse_one(
+    ap: parser.AddressParser, text: str
+) -> Tuple[List[Address], Optional[str]]:
+    """Parses a single document, turning any failure into an error message"""
+    try:
+        return ap.parse(text), None  # type: ignore[return-value]
+    except Exception as exc:
+        return [], "{name}: {exc}".format(name=type(exc).__name__, exc=exc)
+
+
+def _parse_chunk(
+    chunk: Sequence[Tuple[int, str]]
+) -> List[Tuple[int, List[Address], Optional[str]]]:
+    """Worker entry point: parses a chunk of (index, text) pairs"""
+    assert _worker_parser is not None, "worker was not initialized"
+    return [(i, *_parse_one(_worker_parser, text)) for i, text in chunk]
+
+
+def _get_pool(workers: int, options: OptionsKey) -> ProcessPoolExecutor:
+    """Returns a pool of workers for options, creating it on first use"""
+    key = (workers, options)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker, initargs=(options,)
+            )
+            _pools[key] = pool
+        return pool
+
+
+def _discard_pool(workers: int, options: OptionsKey) -> None:
+    with _pools_lock:
+        pool = _pools.pop((workers, options), None)
+    if pool is not None:
+        pool.shutdown(wait=False)
+
+
+def shutdown() -> None:
+    """Stops all worker pools created by parse_many"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=True)
+
+
+atexit.register(shutdown)
+
+
+def _auto_chunksize(seconds_per_doc: float, remaining: int, workers: int) -> int:
+    """Picks chunk size from measured per-document cost"""
+    if seconds_per_doc > 0:
+        chunksize = int(TARGET_CHUNK_SECONDS / seconds_per_doc)
+    else:
+        chunksize = MAX_CHUNKSIZE
+    # leave a few chunks per worker so that slow chunks get balanced out
+    chunksize = min(chunksize, -(-remaining // (workers * 4)), MAX_CHUNKSIZE)
+    return max(chunksize, 1)
+
+
+def parse_many(
+    texts: Iterable[str],
+    country: Optional[str] = None,
+    workers: Optional[int] = None,
+    chunksize: Optional[int] = None,
+    **kwargs: Any,
+) -> List[DocumentResult]:
+    """Parses many documents, spreading them over worker processes.
+
+    Results are returned in input order, one DocumentResult per document.
+    Identical documents are parsed once. A failure while parsing a document
+    is reported in its `error` and does not affect other documents.
+    Pass `countries` instead of `country` to look for several countries.
+    Hooks are called in the processes which parse the documents.
+    """
+    if country is not None:
+        kwargs["country"] = country
+    for name, value in kwargs.items():
+        # options are used as a key of the worker pool, lists of countries,
+        # fields or hooks become tuples
+        if isinstance(value, Iterable) and not isinstance(value, (str, Mapping)):
+            kwargs[name] = tuple(value)
+    options: OptionsKey = tuple(sorted(kwargs.items()))
+    try:
+        hash(options)
+    except TypeError as error:
+        raise TypeError(
+            "Options of parse_many must be hashable: {error}".format(error=error)
+        ) from None
+    # fail early on wrong options, before starting any processes
+    ap = parser.AddressParser(**kwargs)
+
+    # remove duplicates before dispatch
+    docs = list(texts)
+    unique_index: Dict[str, int] = {}
+    slots = [unique_index.setdefault(text, len(unique_index)) for text in docs]
+    uniques = list(unique_index)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(uniques))
+
+    parsed: List[Tuple[List[Address], Optional[str]]] = []
+    if workers <= 1:
+        parsed = [_parse_one(ap, text) for text in uniques]
+    else:
+        # parse a sample in-process to measure per-document cost
+        sample = uniques[:SAMPLE_SIZE] if chunksize is None else []
+        started = time.perf_counter()
+        parsed = [_parse_one(ap, text) for text in sample]
+        rest = list(enumerate(uniques[len(sample) :], start=len(sample)))
+        if rest:
+            if chunksize is None:
+                seconds_per_doc = (time.perf_counter() - started) / len(sample)
+                chunksize = _auto_chunksize(seconds_per_doc, len(rest), workers)
+            chunks = [rest[i : i + chunksize] for i in range(0, len(rest), chunksize)]
+            pool = _get_pool(workers, options)
+            try:
+                for chunk_result in pool.map(_parse_chunk, chunks):
+                    parsed.extend((found, error) for _, found, error in chunk_result)
+            except BrokenProcessPool:
+                _discard_pool(workers, options)
+                raise
+
+    return [
+        DocumentResult(position, *parsed[slot]) for position, slot in enumerate(slots)
+    ]
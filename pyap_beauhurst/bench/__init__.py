@@ -0,0 +1,12 @@
+"""
+    pyap.bench
+    ~~~~~~~~~~~~~~~~
+
+    This package contains performance measurements of the parser. Every
+    module is runnable with `python -m`, e.g.
+    `python -m pyap_beauhurst.bench.street_type`, and
+    `python -m pyap_beauhurst.bench` runs the benchmark suite.
+
+    :copyright: (c) 2015 by Vladimir Goncharov.
+    :license: MIT, see LICENSE for more details.
+"""
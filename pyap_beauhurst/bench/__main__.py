@@ -0,0 +1,83 @@
+"""
+    pyap.bench.__main__
+    ~~~~~~~~~~~~~~~~
+
+    Runs the benchmark suite and compares it to a baseline.
+
+    Usage: python -m pyap_beauhurst.bench [--country US] [--save base.json]
+    [--baseline base.json --threshold 0.1] [--slow SPOOL]
+
+    Exits with status 1 if a case regressed by more than the threshold.
+
+    :copyright: (c) 2015 by Vladimir Goncharov.
+    :license: MIT, see LICENSE for more details.
+"""
+import argparse
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from .. import backends, slowlog
+from . import suite
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m pyap_beauhurst.bench")
+    parser.add_argument(
+        "--country", action="append", choices=suite.COUNTRIES, dest="countries"
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=suite.SIZES)
+    parser.add_argument("--densities", type=float, nargs="+", default=suite.DENSITIES)
+    parser.add_argument("--docs", type=int, default=20, help="documents per case")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--backend", default=backends.DEFAULT_BACKEND)
+    parser.add_argument(
+        "--slow", type=Path, help="also run documents of a slowlog spool"
+    )
+    parser.add_argument("--save", type=Path, help="write results as a baseline")
+    parser.add_argument("--baseline", type=Path, help="compare results to this")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="allowed slowdown as a fraction of the baseline",
+    )
+    args = parser.parse_args(argv)
+
+    results = suite.run(
+        countries=args.countries or suite.COUNTRIES,
+        sizes=args.sizes,
+        densities=args.densities,
+        docs=args.docs,
+        seed=args.seed,
+        backend=args.backend,
+    )
+    if args.slow:
+        results.update(
+            suite.run_documents(
+                slowlog.documents_by_country(args.slow), backend=args.backend
+            )
+        )
+    columns = ("docs_per_s", "mb_per_s", "p50_ms", "p95_ms", "p99_ms") + tuple(
+        stage + "_ms" for stage in suite.STAGES
+    )
+    print("{:<28}".format("case") + "".join("{:>13}".format(c) for c in columns))
+    for key, result in results.items():
+        print(
+            "{:<28}".format(key)
+            + "".join("{:>13.3f}".format(result[c]) for c in columns)
+        )
+
+    if args.save:
+        suite.save(results, args.save)
+    if args.baseline:
+        regressions = suite.compare(suite.load(args.baseline), results, args.threshold)
+        for regression in regressions:
+            print("regression: " + regression)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+"""
+    pyap.bench.alternations
+    ~~~~~~~~~~~~~~~~
+
+    Coverage of word lists of the rules: which street types, states,
+    provinces, numerals etc. matches of full_address go through over a
+    corpus. Regular expressions try alternatives left to right, so words
+    matched most often are better tried first. Counts of words are saved
+    as a profile, and `AddressParser(tuning="profile.json")` compiles
+    rules with words reordered by it, only where that can't change what
+    matches, see grammar.reorder().
+
+    Documents are generated by bench.corpus, or read from a corpus written
+    by it, or from segments of capture.CaptureHook to tune rules for real
+    traffic.
+
+    Usage: python -m pyap_beauhurst.bench.alternations [--country US]
+    [--corpus DIR | --capture DIR] [--docs 500] [--save profile.json]
+    [--check]
+
+    With --check tuned rules are compared to the stock ones by
+    bench.differential, exits with status 1 if they find other addresses.
+
+    :copyright: (c) 2015 by Vladimir Goncharov.
+    :license: MIT, see LICENSE for more details.
+"""
+import argparse
+import re
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .. import capture, grammar
+from ..parser import AddressParser
+from ..utils import DEFAULT_FLAGS
+from . import corpus, differential
+
+COUNTRIES = ("US", "CA", "GB")
+
+_GROUP = re.compile(re.escape(grammar.PROFILE_GROUP) + r"(\d+)_(\d+)")
+
+
+class Coverage(NamedTuple):
+    country: str
+    documents: int
+    matches: int
+    # word lists the rules are made of, by WordList.key
+    word_lists: Dict[str, grammar.WordList]
+    # matches which went through each word, by WordList.key
+    counts: Dict[str, Dict[str, int]]
+
+
+def coverage(country: str, documents: Iterable[str]) -> Coverage:
+    """Counts words of word lists which matches of full_address of
+    country go through in documents
+    """
+    profiled: List[grammar.WordList] = []
+    data = grammar.render(country, profiled=profiled)
+    pattern = re.compile(data.full_address, DEFAULT_FLAGS)
+    words: Dict[int, Tuple[str, str]] = {}
+    for name, index in pattern.groupindex.items():
+        found = _GROUP.match(name)
+        if found:
+            word_list = profiled[int(found.group(1))]
+            words[index] = (word_list.key, word_list.words[int(found.group(2))])
+    word_lists = {word_list.key: word_list for word_list in profiled}
+    counts: Dict[str, Dict[str, int]] = {key: {} for key in word_lists}
+
+    parser = AddressParser(country=country)
+    count = matches = 0
+    for document in documents:
+        count += 1
+        for match in pattern.finditer(parser._normalize_string(document)):
+            matches += 1
+            for index, (key, word) in words.items():
+                if match.start(index) >= 0:
+                    counts[key][word] = counts[key].get(word, 0) + 1
+    return Coverage(country, count, matches, word_lists, counts)
+
+
+def report(result: Coverage, top: int = 5) -> List[str]:
+    """Returns a line per word list: words which matched out of all
+    words, matches and the most frequent words
+    """
+    lines = [
+        "{}: {} documents, {} matches".format(
+            result.country, result.documents, result.matches
+        )
+    ]
+    for key, word_list in result.word_lists.items():
+        counts = result.counts[key]
+        frequent = sorted(counts.items(), key=lambda item: -item[1])[:top]
+        lines.append(
+            "  {key} {first:<24} {used:>4}/{words:<4} {total:>7}  {frequent}".format(
+                key=key,
+                first=", ".join(word_list.words[:2])[:24],
+                used=len(counts),
+                words=len(word_list.words),
+                total=sum(counts.values()),
+                frequent=", ".join(
+                    "{}={}".format(word, count) for word, count in frequent
+                ),
+            )
+        )
+    return lines
+
+
+def _documents(args: argparse.Namespace, country: str) -> List[str]:
+    if args.capture:
+        return [
+            document.text
+            for document in capture.read_segments(args.capture)
+            if document.country == country
+        ]
+    if args.corpus:
+        return [
+            text
+            for source, text in corpus.read_corpus(args.corpus)
+            if source == country
+        ]
+    return differential.generated_documents(country, args.docs, args.seed)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m pyap_beauhurst.bench.alternations")
+    parser.add_argument(
+        "--country", action="append", choices=COUNTRIES, dest="countries"
+    )
+    parser.add_argument("--corpus", type=Path, help="directory of bench.corpus")
+    parser.add_argument("--capture", type=Path, help="directory of captured segments")
+    parser.add_argument("--docs", type=int, default=500, help="generated documents")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", type=Path, help="write the profile to this file")
+    parser.add_argument(
+        "--check", action="store_true", help="compare tuned rules to stock ones"
+    )
+    args = parser.parse_args(argv)
+
+    countries = args.countries or COUNTRIES
+    documents = {country: _documents(args, country) for country in countries}
+    fixtures: List[str] = []
+    if args.check:
+        try:
+            fixtures = differential.fixture_documents()
+        except FileNotFoundError as error:
+            parser.error("{}, --check needs them".format(error))
+    counts = {}
+    for country in countries:
+        result = coverage(country, documents[country])
+        for line in report(result):
+            print(line)
+        counts[country] = {key: words for key, words in result.counts.items() if words}
+
+    path = args.save
+    if path is None and args.check:
+        path = Path(tempfile.mkdtemp()) / "profile.json"
+    if path is not None:
+        grammar.save_counts(path, counts)
+    failed = False
+    if args.check:
+        for country in countries:
+            comparison = differential.run(
+                country,
+                fixtures + documents[country],
+                reference={},
+                candidate={"tuning": str(path)},
+            )
+            print("tuned rules: {}".format(comparison))
+            failed = failed or bool(comparison.mismatches)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""
+    pyap.bench.components
+    ~~~~~~~~~~~~~~~~
+
+    Profiler of the rules by components. Each component of a country's
+    data module (street_number, street_name, city, postal_code, ...) is
+    compiled on its own and tried at every position the parser would try
+    full_address at, within prefilter windows. For each component the
+    report shows how often it was attempted, how often it matched and how
+    much time it took, slowest first, which points at the part of the
+    rules to optimise first.
+
+    Components are measured in isolation: in full_address a component is
+    only attempted where the ones before it matched, so the numbers rank
+    components by cost per attempt and don't add up to the scan time.
+
+    Usage: python -m pyap_beauhurst.bench.components [--country GB]
+    [--corpus DIR] [--docs 100]
+
+    :copyright: (c) 2015 by Vladimir Goncharov.
+    :license: MIT, see LICENSE for more details.
+"""
+import argparse
+import importlib
+import itertools
+import re
+import time
+from pathlib import Path
+from typing import Any, Iterable, List, NamedTuple, Optional, Sequence
+
+from ..parser import AddressParser
+from ..utils import DEFAULT_FLAGS
+from . import corpus
+
+COUNTRIES = ("US", "CA", "GB")
+COMPONENTS = (
+    "po_box",
+    "floor",
+    "building",
+    "occupancy",
+    "street_number",
+    "street_name",
+    "street_type",
+    "post_direction",
+    "city",
+    "region1",
+    "postal_code",
+    "country",
+)
+
+_GROUP_REFERENCE = re.compile(r"\(\?(?:\(|P=)(\w+)\)")
+_GROUP_DEFINITION = re.compile(r"\(\?P<(\w+)>")
+
+
+class ComponentProfile(NamedTuple):
+    component: str
+    attempts: int
+    successes: int
+    # time of the attempts, less time of the loop making them
+    seconds: float
+
+
+def compile_component(regex: str, flags: int = DEFAULT_FLAGS) -> Any:
+    """Compiles a component of the rules. Groups it refers to but which are
+    defined by other components are added as groups which never match.
+    """
+    missing = set(_GROUP_REFERENCE.findall(regex)) - set(
+        _GROUP_DEFINITION.findall(regex)
+    )
+    prefix = "".join("(?P<{}>(?!))?".format(name) for name in sorted(missing))
+    return re.compile(prefix + regex, flags)
+
+
+def components(country: str) -> List[str]:
+    """Returns names of components the data module of country has"""
+    data = importlib.import_module("pyap_beauhurst.source_" + country + ".data")
+    return [name for name in COMPONENTS if isinstance(getattr(data, name, None), str)]
+
+
+def profile(
+    country: str, documents: Iterable[str], prefilter: bool = True
+) -> List[ComponentProfile]:
+    """Returns profiles of components of country and of full_address on
+    documents, slowest first
+    """
+    data = importlib.import_module("pyap_beauhurst.source_" + country + ".data")
+    names = components(country) + ["full_address"]
+    patterns = [compile_component(getattr(data, name)) for name in names]
+    # the loop trying a pattern which fails at once
+    baseline = re.compile("(?!)")
+    parser = AddressParser(country=country, prefilter=prefilter)
+
+    attempts = 0
+    successes = [0] * len(patterns)
+    seconds = [0.0] * len(patterns)
+    overhead = 0.0
+    for document in documents:
+        text = parser._normalize_string(document)
+        if prefilter and parser.anchor is not None:
+            windows = list(parser._candidate_windows(text))
+        else:
+            windows = [(0, len(text))]
+        positions = [range(start, end) for start, end in windows]
+        attempts += sum(map(len, positions))
+        overhead += _time(baseline, text, positions)[0]
+        for index, pattern in enumerate(patterns):
+            elapsed, found = _time(pattern, text, positions)
+            seconds[index] += elapsed
+            successes[index] += found
+
+    profiles = [
+        ComponentProfile(name, attempts, found, max(elapsed - overhead, 0.0))
+        for name, found, elapsed in zip(names, successes, seconds)
+    ]
+    return sorted(profiles, key=lambda p: p.seconds, reverse=True)
+
+
+def _time(pattern: Any, text: str, positions: Sequence[range]) -> Any:
+    match = pattern.match
+    found = 0
+    start = time.perf_counter()
+    for window in positions:
+        for position in window:
+            if match(text, position):
+                found += 1
+    return time.perf_counter() - start, found
+
+
+def report(country: str, profiles: Sequence[ComponentProfile]) -> List[str]:
+    """Returns lines of a table of profiles, with the share of time of each
+    component in the total of components
+    """
+    total = sum(p.seconds for p in profiles if p.component != "full_address")
+    lines = [
+        "{:<4}{:<16}{:>12}{:>12}{:>10}{:>10}{:>8}".format(
+            country, "component", "attempts", "matches", "ms", "ns/try", "share"
+        )
+    ]
+    for p in profiles:
+        lines.append(
+            "{:<4}{:<16}{:>12}{:>12}{:>10.1f}{:>10.0f}{:>8}".format(
+                "",
+                p.component,
+                p.attempts,
+                p.successes,
+                p.seconds * 1000,
+                p.seconds / max(p.attempts, 1) * 1e9,
+                ""
+                if p.component == "full_address"
+                else "{:.0%}".format(p.seconds / total if total else 0),
+            )
+        )
+    return lines
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m pyap_beauhurst.bench.components")
+    parser.add_argument(
+        "--country", action="append", choices=COUNTRIES, dest="countries"
+    )
+    parser.add_argument("--corpus", type=Path, help="directory of bench.corpus")
+    parser.add_argument("--docs", type=int, default=100, help="generated documents")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-prefilter", action="store_false", dest="prefilter")
+    args = parser.parse_args(argv)
+
+    for country in args.countries or COUNTRIES:
+        documents: Iterable[str]
+        if args.corpus:
+            documents = (
+                text
+                for source, text in corpus.read_corpus(args.corpus)
+                if source == country
+            )
+        else:
+            documents = (
+                document.text
+                for document in itertools.islice(
+                    corpus.generate(country, seed=args.seed), args.docs
+                )
+            )
+        for line in report(country, profile(country, documents, args.prefilter)):
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
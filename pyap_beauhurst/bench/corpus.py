@@ -0,0 +1,358 @@
+"""
+    pyap.bench.corpus
+    ~~~~~~~~~~~~~~~~
+
+    Seeded generator of synthetic documents with addresses at known
+    positions. Addresses are built from vocabularies of the data modules:
+    street types, US states, Canadian provinces, British postcode shapes
+    and numeral words. They are embedded in noise text - prose, tables and
+    emails - at a given density.
+
+    A corpus is written as two JSON lines files, one document or address
+    per line, so corpora of any size are generated in constant memory:
+
+    - corpus.jsonl: {"doc": 0, "country": "US", "text": "..."}
+    - truth.jsonl: {"doc": 0, "start": 10, "end": 52, "address": "..."}
+
+    Usage: python -m pyap_beauhurst.bench.corpus DIRECTORY [--country US]
+    [--size 100M] [--density 1] [--seed 0]
+
+    :copyright: (c) 2015 by Vladimir Goncharov.
+    :license: MIT, see LICENSE for more details.
+"""
+import argparse
+import json
+import random
+import string
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from .. import numerals
+from ..grammar import Raw, WordList
+from ..source_CA import data as data_ca
+from ..source_GB import data as data_gb
+from ..source_US import data as data_us
+
+COUNTRIES = ("US", "CA", "GB")
+KINDS = ("prose", "table", "email")
+CORPUS = "corpus.jsonl"
+TRUTH = "truth.jsonl"
+
+STREET_NAMES = (
+    "Maple Oak Cedar Elm Pine Willow Washington Lincoln Jefferson Madison "
+    "Franklin Highland Lakeview Hillcrest Sunset Riverside Church Mill "
+    "Spring Meadow Chestnut Walnut Victoria Albert Queens Kings Station"
+).split() + ["Park View", "Green Valley", "Old Mill", "Forest Hill"]
+CITIES = (
+    "Springfield Fairview Greenville Salem Clinton Georgetown Arlington "
+    "Ashland Burlington Kingston Milton Oxford Richmond Windsor Dover "
+    "Bristol Chester Lancaster Hamilton Stratford"
+).split() + ["Mount Vernon", "Lake City", "Port Hope", "New Market"]
+PROVINCE_ABBREVIATIONS = "AB BC MB NB NL NT NS NU ON PE QC SK YT".split()
+NOISE = (
+    "the of and to in is was for on that with as by at from this have are "
+    "be quarterly report meeting team budget project review revenue growth "
+    "customer service delivery order invoice schedule update office staff "
+    "product market sales plan agreement contract payment account manager "
+    "please note attached following week month year today thanks regards "
+    "new about more than other some into over after before during between "
+    "under about across without within along"
+).split()
+FIRST_NAMES = "Alice Bob Carol David Emma Frank Grace Henry Irene Jack".split()
+LAST_NAMES = "Smith Jones Brown Taylor Wilson Evans Walker Wright Hall".split()
+
+# GB postcode letters by position, the same ones the postal_code rule accepts
+_GB_AREA = "ABCDEFGHIJKLMNOPRSTUWYZ"
+_GB_SINGLE_AREA = "BEGLMNSW"
+_GB_DISTRICT = "ABCDEFGHKLMNOPQRSTUVWXY"
+_GB_UNIT = "ABDEFGHJLNPQRSTUWXYZ"
+_GB_OUTWARD = ("A9", "A99", "AA9", "AA99")
+# CA postal code letters, by position
+_CA_FIRST = "ABCEGHJKLMNPRSTVXY"
+_CA_OTHER = "ABCEGHJKLMNPRSTVWXYZ"
+
+
+class Document(NamedTuple):
+    text: str
+    # (start, end) of every address in text
+    spans: List[Tuple[int, int]]
+
+
+def _words(word_list: WordList) -> List[str]:
+    """Returns plain words of word_list, Raw regular expressions are left out"""
+    return [word for word in word_list.words if not isinstance(word, Raw)]
+
+
+class Vocabulary(NamedTuple):
+    street_types: List[str]
+    regions: List[str]
+
+
+VOCABULARIES = {
+    "US": Vocabulary(
+        data_us.street_type_list,
+        data_us.state_abbreviations.words
+        + [state.title() for state in _words(data_us.states)],
+    ),
+    "CA": Vocabulary(
+        _words(data_ca.street_types),
+        PROVINCE_ABBREVIATIONS
+        + [province.title() for province in _words(data_ca.provinces)],
+    ),
+    "GB": Vocabulary(_words(data_gb.street_types), []),
+}
+
+
+def make_address(rng: random.Random, country: str) -> str:
+    """Returns a random address of country"""
+    vocabulary = VOCABULARIES[country]
+    if rng.random() < 0.1:
+        number = rng.choice(_words(numerals.zero_to_nine)[1:]).title()
+    else:
+        number = str(rng.randint(1, 9999))
+    street = "{number} {name} {street_type}".format(
+        number=number,
+        name=rng.choice(STREET_NAMES),
+        street_type=rng.choice(vocabulary.street_types).title(),
+    )
+    city = rng.choice(CITIES)
+    if country == "US":
+        return "{street}, {city}, {state} {zip}".format(
+            street=street,
+            city=city,
+            state=rng.choice(vocabulary.regions),
+            zip="{:05d}".format(rng.randint(501, 99950)),
+        )
+    if country == "CA":
+        postal_code = "{}{}{} {}{}{}".format(
+            rng.choice(_CA_FIRST),
+            rng.randint(0, 9),
+            rng.choice(_CA_OTHER),
+            rng.randint(0, 9),
+            rng.choice(_CA_OTHER),
+            rng.randint(0, 9),
+        )
+        return "{street}, {city}, {province} {postal_code}".format(
+            street=street,
+            city=city,
+            province=rng.choice(vocabulary.regions),
+            postal_code=postal_code,
+        )
+    shape = rng.choice(_GB_OUTWARD)
+    outward = rng.choice(_GB_AREA if shape.startswith("AA") else _GB_SINGLE_AREA)
+    for char in shape[1:]:
+        outward += rng.choice(_GB_DISTRICT) if char == "A" else str(rng.randint(1, 9))
+    inward = "{}{}{}".format(
+        rng.randint(0, 9), rng.choice(_GB_UNIT), rng.choice(_GB_UNIT)
+    )
+    return "{street}, {city}, {postcode}".format(
+        street=street, city=city, postcode=outward + " " + inward
+    )
+
+
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(NOISE) for _ in range(rng.randint(5, 16))]
+    if rng.random() < 0.2:
+        words.insert(rng.randrange(len(words)), str(rng.randint(1, 2030)))
+    return " ".join(words).capitalize() + "."
+
+
+def _prose(rng: random.Random, addresses: List[str]) -> str:
+    sentences = [_sentence(rng) for _ in range(rng.randint(3, 8))]
+    for address in addresses:
+        lead = rng.choice(("Our office is at", "Send it to", "We moved to"))
+        sentences.insert(
+            rng.randint(0, len(sentences)),
+            "{lead}\n\x00{address}\x01\n".format(lead=lead, address=address),
+        )
+    return " ".join(sentences)
+
+
+def _table(rng: random.Random, addresses: List[str]) -> str:
+    rows = ["| item | description | quantity | price |", "|---|---|---|---|"]
+    for _ in range(rng.randint(2, 6)):
+        rows.append(
+            "| {} | {} {} | {} | {}.{:02d} |".format(
+                "".join(rng.choice(string.ascii_uppercase) for _ in range(3)),
+                rng.choice(NOISE),
+                rng.choice(NOISE),
+                rng.randint(1, 500),
+                rng.randint(1, 9999),
+                rng.randint(0, 99),
+            )
+        )
+    for address in addresses:
+        rows.insert(
+            rng.randint(2, len(rows)),
+            "| site | delivery to | \x00{address}\x01 | |".format(address=address),
+        )
+    return "\n".join(rows)
+
+
+def _email(rng: random.Random, addresses: List[str]) -> str:
+    sender = (rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES))
+    lines = [
+        "From: {0} {1} <{2}@example.com>".format(*sender, ".".join(sender).lower()),
+        "To: {}@example.org".format(rng.choice(FIRST_NAMES).lower()),
+        "Subject: {}".format(" ".join(rng.choice(NOISE) for _ in range(4))),
+        "",
+        "Hi {},".format(rng.choice(FIRST_NAMES)),
+        "",
+        " ".join(_sentence(rng) for _ in range(rng.randint(1, 4))),
+        "",
+        "Regards,",
+        "{} {}".format(*sender),
+    ]
+    for address in addresses:
+        lines.append("\x00{address}\x01".format(address=address))
+    lines.append("Tel: +1 555 {:04d}".format(rng.randint(0, 9999)))
+    return "\n".join(lines)
+
+
+_BLOCKS: Dict[str, Callable[[random.Random, List[str]], str]] = {
+    "prose": _prose,
+    "table": _table,
+    "email": _email,
+}
+
+
+def generate(
+    country: str,
+    seed: int = 0,
+    density: float = 1.0,
+    doc_size: int = 2000,
+    kinds: Tuple[str, ...] = KINDS,
+) -> Iterator[Document]:
+    """Yields an endless stream of documents of at least doc_size characters
+    with density addresses of country per 1000 characters on average
+    """
+    rng = random.Random("{}/{}".format(seed, country))
+    # addresses owed to the text generated so far
+    due = 0.0
+    while True:
+        blocks = []
+        length = 0
+        while length < doc_size:
+            addresses = []
+            while due >= 1:
+                addresses.append(make_address(rng, country))
+                due -= 1
+            block = _BLOCKS[rng.choice(kinds)](rng, addresses)
+            blocks.append(block)
+            length += len(block) + 2
+            due += (len(block) + 2) * density / 1000
+        yield _extract_spans("\n\n".join(blocks))
+
+
+def _extract_spans(marked: str) -> Document:
+    """Removes \\x00 and \\x01 markers around addresses, which blocks put
+    there to show where the addresses ended up
+    """
+    parts = marked.split("\x00")
+    text = [parts[0]]
+    spans = []
+    length = len(parts[0])
+    for part in parts[1:]:
+        address, rest = part.split("\x01", 1)
+        spans.append((length, length + len(address)))
+        text += [address, rest]
+        length += len(address) + len(rest)
+    return Document("".join(text), spans)
+
+
+def write_corpus(
+    directory: Path,
+    country: str,
+    size: int,
+    seed: int = 0,
+    density: float = 1.0,
+    doc_size: int = 2000,
+    kinds: Tuple[str, ...] = KINDS,
+) -> int:
+    """Writes documents of at least size characters in total to directory,
+    returns number of documents
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    written = count = 0
+    documents = generate(country, seed, density, doc_size, kinds)
+    with open(directory / CORPUS, "w", encoding="utf-8") as corpus, open(
+        directory / TRUTH, "w", encoding="utf-8"
+    ) as truth:
+        while written < size:
+            document = next(documents)
+            corpus.write(
+                json.dumps({"doc": count, "country": country, "text": document.text})
+                + "\n"
+            )
+            for start, end in document.spans:
+                truth.write(
+                    json.dumps(
+                        {
+                            "doc": count,
+                            "start": start,
+                            "end": end,
+                            "address": document.text[start:end],
+                        }
+                    )
+                    + "\n"
+                )
+            written += len(document.text)
+            count += 1
+    return count
+
+
+def read_corpus(directory: Path) -> Iterator[Tuple[str, str]]:
+    """Yields (country, text) of documents written by write_corpus"""
+    with open(directory / CORPUS, encoding="utf-8") as corpus:
+        for line in corpus:
+            document = json.loads(line)
+            yield document["country"], document["text"]
+
+
+def read_truth(directory: Path) -> Iterator[Tuple[int, int, int]]:
+    """Yields (document number, start, end) of addresses written by
+    write_corpus
+    """
+    with open(directory / TRUTH, encoding="utf-8") as truth:
+        for line in truth:
+            span = json.loads(line)
+            yield span["doc"], span["start"], span["end"]
+
+
+def parse_size(size: str) -> int:
+    """Converts sizes like 512K, 100M or 2G to characters"""
+    units = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+    unit = units.get(size[-1:].upper())
+    if unit is None:
+        return int(size)
+    return int(float(size[:-1]) * unit)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m pyap_beauhurst.bench.corpus")
+    parser.add_argument("directory", type=Path)
+    parser.add_argument("--country", choices=COUNTRIES, default="US")
+    parser.add_argument("--size", type=parse_size, default="10M")
+    parser.add_argument(
+        "--density", type=float, default=1.0, help="addresses per 1000 characters"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--doc-size", type=int, default=2000)
+    parser.add_argument("--kinds", nargs="+", choices=KINDS, default=KINDS)
+    args = parser.parse_args(argv)
+    count = write_corpus(
+        args.directory,
+        args.country,
+        args.size,
+        args.seed,
+        args.density,
+        args.doc_size,
+        tuple(args.kinds),
+    )
+    print(
+        "{count} documents written to {args.directory}".format(count=count, args=args)
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+    pyap.bench.differential
+    ~~~~~~~~~~~~~~~~
+
+    Runs a reference parser and a candidate configuration side by side and
+    checks that they find the same addresses: every field and span of
+    every address has to be equal. A document on which they differ is
+    shrunk to a minimal text which still shows the difference. Time both
+    of them take is reported as a speedup of the candidate.
+
+    Documents are string literals of the test modules, which only a source
+    checkout has, and text generated by bench.corpus, or a corpus written
+    by it.
+
+    Usage: python -m pyap_beauhurst.bench.differential [--country US]
+    [--reference prefilter=false] [--candidate backend=regex] [--corpus DIR]
+
+    Exits with status 1 if the parsers differ.
+
+    :copyright: (c) 2015 by Vladimir Goncharov.
+    :license: MIT, see LICENSE for more details.
+"""
+import argparse
+import itertools
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .. import address
+from ..parser import AddressParser
+from . import corpus, street_type
+
+COUNTRIES = ("US", "CA", "GB")
+# the reference runs the rules over the whole text, with no shortcuts
+REFERENCE: Dict[str, Any] = {"prefilter": False}
+
+Fields = List[Dict[str, Any]]
+
+
+class Mismatch(NamedTuple):
+    # number of the document
+    document: int
+    text: str
+    # shortest part of text on which parsers still differ
+    minimal: str
+    reference: Fields
+    candidate: Fields
+
+
+class Report(NamedTuple):
+    country: str
+    documents: int
+    characters: int
+    mismatches: List[Mismatch]
+    reference_seconds: float
+    candidate_seconds: float
+
+    @property
+    def speedup(self) -> float:
+        return self.reference_seconds / self.candidate_seconds
+
+    def __str__(self) -> str:
+        return (
+            "{country}: {documents} documents, {characters} characters, "
+            "{result}, speedup {speedup:.2f}x "
+            "({reference:.3f}s -> {candidate:.3f}s)".format(
+                country=self.country,
+                documents=self.documents,
+                characters=self.characters,
+                result="{} mismatches".format(len(self.mismatches))
+                if self.mismatches
+                else "equivalent",
+                speedup=self.speedup,
+                reference=self.reference_seconds,
+                candidate=self.candidate_seconds,
+            )
+        )
+
+
+def fields(addresses: Iterable[Optional[Any]]) -> Fields:
+    """Returns all fields of addresses, spans included"""
+    return [
+        {field: getattr(parsed, field) for field in address.FIELDS}
+        for parsed in addresses
+        if parsed is not None
+    ]
+
+
+def shrink(text: str, differs: Callable[[str], bool]) -> str:
+    """Returns a shortest part of text for which differs is still true,
+    removing lines, then ever smaller chunks of characters (ddmin)
+    """
+    lines = text.splitlines(keepends=True)
+    text = "".join(_reduce(lines, lambda kept: differs("".join(kept))))
+    return "".join(_reduce(list(text), lambda kept: differs("".join(kept))))
+
+
+def _reduce(items: List[str], differs: Callable[[List[str]], bool]) -> List[str]:
+    chunk = max(len(items) // 2, 1)
+    while items:
+        removed = False
+        start = 0
+        while start < len(items):
+            kept = items[:start] + items[start + chunk :]
+            if kept and differs(kept):
+                items = kept
+                removed = True
+            else:
+                start += chunk
+        if chunk == 1 and not removed:
+            break
+        chunk = max(chunk // 2, 1)
+    return items
+
+
+def fixture_documents() -> List[str]:
+    """Returns string literals of the test modules, FileNotFoundError is
+    raised if there are none
+    """
+    documents = []
+    for path in street_type.test_modules():
+        documents.extend(street_type.load_inputs(path))
+    return documents
+
+
+def generated_documents(
+    country: str, count: int, seed: int = 0, density: float = 2.0
+) -> List[str]:
+    return [
+        document.text
+        for document in itertools.islice(
+            corpus.generate(country, seed=seed, density=density), count
+        )
+    ]
+
+
+def run(
+    country: str,
+    documents: Iterable[str],
+    reference: Dict[str, Any] = REFERENCE,
+    candidate: Optional[Dict[str, Any]] = None,
+) -> Report:
+    """Parses documents with parsers of the reference and candidate
+    options and compares addresses they find
+    """
+    parsers = [
+        AddressParser(country=country, **reference),
+        AddressParser(country=country, **(candidate or {})),
+    ]
+    seconds = [0.0, 0.0]
+    mismatches = []
+    count = characters = 0
+    for index, text in enumerate(documents):
+        found: List[Fields] = []
+        for number, parser in enumerate(parsers):
+            start = time.perf_counter()
+            addresses = parser.parse(text)
+            seconds[number] += time.perf_counter() - start
+            found.append(fields(addresses))
+        if found[0] != found[1]:
+            minimal = shrink(
+                text,
+                lambda part: fields(parsers[0].parse(part))
+                != fields(parsers[1].parse(part)),
+            )
+            mismatches.append(
+                Mismatch(
+                    index,
+                    text,
+                    minimal,
+                    fields(parsers[0].parse(minimal)),
+                    fields(parsers[1].parse(minimal)),
+                )
+            )
+        count += 1
+        characters += len(text)
+    return Report(country, count, characters, mismatches, seconds[0], seconds[1])
+
+
+def parse_options(options: Iterable[str]) -> Dict[str, Any]:
+    """Converts key=value pairs to AddressParser options"""
+    values = {"true": True, "false": False, "none": None}
+    parsed: Dict[str, Any] = {}
+    for option in options:
+        key, _, value = option.partition("=")
+        if value.lower() in values:
+            parsed[key] = values[value.lower()]
+        else:
+            try:
+                parsed[key] = float(value) if "." in value else int(value)
+            except ValueError:
+                parsed[key] = value
+    return parsed
+
+
+def _documents(args: argparse.Namespace, country: str) -> List[str]:
+    if args.corpus:
+        return [
+            text
+            for source, text in corpus.read_corpus(args.corpus)
+            if source == country
+        ]
+    return fixture_documents() + generated_documents(country, args.docs, args.seed)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m pyap_beauhurst.bench.differential")
+    parser.add_argument(
+        "--country", action="append", choices=COUNTRIES, dest="countries"
+    )
+    parser.add_argument(
+        "--reference",
+        nargs="*",
+        default=["prefilter=false"],
+        help="options of the reference parser, as key=value",
+    )
+    parser.add_argument(
+        "--candidate",
+        nargs="*",
+        default=[],
+        help="options of the candidate parser, as key=value",
+    )
+    parser.add_argument("--corpus", type=Path, help="directory of bench.corpus")
+    parser.add_argument("--docs", type=int, default=200, help="generated documents")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    reference = parse_options(args.reference)
+    candidate = parse_options(args.candidate)
+    failed = False
+    for country in args.countries or COUNTRIES:
+        try:
+            documents = _documents(args, country)
+        except FileNotFoundError as error:
+            parser.error("{}, pass --corpus instead".format(error))
+        report = run(country, documents, reference, candidate)
+        print(report)
+        for mismatch in report.mismatches:
+            failed = True
+            print("  document {}: {!r}".format(mismatch.document, mismatch.minimal))
+            print("    reference: {}".format(_describe(mismatch.reference)))
+            print("    candidate: {}".format(_describe(mismatch.candidate)))
+    return 1 if failed else 0
+
+
+def _describe(found: Fields) -> List[Tuple[Any, ...]]:
+    return [
+        (parsed["full_address"], parsed["source_start"], parsed["source_end"])
+        for parsed in found
+    ]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""
+    pyap.bench.replay
+    ~~~~~~~~~~~~~~~~
+
+    Replays documents captured by capture.CaptureHook through a parser of
+    any options, as fast as it goes, and reports throughput and latency
+    per country, the same way as the benchmark suite. Segments are read
+    into memory first, so that reading them isn't measured.
+
+    Usage: python -m pyap_beauhurst.bench.replay DIR [--country US]
+    [--option backend=regex ...] [--repeat 3] [--save replay.json]
+    [--baseline replay.json --threshold 0.1]
+
+    Exits with status 1 if a country regressed by more than the threshold.
+
+    :copyright: (c) 2015 by Vladimir Goncharov.
+    :license: MIT, see LICENSE for more details.
+"""
+import argparse
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from .. import capture
+from . import differential, suite
+
+COLUMNS = ("docs_per_s", "mb_per_s", "p50_ms", "p95_ms", "p99_ms", "addresses")
+
+
+def load(
+    directory: Union[str, Path], countries: Optional[Sequence[str]] = None
+) -> Dict[str, List[str]]:
+    """Returns texts of captured documents by country of their parser"""
+    documents: Dict[str, List[str]] = {}
+    for document in capture.read_segments(directory):
+        if countries is None or document.country in countries:
+            documents.setdefault(document.country, []).append(document.text)
+    return documents
+
+
+def replay(
+    documents: Dict[str, List[str]], repeat: int = 1, **options: Any
+) -> Dict[str, Dict[str, float]]:
+    """Returns measurements of parsing documents repeat times over, under
+    keys "country/replay"
+    """
+    return suite.run_documents(
+        {country: texts * repeat for country, texts in documents.items()},
+        name="replay",
+        **options
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m pyap_beauhurst.bench.replay")
+    parser.add_argument("directory", type=Path, help="directory of captured segments")
+    parser.add_argument("--country", action="append", dest="countries")
+    parser.add_argument(
+        "--option",
+        nargs="*",
+        default=[],
+        help="options of the parser, as key=value",
+    )
+    parser.add_argument("--repeat", type=int, default=1, help="passes over documents")
+    parser.add_argument("--save", type=Path, help="write results as a baseline")
+    parser.add_argument("--baseline", type=Path, help="compare results to this")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="allowed slowdown as a fraction of the baseline",
+    )
+    args = parser.parse_args(argv)
+
+    documents = load(args.directory, args.countries)
+    if not documents:
+        print("no captured documents in {}".format(args.directory))
+        return 1
+    results = replay(
+        documents, repeat=args.repeat, **differential.parse_options(args.option)
+    )
+    print(
+        "{:<16}{:>10}".format("case", "docs")
+        + "".join("{:>13}".format(column) for column in COLUMNS)
+    )
+    for key, result in results.items():
+        country = key.rpartition("/")[0]
+        print(
+            "{:<16}{:>10}".format(key, len(documents[country]) * args.repeat)
+            + "".join("{:>13.3f}".format(result[column]) for column in COLUMNS)
+        )
+
+    if args.save:
+        suite.save(results, args.save)
+    if args.baseline:
+        regressions = suite.compare(suite.load(args.baseline), results, args.threshold)
+        for regression in regressions:
+            print("regression: " + regression)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""
+    pyap.bench.street_type
+    ~~~~~~~~~~~~~~~~
+
+    Micro-benchmark of US street type matching: the trie built by
+    street_type_list_to_regex against a flat alternation of every street
+    type, on strings from tests/test_parser_us.py. Test modules are only
+    in a source checkout, they aren't installed with the package.
+
+    Usage: python -m pyap_beauhurst.bench.street_type [test_parser_us.py]
+
+    :copyright: (c) 2015 by Vladimir Goncharov.
+    :license: MIT, see LICENSE for more details.
+"""
+import ast
+import re
+import sys
+import timeit
+from pathlib import Path
+from typing import List, Optional, Pattern, Sequence, Tuple
+
+from ..source_US import data
+from ..utils import DEFAULT_FLAGS
+
+TESTS = Path(__file__).resolve().parents[2] / "tests"
+DIV = r"[\.\s,]{0,2}"
+
+
+def test_modules(pattern: str = "test_*.py") -> List[Path]:
+    """Returns test modules of a source checkout matching pattern"""
+    paths = sorted(TESTS.glob(pattern))
+    if not paths:
+        raise FileNotFoundError(
+            "no {pattern} in {directory}, test modules are only in a source "
+            "checkout of pyap_beauhurst".format(pattern=pattern, directory=TESTS)
+        )
+    return paths
+
+
+def load_inputs(path: Optional[Path] = None) -> List[str]:
+    """Returns string literals of a test module, those are test inputs,
+    of test_parser_us.py by default
+    """
+    if path is None:
+        (path,) = test_modules("test_parser_us.py")
+    tree = ast.parse(path.read_text(encoding="utf-8"))
+    return [
+        node.value
+        for node in ast.walk(tree)
+        if isinstance(node, ast.Constant) and isinstance(node.value, str)
+    ]
+
+
+def flat_street_type(street_types: Sequence[str]) -> str:
+    """Street type regex as a flat alternation, one branch per street type"""
+    branches = []
+    for street_type in street_types:
+        spelled = "".join(
+            "[{}{}]".format(char.upper(), char.lower()) for char in street_type
+        )
+        branches.append(r"\b{spelled}\b{div}".format(spelled=spelled, div=DIV))
+    return "|".join(branches)
+
+
+def run(inputs: Sequence[str], number: int = 5) -> List[Tuple[str, int, float, float]]:
+    """Returns (name, length, seconds, speedup) rows, timing finditer of
+    each pattern over all inputs. Both patterns must find the same matches,
+    ValueError is raised with the inputs they don't.
+    """
+    patterns = [
+        ("flat", re.compile(flat_street_type(data.street_type_list), DEFAULT_FLAGS)),
+        (
+            "trie",
+            re.compile(
+                data.street_type_list_to_regex(data.street_type_list), DEFAULT_FLAGS
+            ),
+        ),
+    ]
+    found = [_find(pattern, inputs) for _, pattern in patterns]
+    mismatched = [text for text, flat, trie in zip(inputs, *found) if flat != trie]
+    if mismatched:
+        raise ValueError(
+            "street type patterns found different matches in {count} inputs: "
+            "{inputs}".format(
+                count=len(mismatched),
+                inputs=", ".join(repr(text) for text in mismatched[:5]),
+            )
+        )
+
+    timings = [
+        min(timeit.repeat(lambda: _find(pattern, inputs), number=number, repeat=3))
+        / number
+        for _, pattern in patterns
+    ]
+    return [
+        (name, len(pattern.pattern), seconds, timings[0] / seconds)
+        for (name, pattern), seconds in zip(patterns, timings)
+    ]
+
+
+def _find(pattern: Pattern, inputs: Sequence[str]) -> List[List[str]]:
+    return [[m.group() for m in pattern.finditer(text)] for text in inputs]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = sys.argv[1:] if argv is None else argv
+    try:
+        inputs = load_inputs(Path(args[0]) if args else None)
+    except FileNotFoundError as error:
+        sys.exit(str(error))
+    print(
+        "{count} inputs, {size} characters".format(
+            count=len(inputs), size=sum(map(len, inputs))
+        )
+    )
+    try:
+        rows = run(inputs)
+    except ValueError as error:
+        sys.exit(str(error))
+    print("{:<8}{:>12}{:>12}{:>10}".format("pattern", "length", "ms", "speedup"))
+    for name, length, seconds, speedup in rows:
+        print(
+            "{:<8}{:>12}{:>12.2f}{:>9.1f}x".format(
+                name, length, seconds * 1000, speedup
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+    pyap.bench.suite
+    ~~~~~~~~~~~~~~~~
+
+    Throughput and latency of AddressParser.parse per country, over
+    generated documents of several sizes and address densities, together
+    with time spent in each of hooks.STAGES.
+
+    Documents spooled by slowlog.SlowDocumentRecorder are measured as
+    cases of their own, so that they stay regression inputs.
+
+    Results are saved as a JSON baseline, which later runs are compared to.
+
+    :copyright: (c) 2015 by Vladimir Goncharov.
+    :license: MIT, see LICENSE for more details.
+"""
+import json
+import random
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, NamedTuple, Sequence
+
+from .. import hooks
+from ..parser import AddressParser
+
+COUNTRIES = ("US", "CA", "GB")
+# document sizes in characters
+SIZES = (1000, 10000)
+# addresses per 1000 characters of a document
+DENSITIES = (0.0, 1.0, 5.0)
+STAGES = hooks.STAGES
+
+SAMPLES = {
+    "US": [
+        "225 E. John Carpenter Freeway, Suite 1500 Irving, Texas 75062",
+        "1015 South Western Avenue, Chicago, IL 60649",
+        "4090 Westown Pkwy Ste B2 Chicago, IL 60614",
+        "643 Lincoln Rd. Miami Beach, FL 33139",
+        "1500 Westlake Avenue North Suite 108 Seattle, WA 98109",
+    ],
+    "CA": [
+        "3000 Steeles Avenue East, Suite 700 Markham, Ontario Canada L3R 9W2",
+        "1730 McPherson Crt. Unit 35, Pickering, ON",
+        "20 Fleeceline Road, Toronto, Ontario M8V 2K3",
+        "7034 Gilliespie Lane, Mississauga, ON L5W1E8",
+        "555, Hamilton Street Vancouver, British Columbia V6B 2R1",
+    ],
+    "GB": [
+        "32 London Bridge St, London SE1 9SG",
+        "11 Lincoln Road, Guildford GU1 1UA",
+        "12 Gleneagles Avenue, Leicester LE4 7YE",
+        "55 Glenfada Park, Londonderry BT48 9DR",
+        "Studio 53, Harrison cove, Smithbury, G88 4US, United Kingdom",
+    ],
+}
+
+FILLER = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod "
+    "tempor incididunt ut labore et dolore magna aliqua quarterly report "
+    "meeting notes revenue grew by 12 percent compared with 2019 contact "
+    "the team for details the office is open from 9 to 5 on weekdays"
+).split()
+
+
+class Case(NamedTuple):
+    country: str
+    size: int
+    density: float
+
+    @property
+    def key(self) -> str:
+        return "{country}/size={size}/density={density:g}".format(**self._asdict())
+
+
+def make_documents(
+    country: str, count: int, size: int, density: float, seed: int = 0
+) -> List[str]:
+    """Returns count documents of about size characters of filler text with
+    density sample addresses of country per 1000 characters
+    """
+    rng = random.Random("{}/{}/{}/{}".format(seed, country, size, density))
+    samples = SAMPLES[country]
+    documents = []
+    for _ in range(count):
+        addresses = round(size * density / 1000)
+        parts: List[str] = []
+        length = 0
+        while length < size:
+            word = rng.choice(FILLER)
+            if rng.random() < 0.08:
+                word += "." if rng.random() < 0.7 else "\n\n"
+            parts.append(word)
+            length += len(word) + 1
+        # each address goes on its own line after a random word
+        for position in sorted(
+            rng.sample(range(len(parts)), min(addresses, len(parts)))
+        ):
+            parts[position] += "\n" + rng.choice(samples) + "\n"
+        documents.append(" ".join(parts))
+    return documents
+
+
+def percentile(values: Sequence[float], percent: float) -> float:
+    """Returns the nearest-rank percentile of values"""
+    ordered = sorted(values)
+    rank = max(int(-(-percent * len(ordered) // 100)), 1)
+    return ordered[rank - 1]
+
+
+def measure(parser: AddressParser, documents: Sequence[str]) -> Dict[str, float]:
+    """Returns throughput and latency of parser.parse over documents"""
+    latencies = []
+    found = 0
+    started = time.perf_counter()
+    for document in documents:
+        start = time.perf_counter()
+        found += len(parser.parse(document))
+        latencies.append(time.perf_counter() - start)
+    elapsed = time.perf_counter() - started
+    size = sum(len(document.encode("utf-8")) for document in documents)
+    return {
+        "docs_per_s": len(documents) / elapsed,
+        "mb_per_s": size / elapsed / 1e6,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "addresses": found,
+    }
+
+
+def measure_stages(parser: AddressParser, documents: Sequence[str]) -> Dict[str, float]:
+    """Returns milliseconds per document spent in each of STAGES"""
+    hook = hooks.HistogramHook()
+    parser.hooks.append(hook)
+    try:
+        for document in documents:
+            parser.parse(document)
+    finally:
+        parser.hooks.remove(hook)
+    (histograms,) = hook.histograms.values()
+    return {
+        stage + "_ms": histograms[stage].sum * 1000 / len(documents) for stage in STAGES
+    }
+
+
+def run(
+    countries: Sequence[str] = COUNTRIES,
+    sizes: Sequence[int] = SIZES,
+    densities: Sequence[float] = DENSITIES,
+    docs: int = 20,
+    seed: int = 0,
+    **options: Any
+) -> Dict[str, Dict[str, float]]:
+    """Returns measurements of every case, options are passed to
+    AddressParser
+    """
+    results = {}
+    for country in countries:
+        parser = AddressParser(country=country, **options)
+        for size in sizes:
+            for density in densities:
+                case = Case(country, size, density)
+                documents = make_documents(country, docs, size, density, seed)
+                # first document warms up caches of the regex engine
+                parser.parse(documents[0])
+                result = measure(parser, documents)
+                result.update(measure_stages(parser, documents))
+                results[case.key] = result
+    return results
+
+
+def run_documents(
+    documents: Mapping[str, Sequence[str]], name: str = "slow", **options: Any
+) -> Dict[str, Dict[str, float]]:
+    """Returns measurements of given documents by country, such as ones
+    spooled by slowlog.SlowDocumentRecorder, under keys "country/name"
+    """
+    results = {}
+    for country, texts in sorted(documents.items()):
+        if "," in country:
+            # documents of a parser of several countries
+            parser = AddressParser(countries=country.split(","), **options)
+        else:
+            parser = AddressParser(country=country, **options)
+        parser.parse(texts[0])
+        result = measure(parser, texts)
+        result.update(measure_stages(parser, texts))
+        results["{}/{}".format(country, name)] = result
+    return results
+
+
+def save(results: Dict[str, Dict[str, float]], path: Path) -> None:
+    path.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+
+
+def load(path: Path) -> Dict[str, Dict[str, float]]:
+    return json.loads(path.read_text())  # type: ignore[no-any-return]
+
+
+def compare(
+    baseline: Dict[str, Dict[str, float]],
+    results: Dict[str, Dict[str, float]],
+    threshold: float = 0.1,
+) -> List[str]:
+    """Returns descriptions of regressions: cases where throughput dropped or
+    p95 latency grew by more than threshold, a fraction of the baseline
+    """
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        before = baseline[key]
+        for metric, worse in (("docs_per_s", -1), ("p95_ms", 1)):
+            change = (result[metric] - before[metric]) / before[metric]
+            if change * worse > threshold:
+                regressions.append(
+                    "{key}: {metric} {before:.4g} -> {after:.4g} ({change:+.0%})".format(
+                        key=key,
+                        metric=metric,
+                        before=before[metric],
+                        after=result[metric],
+                        change=change,
+                    )
+                )
+    return regressions
@@ -0,0 +1,182 @@
+"""
+    pyap.capture
+    ~~~~~~~~~~~~~~~~
+
+    This module contains a hook which captures a sample of parsed
+    documents into gzip-compressed segment files of JSON lines, to be
+    replayed later as a load test built from real data, see
+    bench/replay.py.
+
+    Documents are sampled by hash of their text, so the same documents
+    are captured on every run and every host. Text goes through redactors
+    before it is written, functions which mask personal data such as
+    email addresses. A segment is closed after segment_documents
+    documents, or when the hook is closed, and only the latest
+    max_segments are kept.
+
+    Pass the hook to a parser, or call `capture.enable(directory)` to
+    capture documents of all parsers created afterwards, including the
+    ones of `pyap.parse`.
+
+    :copyright: (c) 2015 by Vladimir Goncharov.
+    :license: MIT, see LICENSE for more details.
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Iterator,
+    NamedTuple,
+    Optional,
+    Pattern,
+    Sequence,
+    Union,
+)
+
+from . import hooks
+from .parser import AddressParser
+from .slowlog import sampled
+
+Redactor = Callable[[str], str]
+
+SEGMENT_SUFFIX = ".jsonl.gz"
+EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+PHONE = re.compile(r"\+\d[\d ()-]{7,}\d")
+
+
+class CapturedDocument(NamedTuple):
+    # country of the parser, countries are joined with "," for several ones
+    country: str
+    # SHA-256 of the document as it was parsed, before redaction
+    sha256: str
+    text: str
+
+
+def masker(pattern: Union[str, Pattern[str]], fill: str = "x") -> Redactor:
+    """Returns a redactor replacing matches of pattern with fill characters
+    of the same length, so positions and sizes of documents don't change
+    """
+    compiled = re.compile(pattern)
+
+    def redact(text: str) -> str:
+        return compiled.sub(lambda match: fill * len(match.group()), text)
+
+    return redact
+
+
+redact_emails = masker(EMAIL)
+redact_phones = masker(PHONE, "0")
+
+
+class CaptureHook(hooks.Hook):
+    """Writes a sample_rate fraction of parsed documents to segment files
+    in directory, after passing their text through redactors
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        sample_rate: float = 0.01,
+        redactors: Sequence[Redactor] = (redact_emails, redact_phones),
+        segment_documents: int = 10000,
+        max_segments: Optional[int] = None,
+    ) -> None:
+        self.directory = Path(directory)
+        self.sample_rate = sample_rate
+        self.redactors = list(redactors)
+        self.segment_documents = segment_documents
+        self.max_segments = max_segments
+        self.captured = 0
+        self._segment: Optional[gzip.GzipFile] = None
+        self._segment_count = 0
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def on_document(self, text: str, stats: hooks.ParseStats) -> None:
+        digest = hashlib.sha256(text.encode("utf-8", "surrogatepass")).hexdigest()
+        if not sampled(digest, self.sample_rate):
+            return
+        for redact in self.redactors:
+            text = redact(text)
+        line = json.dumps({"country": stats.country, "sha256": digest, "text": text})
+        with self._lock:
+            if self._segment is None:
+                self._segment = self._open_segment()
+            # flushed when the segment is closed, flushing every document
+            # would end a compression block each time
+            self._segment.write(line.encode("utf-8", "surrogatepass") + b"\n")
+            self.captured += 1
+            self._segment_count += 1
+            if self._segment_count >= self.segment_documents:
+                self._close_segment()
+
+    def _open_segment(self) -> gzip.GzipFile:
+        # names sort in order of creation
+        name = "segment-{:020d}-{}{}".format(
+            time.time_ns(), os.getpid(), SEGMENT_SUFFIX
+        )
+        if self.max_segments is not None:
+            segments = sorted(self.directory.glob("*" + SEGMENT_SUFFIX))
+            for path in segments[: max(len(segments) + 1 - self.max_segments, 0)]:
+                path.unlink()
+        return gzip.GzipFile(self.directory / name, "wb")
+
+    def _close_segment(self) -> None:
+        if self._segment is not None:
+            self._segment.close()
+        self._segment = None
+        self._segment_count = 0
+
+    def close(self) -> None:
+        """Closes the segment being written, the next document starts a new
+        one
+        """
+        with self._lock:
+            self._close_segment()
+
+    def __enter__(self) -> "CaptureHook":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def read_segments(directory: Union[str, Path]) -> Iterator[CapturedDocument]:
+    """Yields documents of all segments in directory, oldest first. A
+    segment which is still being written is read as far as it was
+    compressed, some of its latest documents may be missing.
+    """
+    for path in sorted(Path(directory).glob("*" + SEGMENT_SUFFIX)):
+        with gzip.open(path, "rb") as segment:
+            try:
+                for line in segment:
+                    if line.endswith(b"\n"):
+                        yield CapturedDocument(**json.loads(line))
+            except (EOFError, zlib.error):
+                # the end of an open segment isn't written yet
+                continue
+
+
+def enable(directory: Union[str, Path], **options: Any) -> CaptureHook:
+    """Makes parsers created from now on capture documents to directory,
+    options are passed to CaptureHook
+    """
+    hook = CaptureHook(directory, **options)
+    AddressParser.hooks = AddressParser.hooks + [hook]
+    return hook
+
+
+def disable(hook: CaptureHook) -> None:
+    """Stops parsers created from now on from capturing and closes the
+    segment of hook
+    """
+    AddressParser.hooks = [other for other in AddressParser.hooks if other is not hook]
+    hook.close()
@@ -27,3 +27,35 @@ class CountryDetectionMissing(AddressParserException):
     def __init__(self, message: str, errors: str):
         super().__init__(message)
         self.errors = errors
+
+
+class ResultTypeMissing(AddressParserException):
+    """Requested result type is unknown or its dependencies are not installed"""
+
+    def __init__(self, message: str, errors: str):
+        super().__init__(message)
+        self.errors = errors
+
+
+class BackendMissing(AddressParserException):
+    """Requested matcher backend is unknown or its package is not installed"""
+
+    def __init__(self, message: str, errors: str):
+        super().__init__(message)
+        self.errors = errors
+
+
+class TuningProfileInvalid(AddressParserException):
+    """Tuning profile of the rules can't be read"""
+
+    def __init__(self, message: str, errors: str):
+        super().__init__(message)
+        self.errors = errors
+
+
+class FieldMissing(AddressParserException):
+    """Requested address field is unknown"""
+
+    def __init__(self, message: str, errors: str):
+        super().__init__(message)
+        self.errors = errors
@@ -0,0 +1,373 @@
+"""
+    pyap.grammar
+    ~~~~~~~~~~~~~~~~
+
+    This module contains building blocks for country detection rules:
+    word lists which compile to compact regular expressions and helpers
+    to compose rules out of smaller ones.
+
+    Run `python -m pyap_beauhurst.grammar` to see compiled program size
+    of every country's rules with and without word list optimizations.
+
+    :copyright: (c) 2015 by Vladimir Goncharov.
+    :license: MIT, see LICENSE for more details.
+"""
+import hashlib
+import heapq
+import importlib
+import importlib.util
+import json
+import re
+import threading
+from pathlib import Path
+from types import ModuleType
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from .utils import DEFAULT_FLAGS, sre_compile, sre_parse
+
+COUNTRIES = ("US", "CA", "GB")
+
+# When False, word lists are rendered the way they used to be written by
+# hand: one alternative per word spelled with [Aa]-style classes
+OPTIMIZE = True
+# prefix of names of groups around words of profiled word lists, followed by
+# numbers of the word list and of the word, see render()
+PROFILE_GROUP = "_alt"
+
+# set by render() while a data module is executed
+_counts: Optional[Dict[str, Dict[str, int]]] = None
+_profiled: Optional[List["WordList"]] = None
+_render_lock = threading.Lock()
+
+# a space in a word matches any whitespace, as \s does outside of (?a:...)
+_SPACE = r"(?u:\s)"
+
+
+class Raw(str):
+    """Word list entry which is a regular expression used as is"""
+
+
+class WordList:
+    """Ordered alternation of words, each followed by suffix.
+
+    Letters match regardless of their case, spaces match a whitespace
+    character and other characters match themselves. Raw entries are
+    regular expressions and match as written.
+
+    Case-insensitive words are compiled into a scoped (?ai:...) group, which
+    folds ASCII letters only, same as [Aa] classes. Adjacent words sharing
+    a prefix are merged: ave|avenue|bay becomes av(?:e|enue)|bay, which
+    tries words in the same order, so matches don't change.
+    """
+
+    def __init__(
+        self,
+        words: Iterable[str],
+        suffix: str = "",
+        case_sensitive: bool = False,
+    ) -> None:
+        # a repeated word can't match anything the first one didn't
+        self.words: List[str] = list(dict.fromkeys(words))
+        self.suffix = suffix
+        self.case_sensitive = case_sensitive
+
+    def __repr__(self) -> str:
+        return "WordList({words!r}, suffix={suffix!r})".format(
+            words=self.words, suffix=self.suffix
+        )
+
+    def __str__(self) -> str:
+        return self.regex()
+
+    def __format__(self, format_spec: str) -> str:
+        return format(self.regex(), format_spec)
+
+    @property
+    def key(self) -> str:
+        """Identifies the word list by its contents, the same in every
+        process
+        """
+        content = json.dumps([self.words, self.suffix, self.case_sensitive])
+        return hashlib.sha1(content.encode("utf-8")).hexdigest()[:12]
+
+    def regex(self, optimize: Optional[bool] = None) -> str:
+        """Returns the word list as a regular expression which is a single
+        item, so that a quantifier can follow it
+        """
+        if _profiled is not None:
+            return self._profiled_regex(_profiled)
+        words = self.words
+        if _counts is not None and self.key in _counts:
+            words = reorder(words, _counts[self.key], self.case_sensitive)
+        if optimize is None:
+            optimize = OPTIMIZE
+        if not optimize:
+            return "(?:{words})".format(
+                words="|".join(self._spell(word) + self.suffix for word in words)
+            )
+
+        alternatives = []
+        run: List[str] = []
+        for word in words + [Raw()]:
+            if isinstance(word, Raw):
+                if run:
+                    alternatives.append(self._factored(run))
+                    run = []
+                if word:
+                    alternatives.append(word)
+            else:
+                run.append(word)
+        if not self.suffix:
+            return "(?:{words})".format(words="|".join(alternatives))
+        return "(?:(?:{words}){suffix})".format(
+            words="|".join(alternatives), suffix=self.suffix
+        )
+
+    def _profiled_regex(self, profiled: List["WordList"]) -> str:
+        """Renders each word in a group of its own, to find out which words
+        matches went through
+        """
+        number = len(profiled)
+        profiled.append(self)
+        alternatives = [
+            word
+            if isinstance(word, Raw)
+            else "(?P<{prefix}{number}_{index}>{word})".format(
+                prefix=PROFILE_GROUP,
+                number=number,
+                index=index,
+                word=self._factored([word]),
+            )
+            for index, word in enumerate(self.words)
+        ]
+        return "(?:(?:{words}){suffix})".format(
+            words="|".join(alternatives), suffix=self.suffix
+        )
+
+    def _spell(self, word: str) -> str:
+        """Spells word out with [Aa] classes"""
+        if isinstance(word, Raw):
+            return word
+        spelled = []
+        for char in word:
+            if char == " ":
+                spelled.append(r"\s")
+            elif not self.case_sensitive and char.upper() != char.lower():
+                spelled.append("[{}{}]".format(char.upper(), char.lower()))
+            else:
+                spelled.append(re.escape(char))
+        return "".join(spelled)
+
+    def _factored(self, words: Sequence[str]) -> str:
+        tokens = [[self._token(char) for char in word] for word in words]
+        if self.case_sensitive:
+            return _factor(tokens)
+        return "(?ai:{words})".format(words=_factor(tokens))
+
+    def _token(self, char: str) -> str:
+        if char == " ":
+            return _SPACE if not self.case_sensitive else r"\s"
+        if self.case_sensitive or char.isascii():
+            return re.escape(char.lower() if not self.case_sensitive else char)
+        if char.upper() != char.lower():
+            # ASCII-only case folding leaves other letters alone
+            return "[{}{}]".format(char.upper(), char.lower())
+        return re.escape(char)
+
+
+def _factor(words: List[List[str]]) -> str:
+    """Merges adjacent words with the same first token, recursively"""
+    alternatives = []
+    start = 0
+    while start < len(words):
+        word = words[start]
+        end = start + 1
+        while word and end < len(words) and words[end][:1] == word[:1]:
+            end += 1
+        if end - start == 1:
+            alternatives.append("".join(word))
+        else:
+            rest = _factor([other[1:] for other in words[start:end]])
+            alternatives.append(word[0] + rest)
+        start = end
+    if len(alternatives) == 1:
+        return alternatives[0]
+    if alternatives[-1] == "":
+        # a word ends here, but longer ones are tried first: (?:e|enue|)
+        return "(?:{words})?".format(words="|".join(alternatives[:-1]))
+    return "(?:{words})".format(words="|".join(alternatives))
+
+
+def reorder(
+    words: Sequence[str], counts: Dict[str, int], case_sensitive: bool = False
+) -> List[str]:
+    """Returns words ordered so that the most frequent ones by counts are
+    tried first, where that can't change what matches.
+
+    Two words can match at the same position only if one of them is a
+    prefix of the other, so only such words keep their order. Raw entries
+    can match anything and stay where they are, words are reordered
+    between them. Words sharing a prefix are kept next to each other,
+    most frequent prefixes first, so they still merge into a trie.
+    """
+    ordered: List[str] = []
+    run: List[str] = []
+    for word in list(words) + [Raw()]:
+        if isinstance(word, Raw):
+            ordered.extend(_reorder_run(run, counts, case_sensitive))
+            if word:
+                ordered.append(word)
+            run = []
+        else:
+            run.append(word)
+    return ordered
+
+
+def _reorder_run(
+    words: List[str], counts: Dict[str, int], case_sensitive: bool
+) -> List[str]:
+    spelled = [
+        re.sub(r"\s", " ", word if case_sensitive else word.lower()) for word in words
+    ]
+    # less total count of words starting with a prefix, so that more frequent
+    # prefixes sort first, and the first of the words
+    prefixes: Dict[str, Tuple[int, int]] = {}
+    for index, (word, text) in enumerate(zip(words, spelled)):
+        for end in range(1, len(text) + 1):
+            total, earliest = prefixes.get(text[:end], (0, index))
+            prefixes[text[:end]] = (total - counts.get(word, 0), earliest)
+    # prefixes are compared first, words which weren't counted keep their order
+    keys = [
+        (
+            [prefixes[text[:end]] for end in range(1, len(text) + 1)],
+            (-counts.get(word, 0), index),
+            index,
+        )
+        for index, (word, text) in enumerate(zip(words, spelled))
+    ]
+    # words which have to be tried before each word
+    blocking = [0] * len(words)
+    blocked: List[List[int]] = [[] for _ in words]
+    for later in range(len(words)):
+        for earlier in range(later):
+            first, second = spelled[earlier], spelled[later]
+            if first.startswith(second) or second.startswith(first):
+                blocking[later] += 1
+                blocked[earlier].append(later)
+    ready = [keys[index] for index in range(len(words)) if not blocking[index]]
+    heapq.heapify(ready)
+    ordered = []
+    while ready:
+        index = heapq.heappop(ready)[-1]
+        ordered.append(words[index])
+        for later in blocked[index]:
+            blocking[later] -= 1
+            if not blocking[later]:
+                heapq.heappush(ready, keys[later])
+    return ordered
+
+
+def render(
+    country: str,
+    counts: Optional[Dict[str, Dict[str, int]]] = None,
+    profiled: Optional[List[WordList]] = None,
+) -> ModuleType:
+    """Returns a new copy of the data module of country, which doesn't
+    replace the imported one.
+
+    With counts of words by WordList.key, words of those lists are
+    reordered, see reorder(). With a profiled list, word lists the rules
+    are made of are appended to it and each word is put in a group named
+    PROFILE_GROUP + "<number of the list>_<number of the word>".
+    """
+    global _counts, _profiled
+    spec = importlib.util.find_spec("pyap_beauhurst.source_" + country + ".data")
+    if spec is None or spec.loader is None:
+        raise ImportError("no detection rules for country " + country)
+    module = importlib.util.module_from_spec(spec)
+    with _render_lock:
+        _counts, _profiled = counts, profiled
+        try:
+            spec.loader.exec_module(module)
+        finally:
+            _counts = _profiled = None
+    return module
+
+
+def save_counts(
+    path: Union[str, Path], counts: Dict[str, Dict[str, Dict[str, int]]]
+) -> None:
+    """Writes counts of words of word lists by country and WordList.key,
+    a profile render() reorders rules by
+    """
+    Path(path).write_text(
+        json.dumps({"counts": counts}, indent=1, sort_keys=True) + "\n",
+        encoding="utf-8",
+    )
+
+
+def load_counts(
+    path: Union[str, Path], country: str
+) -> Optional[Dict[str, Dict[str, int]]]:
+    """Returns counts of words of country written by save_counts, None if
+    there are none for country. Raises ValueError if the file isn't one
+    written by save_counts.
+    """
+    content = json.loads(Path(path).read_text(encoding="utf-8"))
+    if not isinstance(content, dict) or not isinstance(content.get("counts"), dict):
+        raise ValueError("{} is not a profile of word lists".format(path))
+    return content["counts"].get(country)  # type: ignore[no-any-return]
+
+
+def rename_groups(regex: str, suffix: str) -> str:
+    """Appends suffix to names of all groups in regex, so that a variant of
+    a rule can be used in the same pattern as the rule itself
+    """
+    return re.sub(r"\(\?(P<|P=|\()(\w+)([>)])", r"(?\1\2{}\3".format(suffix), regex)
+
+
+def program_size(regex: str, flags: int = DEFAULT_FLAGS) -> int:
+    """Returns number of instructions regex compiles to"""
+    return len(sre_compile._code(sre_parse.parse(regex, flags), flags))
+
+
+def size_report(
+    countries: Sequence[str] = COUNTRIES,
+) -> List[Tuple[str, int, int]]:
+    """Returns (country, size before, size after) for compiled programs of
+    full_address without and with word list optimizations
+    """
+    global OPTIMIZE
+    sizes: Dict[Tuple[str, bool], int] = {}
+    try:
+        for optimize in (False, True):
+            OPTIMIZE = optimize
+            for country in countries:
+                data = importlib.import_module(
+                    "pyap_beauhurst.source_" + country + ".data"
+                )
+                # rules are rendered when data module is imported
+                data = importlib.reload(data)
+                sizes[country, optimize] = program_size(data.full_address)
+    finally:
+        OPTIMIZE = True
+    return [
+        (country, sizes[country, False], sizes[country, True]) for country in countries
+    ]
+
+
+def main() -> None:
+    print("{:<8}{:>10}{:>10}{:>8}".format("country", "before", "after", "saved"))
+    for country, before, after in size_report():
+        print(
+            "{:<8}{:>10}{:>10}{:>7.0%}".format(
+                country, before, after, 1 - after / before
+            )
+        )
+
+
+if __name__ == "__main__":
+    # rules are rendered by the imported module, not by __main__
+    from pyap_beauhurst.grammar import main
+
+    main()
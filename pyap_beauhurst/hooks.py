@@ -0,0 +1,172 @@
+"""
+    pyap.hooks
+    ~~~~~~~~~~~~~~~~
+
+    This module contains hooks which AddressParser calls after parsing a
+    document, with time spent in each stage of parsing, see STAGES.
+
+    Hooks are passed to the parser as `AddressParser(hooks=[...])`. A parser
+    without hooks doesn't measure anything. A stream passed to parse_stream
+    is a single document, its text isn't kept so only on_parse is called
+    for it. See also metrics.py, slowlog.py and capture.py.
+
+    :copyright: (c) 2015 by Vladimir Goncharov.
+    :license: MIT, see LICENSE for more details.
+"""
+import bisect
+import threading
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+# stages of parsing, in order:
+# - normalize: separators and dashes are cleaned up
+# - scan: the rules are searched for in the clean text
+# - combine: named groups of matches are combined into address parts
+# - model: address objects are built from the parts
+STAGES = ("normalize", "scan", "combine", "model")
+
+# upper bounds of histogram buckets for durations, in seconds
+DURATION_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+# upper bounds of histogram buckets for document sizes, in bytes
+SIZE_BUCKETS = tuple(float(1 << shift) for shift in range(6, 25, 2))
+# upper bounds of histogram buckets for matches per document
+COUNT_BUCKETS = (0.0, 1.0, 2.0, 5.0, 10.0, 20.0, 50.0, 100.0, 1000.0)
+
+
+class ParseStats(NamedTuple):
+    """Numbers of a single parsed document, durations are in seconds"""
+
+    # country of the parser, countries are joined with "," for several ones
+    country: str
+    characters: int
+    # size of the document encoded as UTF-8
+    bytes: int
+    # matches of the rules, including ones which didn't make an address
+    matches: int
+    addresses: int
+    # addresses found of each country, by Address.country_id
+    country_addresses: Tuple[Tuple[str, int], ...]
+    # whether the time budget ran out
+    truncated: bool
+    normalize: float
+    scan: float
+    combine: float
+    model: float
+
+    @property
+    def total(self) -> float:
+        return self.normalize + self.scan + self.combine + self.model
+
+
+class Hook:
+    """Base class of hooks, subclasses override the methods they need"""
+
+    def on_parse(self, stats: ParseStats) -> None:
+        """Called once a document is parsed, or parsing stops early"""
+
+    def on_document(self, text: str, stats: ParseStats) -> None:
+        """Same as on_parse, for hooks which need the document itself"""
+        self.on_parse(stats)
+
+
+class Histogram:
+    """Counts of observed values by buckets of upper bounds, the last
+    bucket counts values greater than all bounds
+    """
+
+    def __init__(self, bounds: Sequence[float]) -> None:
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def __repr__(self) -> str:
+        return "Histogram(count={count}, sum={sum:g})".format(
+            count=self.count, sum=self.sum
+        )
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Returns upper bound of the bucket the q-quantile falls in, None
+        if nothing was observed, inf if it is above all bounds
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank and seen:
+                return bound
+        return float("inf")
+
+
+class HistogramHook(Hook):
+    """Collects stage durations, document sizes and match counts of parsed
+    documents into histograms, keyed by country
+    """
+
+    def __init__(self) -> None:
+        self.histograms: Dict[str, Dict[str, Histogram]] = {}
+        self._lock = threading.Lock()
+
+    def on_parse(self, stats: ParseStats) -> None:
+        with self._lock:
+            histograms = self.histograms.get(stats.country)
+            if histograms is None:
+                histograms = self.histograms[stats.country] = self._new()
+            for stage in STAGES:
+                histograms[stage].observe(getattr(stats, stage))
+            histograms["total"].observe(stats.total)
+            histograms["bytes"].observe(stats.bytes)
+            histograms["matches"].observe(stats.matches)
+
+    @staticmethod
+    def _new() -> Dict[str, Histogram]:
+        histograms = {
+            stage: Histogram(DURATION_BUCKETS) for stage in STAGES + ("total",)
+        }
+        histograms["bytes"] = Histogram(SIZE_BUCKETS)
+        histograms["matches"] = Histogram(COUNT_BUCKETS)
+        return histograms
+
+    def summary(self) -> List[str]:
+        """Returns a line per country and histogram: count, mean and
+        bucket bounds of p50 and p99
+        """
+        lines = []
+        with self._lock:
+            for country, histograms in sorted(self.histograms.items()):
+                for name, histogram in histograms.items():
+                    lines.append(
+                        "{country} {name}: count={count} mean={mean:.6g} "
+                        "p50<={p50} p99<={p99}".format(
+                            country=country,
+                            name=name,
+                            count=histogram.count,
+                            mean=histogram.sum / max(histogram.count, 1),
+                            p50=histogram.quantile(0.5),
+                            p99=histogram.quantile(0.99),
+                        )
+                    )
+        return lines
@@ -0,0 +1,179 @@
+"""
+    pyap.metrics
+    ~~~~~~~~~~~~~~~~
+
+    This module contains a registry of cumulative metrics of parsed
+    documents: counts of documents, bytes, matches, addresses and
+    documents cut short by the time budget, and histograms of time spent
+    in each stage of parsing, labelled by country. Parsers of several
+    countries label documents with the countries joined by ",", addresses
+    are counted by the country they are of.
+
+    The registry is a hook, see hooks.py. Pass it to a parser with
+    `AddressParser(hooks=[registry])` or call `metrics.enable()` to have
+    REGISTRY updated by all parsers created afterwards, including the
+    ones of `pyap.parse`. Metrics are exported as a dict or in Prometheus
+    text format.
+
+    :copyright: (c) 2015 by Vladimir Goncharov.
+    :license: MIT, see LICENSE for more details.
+"""
+import threading
+from typing import Any, Dict, List, Tuple
+
+from . import hooks
+from .parser import AddressParser
+
+PREFIX = "pyap_"
+
+# name, help text and ParseStats field of counters
+COUNTERS: Tuple[Tuple[str, str, str], ...] = (
+    ("documents_total", "Documents parsed.", ""),
+    ("bytes_total", "Bytes of parsed documents, encoded as UTF-8.", "bytes"),
+    ("matches_total", "Matches of the detection rules.", "matches"),
+    ("addresses_total", "Addresses found.", "addresses"),
+    ("truncated_total", "Documents cut short by the time budget.", "truncated"),
+)
+HISTOGRAMS = tuple(
+    (stage + "_seconds", "Time spent in the {} stage.".format(stage), stage)
+    for stage in hooks.STAGES
+) + (
+    ("parse_seconds", "Time spent parsing a document.", "total"),
+)
+
+
+class _CountryMetrics:
+    __slots__ = ("counters", "histograms")
+
+    def __init__(self) -> None:
+        self.counters = dict.fromkeys((name for name, _, _ in COUNTERS), 0)
+        self.histograms = {
+            name: hooks.Histogram(hooks.DURATION_BUCKETS) for name, _, _ in HISTOGRAMS
+        }
+
+
+class MetricsRegistry(hooks.Hook):
+    """Thread-safe cumulative metrics of parsed documents by country"""
+
+    def __init__(self) -> None:
+        self._countries: Dict[str, _CountryMetrics] = {}
+        self._lock = threading.Lock()
+
+    def on_parse(self, stats: hooks.ParseStats) -> None:
+        with self._lock:
+            metrics = self._metrics(stats.country)
+            counters = metrics.counters
+            counters["documents_total"] += 1
+            counters["bytes_total"] += stats.bytes
+            counters["matches_total"] += stats.matches
+            counters["truncated_total"] += stats.truncated
+            for country, addresses in stats.country_addresses:
+                self._metrics(country).counters["addresses_total"] += addresses
+            histograms = metrics.histograms
+            histograms["normalize_seconds"].observe(stats.normalize)
+            histograms["scan_seconds"].observe(stats.scan)
+            histograms["combine_seconds"].observe(stats.combine)
+            histograms["model_seconds"].observe(stats.model)
+            histograms["parse_seconds"].observe(stats.total)
+
+    def _metrics(self, country: str) -> _CountryMetrics:
+        metrics = self._countries.get(country)
+        if metrics is None:
+            metrics = self._countries[country] = _CountryMetrics()
+        return metrics
+
+    def reset(self) -> None:
+        with self._lock:
+            self._countries.clear()
+
+    def as_dict(self) -> Dict[str, Dict[str, Any]]:
+        """Returns metrics by country: counters as numbers, histograms as
+        dicts of count, sum and cumulative counts by bucket upper bound
+        """
+        result: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for country, metrics in self._countries.items():
+                values: Dict[str, Any] = dict(metrics.counters)
+                for name, histogram in metrics.histograms.items():
+                    values[name] = {
+                        "count": histogram.count,
+                        "sum": histogram.sum,
+                        "buckets": dict(_cumulative(histogram)),
+                    }
+                result[country] = values
+        return result
+
+    def to_prometheus(self) -> str:
+        """Returns metrics in Prometheus text exposition format"""
+        metrics = self.as_dict()
+        lines: List[str] = []
+        for name, help_text, _ in COUNTERS:
+            lines += _header(name, help_text, "counter")
+            for country, values in sorted(metrics.items()):
+                lines.append(
+                    '{prefix}{name}{{country="{country}"}} {value}'.format(
+                        prefix=PREFIX, name=name, country=country, value=values[name]
+                    )
+                )
+        for name, help_text, _ in HISTOGRAMS:
+            lines += _header(name, help_text, "histogram")
+            for country, values in sorted(metrics.items()):
+                histogram = values[name]
+                for bound, count in histogram["buckets"].items():
+                    lines.append(
+                        '{prefix}{name}_bucket{{country="{country}",le="{le}"}} '
+                        "{count}".format(
+                            prefix=PREFIX,
+                            name=name,
+                            country=country,
+                            le=bound,
+                            count=count,
+                        )
+                    )
+                for suffix in ("sum", "count"):
+                    lines.append(
+                        '{prefix}{name}_{suffix}{{country="{country}"}} {value}'.format(
+                            prefix=PREFIX,
+                            name=name,
+                            suffix=suffix,
+                            country=country,
+                            value=histogram[suffix],
+                        )
+                    )
+        return "\n".join(lines) + "\n"
+
+
+def _header(name: str, help_text: str, kind: str) -> List[str]:
+    return [
+        "# HELP {prefix}{name} {help}".format(prefix=PREFIX, name=name, help=help_text),
+        "# TYPE {prefix}{name} {kind}".format(prefix=PREFIX, name=name, kind=kind),
+    ]
+
+
+def _cumulative(histogram: hooks.Histogram) -> List[Tuple[str, int]]:
+    """Returns (upper bound, count of values up to it) pairs, the way
+    Prometheus histogram buckets are
+    """
+    buckets = []
+    seen = 0
+    for bound, count in zip(histogram.bounds, histogram.counts):
+        seen += count
+        buckets.append(("{:g}".format(bound), seen))
+    buckets.append(("+Inf", histogram.count))
+    return buckets
+
+
+# updated by all parsers once enable() is called
+REGISTRY = MetricsRegistry()
+
+
+def enable(registry: MetricsRegistry = REGISTRY) -> MetricsRegistry:
+    """Makes parsers created from now on update registry"""
+    if registry not in AddressParser.hooks:
+        AddressParser.hooks = AddressParser.hooks + [registry]
+    return registry
+
+
+def disable(registry: MetricsRegistry = REGISTRY) -> None:
+    """Stops parsers created from now on from updating registry"""
+    AddressParser.hooks = [hook for hook in AddressParser.hooks if hook is not registry]
@@ -0,0 +1,67 @@
+"""
+    pyap.numerals
+    ~~~~~~~~~~~~~~~~
+
+    This module contains numerals written in words, which are the same
+    in detection rules of every country.
+
+    :copyright: (c) 2015 by Vladimir Goncharov.
+    :license: MIT, see LICENSE for more details.
+"""
+from .grammar import WordList
+
+# Numerals from zero to nineteen
+zero_to_nine = WordList(
+    [
+        "zero",
+        "one",
+        "two",
+        "three",
+        "four",
+        "five",
+        "six",
+        "seven",
+        "eight",
+        "nine",
+        "ten",
+        "eleven",
+        "twelve",
+        "thirteen",
+        "fourteen",
+        "fifteen",
+        "sixteen",
+        "seventeen",
+        "eighteen",
+        "nineteen",
+    ],
+    suffix=r"\s",
+)
+
+# Numerals - 10, 20, 30 ... 90
+ten_to_ninety = WordList(
+    [
+        "ten",
+        "twenty",
+        "thirty",
+        "forty",
+        "fourty",
+        "fifty",
+        "sixty",
+        "seventy",
+        "eighty",
+        "ninety",
+    ],
+    suffix=r"\s",
+)
+
+# One hundred
+hundred = WordList(["hundred"], suffix=r"\s")
+
+# One thousand
+thousand = WordList(["thousand"], suffix=r"\s")
+
+# Words a number is spelled with, "One thousand and twenty two"
+number_words = WordList(
+    ["and"] + thousand.words + hundred.words + zero_to_nine.words + ten_to_ninety.words,
+    suffix=r"\s",
+)
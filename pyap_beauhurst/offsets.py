@@ -0,0 +1,73 @@
+"""
+    pyap.offsets
+    ~~~~~~~~~~~~~~~~
+
+    This module contains OffsetMap which translates positions in normalized
+    text back to positions in the text passed in by the caller.
+
+    :copyright: (c) 2015 by Vladimir Goncharov.
+    :license: MIT, see LICENSE for more details.
+"""
+from array import array
+from bisect import bisect_right
+
+
+class OffsetMap:
+    """Sorted breakpoints where normalized and source text go out of step.
+
+    Between breakpoints both texts advance together, so only replacements
+    which changed the length of the text are stored, two integers each.
+    """
+
+    __slots__ = ("_normalized", "_source")
+
+    def __init__(self) -> None:
+        self._normalized = array("q")
+        self._source = array("q")
+
+    def __len__(self) -> int:
+        return len(self._normalized)
+
+    def add(self, normalized: int, source: int) -> None:
+        """Marks that normalized position corresponds to source position"""
+        self._normalized.append(normalized)
+        self._source.append(source)
+
+    def add_replacement(
+        self,
+        normalized: int,
+        source: int,
+        normalized_length: int,
+        source_length: int,
+    ) -> None:
+        """Records that source[source:source + source_length] was replaced with
+        normalized[normalized:normalized + normalized_length]
+        """
+        self.add(normalized, source)
+        self.add(normalized + normalized_length, source + source_length)
+
+    def extend(self, other: "OffsetMap", normalized: int, source: int) -> None:
+        """Appends breakpoints of a map built for a piece of text which starts
+        at normalized/source positions of this map
+        """
+        self.add(normalized, source)
+        for normalized_pos, source_pos in zip(other._normalized, other._source):
+            self.add(normalized_pos + normalized, source_pos + source)
+
+    def discard_before(self, normalized: int) -> None:
+        """Forgets breakpoints which aren't needed for positions >= normalized"""
+        index = bisect_right(self._normalized, normalized) - 1
+        if index > 0:
+            del self._normalized[:index]
+            del self._source[:index]
+
+    def to_source(self, normalized: int) -> int:
+        """Returns source position for normalized position in O(log n)"""
+        index = bisect_right(self._normalized, normalized) - 1
+        if index < 0:
+            return normalized
+        source = self._source[index] + normalized - self._normalized[index]
+        if index + 1 < len(self._source):
+            # inside a replacement which is longer than the text it replaced
+            source = min(source, self._source[index + 1])
+        return source
@@ -9,30 +9,178 @@
     :license: MIT, see LICENSE for more details.
 """
 
-import importlib
+import bisect
 import re
-from typing import Any, Dict, List, Optional, Union
+import time
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple, Type, Union
 
-from . import address, exceptions as e, utils
+from . import address, backends, exceptions as e, hooks as h, registry, utils
+from .offsets import OffsetMap
+
+# Chars before the scanned position kept for lookbehinds and word boundaries
+_LOOKBEHIND_CONTEXT = 16
+DEFAULT_CHUNK_SIZE = 1 << 16
+# With a time budget, text is searched in blocks of this many chars and the
+# budget is checked between them
+_BUDGET_BLOCK = 1 << 12
+
+# A run of whitespace and commas is collapsed in one go: into ", " if it
+# contains a newline or a comma, into a single space otherwise. Runs which
+# are a single space already are skipped, as they are most of the runs.
+_SEPARATOR_RUN = re.compile(r"[\s,](?:(?<!\ )|(?=[\s,]))[\s,]*", flags=re.UNICODE)
+# convert all types of hyphens/dashes to a simple old-school dash
+# from http://utf8-chartable.de/unicode-utf8-table.pl?
+# start=8192&number=128&utf8=string-literal
+_DASHES = str.maketrans(dict.fromkeys("‐‑‒–—―", "-"))
+
+# sorted spans of runs of a text, see AddressParser.runs
+Runs = List[Tuple[int, int]]
+
+
+class ParseResult(List[Optional[address.Address]]):
+    """List of addresses found in a document"""
+
+    # time budget ran out before the whole document was scanned
+    truncated = False
+
+
+class _Outcome:
+    """How parsing of a document ended, apart from the parser which may
+    parse other documents meanwhile
+    """
+
+    __slots__ = ("truncated",)
+
+    def __init__(self) -> None:
+        # the time budget ran out
+        self.truncated = False
+
+
+class _StreamStats:
+    """Numbers of a stream parsed so far, hooks see it as one document"""
+
+    __slots__ = (
+        "characters",
+        "bytes",
+        "matches",
+        "addresses",
+        "country_addresses",
+        "durations",
+    )
+
+    def __init__(self) -> None:
+        self.characters = self.bytes = self.matches = self.addresses = 0
+        self.country_addresses: Dict[str, int] = {}
+        self.durations = dict.fromkeys(h.STAGES, 0.0)
 
 
 class AddressParser:
     country: str
+    # several countries to look for at once, instead of a single country
+    countries: Optional[List[str]] = None
+    # parsers for each of countries, their matches are merged by position
+    routes: List["AddressParser"] = []
+    # normalized text of the last document, documents parsed at the same
+    # time don't read it back
     clean_text: str
+    # compiled by the matcher backend
+    rules: Any
+    max_length: int
+    # finds parts every address contains, None if the country has no anchor
+    anchor: Optional[re.Pattern] = None
+    # finds runs of chars which the rules can take past max_length, see
+    # registry.CompiledRules
+    runs: Optional[re.Pattern] = None
+    run_weight: int = 1
+    # "pydantic" or "slots", by default pydantic models are used if available
+    result_type: Optional[str] = None
+    address_class: Type[Any]
+    # name of the regular expression engine, see backends.BACKENDS
+    backend: str = backends.DEFAULT_BACKEND
+    matcher: backends.Backend
+    # skip _normalize_string for text which was normalized already
+    prenormalized: bool = False
+    # run full rules only in windows around anchors, results are the same
+    prefilter: bool = True
+    # per-document time limit, addresses found before it runs out are returned
+    time_budget_ms: Optional[float] = None
+    # whether the last document finished was cut short by time_budget_ms,
+    # ParseResult.truncated tells it for each document
+    truncated: bool = False
+    # profile of bench.alternations, words of the rules are tried in order of
+    # their frequency in it, results are the same
+    tuning: Optional[str] = None
+    # address fields to extract, other groups of the rules don't capture and
+    # other fields of addresses are None, matches are the same
+    fields: Optional[Tuple[str, ...]] = None
+    # groups kept for conditionals of the rules, which aren't in fields
+    _extra_groups: Tuple[str, ...] = ()
+    # called with durations of parsing stages of every document, see hooks.py
+    hooks: List[h.Hook] = []
 
     def __init__(self, **kwargs: Any):
         """Initialize with custom arguments"""
 
         for k, v in kwargs.items():
-            # store country id in uppercase
-            if k == "country":
+            # store country ids in uppercase
+            if k == "country" and v is not None:
                 v = v.upper()
+            elif k == "countries" and v is not None:
+                v = list(dict.fromkeys(country.upper() for country in v))
             setattr(self, k, v)
+        # hooks of the class are copied to each new parser, which is how
+        # metrics.enable() and capture.enable() reach parsers created later
+        self.hooks = type(self).hooks + list(kwargs.get("hooks", ()))
+        if self.fields is not None:
+            unknown = set(self.fields) - set(address.FIELDS)
+            if unknown:
+                raise e.FieldMissing(
+                    "Unknown address fields: {fields}.".format(
+                        fields=", ".join(sorted(unknown))
+                    ),
+                    "Error 6",
+                )
+            # an address can't be made without full_address
+            self.fields = tuple(sorted(set(self.fields) | {"full_address"}))
+
         try:
-            # import detection rules
-            package = "pyap_beauhurst" + ".source_" + self.country + ".data"
-            data = importlib.import_module(package)
-            self.rules = data.full_address
+            self.matcher = backends.get_backend(self.backend)
+        except KeyError:
+            raise e.BackendMissing(
+                'Backend "{backend}" is not available.'.format(backend=self.backend),
+                "Error 4",
+            ) from None
+
+        if self.countries:
+            options = {
+                k: v for k, v in kwargs.items() if k not in ("country", "countries")
+            }
+            self.routes = [
+                AddressParser(country=country, **options) for country in self.countries
+            ]
+            self.max_length = max(route.max_length for route in self.routes)
+            self.address_class = self.routes[0].address_class
+            return
+
+        try:
+            # get detection rules compiled once per process
+            rules = registry.get_rules(
+                self.country,
+                backend=self.backend,
+                tuning=None if self.tuning is None else str(self.tuning),
+                fields=self.fields,
+            )
+            self.rules = rules.pattern
+            self.max_length = rules.max_length
+            self.anchor = rules.anchor
+            self.runs = rules.runs
+            self.run_weight = rules.run_weight
+            if self.fields is not None:
+                self._extra_groups = tuple(
+                    name
+                    for name in self.rules.groupindex
+                    if utils.group_field(name) not in self.fields
+                )
 
         except AttributeError:
             raise e.NoCountrySelected(
@@ -47,43 +195,502 @@ class AddressParser:
                 "Error 2",
             ) from None
 
-    def parse(self, text: str) -> List[Optional[address.Address]]:
+        except (OSError, ValueError) as error:
+            raise e.TuningProfileInvalid(
+                'Tuning profile "{tuning}" can\'t be used: {error}'.format(
+                    tuning=self.tuning, error=error
+                ),
+                "Error 5",
+            ) from None
+
+        try:
+            self.address_class = address.get_address_class(self.result_type)
+        except KeyError:
+            raise e.ResultTypeMissing(
+                'Result type "{result_type}" is not available.'.format(
+                    result_type=self.result_type
+                ),
+                "Error 3",
+            ) from None
+
+    def parse(self, text: str) -> ParseResult:
         """
         Returns a list of addresses found in text together with parsed address parts
         """
-        results: List[Optional[address.Address]] = []
-        self.clean_text = self._normalize_string(text)
+        outcome = _Outcome()
+        result = ParseResult(self._iparse(text, None, outcome))
+        result.truncated = self.truncated = outcome.truncated
+        return result
+
+    def iparse(
+        self, text: str, max_results: Optional[int] = None
+    ) -> Iterator[address.Address]:
+        """
+        Yields addresses found in text as soon as they are matched,
+        scanning stops once max_results addresses were found
+        """
+        outcome = _Outcome()
+        try:
+            yield from self._iparse(text, max_results, outcome)
+        finally:
+            self.truncated = outcome.truncated
 
-        # get addresses
-        address_matches = utils.finditer(self.rules, self.clean_text)
+    def _iparse(
+        self, text: str, max_results: Optional[int], outcome: _Outcome
+    ) -> Iterator[address.Address]:
+        if max_results is not None and max_results <= 0:
+            return
+        if self.hooks:
+            yield from self._iparse_measured(text, max_results, outcome)
+            return
+        deadline = self._deadline()
+        clean_text, offsets = self._prepare(text)
+
+        # get addresses one by one
+        matches = self._find_matches(clean_text, deadline=deadline)
+        try:
+            for found, match in enumerate(matches, 1):
+                parsed = self._parse_address(match, offsets=offsets)
+                if parsed:
+                    yield parsed
+                if found == max_results:
+                    return
+        except TimeoutError:
+            outcome.truncated = True
 
-        if address_matches:
-            # append parsed address info
-            results: List[Optional[address.Address]] = list(  # type: ignore[no-redef]
-                map(self._parse_address, address_matches)
+    def _iparse_measured(
+        self, text: str, max_results: Optional[int], outcome: _Outcome
+    ) -> Iterator[address.Address]:
+        """Same as iparse, but measures stages of parsing for hooks"""
+        clock = time.perf_counter
+        durations = dict.fromkeys(h.STAGES, 0.0)
+        found = addresses = 0
+        country_addresses: Dict[str, int] = {}
+        start = clock()
+        deadline = self._deadline()
+        clean_text, offsets = self._prepare(text)
+        scanned = clock()
+        durations["normalize"] = scanned - start
+
+        matches = self._find_matches(clean_text, deadline=deadline)
+        try:
+            for match in matches:
+                combined = clock()
+                durations["scan"] += combined - scanned
+                found += 1
+                route = self._route(match)
+                fields = route._address_fields(match, offsets=offsets)
+                built = clock()
+                durations["combine"] += built - combined
+                if fields is not None:
+                    parsed = route.address_class(**fields)
+                    addresses += 1
+                    # country of the route is country_id of its addresses
+                    country_addresses[route.country] = (
+                        country_addresses.get(route.country, 0) + 1
+                    )
+                    durations["model"] += clock() - built
+                    yield parsed
+                if found == max_results:
+                    return
+                scanned = clock()
+            durations["scan"] += clock() - scanned
+        except TimeoutError:
+            outcome.truncated = True
+            durations["scan"] += clock() - scanned
+        finally:
+            stats = h.ParseStats(
+                country=self._label(),
+                characters=len(text),
+                bytes=len(text)
+                if text.isascii()
+                else len(text.encode("utf-8", "surrogatepass")),
+                matches=found,
+                addresses=addresses,
+                truncated=outcome.truncated,
+                country_addresses=tuple(country_addresses.items()),
+                **durations,
             )
+            for hook in self.hooks:
+                hook.on_document(text, stats)
+
+    def _prepare(self, text: str) -> Tuple[str, Optional[OffsetMap]]:
+        """Returns text normalized for the rules and the map of its
+        positions back to text, None if text is prenormalized
+        """
+        if self.prenormalized:
+            clean_text, offsets = text, None
+        else:
+            clean_text, offsets = self._normalize_with_offsets(text)
+        self.clean_text = clean_text
+        return clean_text, offsets
 
-        return results
+    def _label(self) -> str:
+        """Returns the country hooks see documents of this parser under"""
+        return ",".join(self.countries or ()) if self.routes else self.country
 
-    def _parse_address(self, match: Union[re.Match, str]) -> Optional[address.Address]:
-        """Parses address into parts"""
+    def parse_stream(
+        self, fileobj: TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Iterator[address.Address]:
+        """
+        Yields addresses found in a text file-like object, reading it in
+        chunks of chunk_size characters. Results and their match_start/match_end
+        are the same as parse() would give for the whole text at once, while
+        memory use stays bounded by chunk size plus the text a match may span:
+        max_length, and more if it goes through long runs of digits or letters.
+        With time_budget_ms the whole stream is a single document, and so it is
+        for hooks: their on_parse is called once the stream ends, on_document
+        isn't as the text of the stream isn't kept.
+        """
+        truncated = False
+        deadline = self._deadline()
+        stats = _StreamStats() if self.hooks else None
+        try:
+            yield from self._parse_stream(fileobj, chunk_size, deadline, stats)
+        except TimeoutError:
+            truncated = True
+        finally:
+            self.truncated = truncated
+            if stats is not None:
+                parsed = h.ParseStats(
+                    country=self._label(),
+                    characters=stats.characters,
+                    bytes=stats.bytes,
+                    matches=stats.matches,
+                    addresses=stats.addresses,
+                    country_addresses=tuple(stats.country_addresses.items()),
+                    truncated=truncated,
+                    **stats.durations,
+                )
+                for hook in self.hooks:
+                    hook.on_parse(parsed)
+
+    def _parse_stream(
+        self,
+        fileobj: TextIO,
+        chunk_size: int,
+        deadline: Optional[float],
+        stats: Optional[_StreamStats] = None,
+    ) -> Iterator[address.Address]:
+        clock = time.perf_counter
+        pending = ""  # raw text not normalized yet
+        buffer = ""  # normalized text which may still contain matches
+        base = 0  # offset of buffer in the whole normalized text
+        pos = 0  # position in buffer to continue scanning from
+        offsets = OffsetMap()  # for the whole stream, trimmed as we go
+        source_base = 0  # offset of pending in the stream
+        eof = False
+        while not eof:
+            chunk = fileobj.read(chunk_size)
+            eof = not chunk
+            start = clock()
+            if stats is not None:
+                stats.characters += len(chunk)
+                stats.bytes += (
+                    len(chunk)
+                    if chunk.isascii()
+                    else len(chunk.encode("utf-8", "surrogatepass"))
+                )
+            pending += chunk
+            cut = len(pending)
+            if not eof:
+                # don't split a run of spaces/commas/newlines, its replacement
+                # depends on all of it
+                while cut and (pending[cut - 1].isspace() or pending[cut - 1] == ","):
+                    cut -= 1
+                if not cut and len(pending) > chunk_size:
+                    # a run this long collapses into ", " or " ", keep just
+                    # a character that collapses the same way
+                    source_base += len(pending) - 1
+                    pending = "," if "," in pending or "\n" in pending else " "
+            if self.prenormalized:
+                piece = pending[:cut]
+                offsets.add(base + len(buffer), source_base)
+            else:
+                piece, piece_offsets = self._normalize_with_offsets(pending[:cut])
+                offsets.extend(piece_offsets, base + len(buffer), source_base)
+            buffer += piece
+            pending = pending[cut:]
+            source_base += cut
+            scanned = clock()
+            if stats is not None:
+                stats.durations["normalize"] += scanned - start
+
+            # matches starting before limit can't change with more text,
+            # text after it is carried over to the next chunk
+            runs = None if self.routes else self._long_runs(buffer)
+            limit = len(buffer) if eof else self._settled(buffer, pos, runs)
+            for match in self._find_matches(buffer, pos, deadline, runs):
+                if match.start() > limit:
+                    break
+                combined = clock()
+                route = self._route(match)
+                fields = route._address_fields(match, offset=base, offsets=offsets)
+                built = clock()
+                parsed = None if fields is None else route.address_class(**fields)
+                if stats is not None:
+                    durations = stats.durations
+                    durations["scan"] += combined - scanned
+                    durations["combine"] += built - combined
+                    durations["model"] += clock() - built
+                    stats.matches += 1
+                    if parsed:
+                        stats.addresses += 1
+                        stats.country_addresses[route.country] = (
+                            stats.country_addresses.get(route.country, 0) + 1
+                        )
+                if parsed:
+                    yield parsed
+                pos = match.end()
+                scanned = clock()
+            if stats is not None:
+                stats.durations["scan"] += clock() - scanned
+            pos = max(pos, limit)
+
+            # forget text that was fully scanned
+            drop = max(pos - _LOOKBEHIND_CONTEXT, 0)
+            buffer = buffer[drop:]
+            base += drop
+            pos -= drop
+            offsets.discard_before(base)
+
+    def _find_matches(
+        self,
+        text: str,
+        pos: int = 0,
+        deadline: Optional[float] = None,
+        runs: Optional[Runs] = None,
+    ) -> Iterator[re.Match]:
+        """Same as self.rules.finditer(text, pos), but with prefilter on
+        the rules are only run inside windows around anchors. Raises
+        TimeoutError once time.monotonic() passes deadline. Runs of text
+        are looked for unless they are passed, parsers of several
+        countries look for runs of each country.
+        """
+        if self.routes:
+            yield from self._find_routed_matches(text, pos, deadline)
+            return
+        if runs is None:
+            runs = self._long_runs(text)
+        if not self.prefilter or self.anchor is None:
+            windows: Iterator[Tuple[int, int]] = iter([(pos, len(text))])
+        else:
+            windows = self._candidate_windows(text, pos, runs)
+        for start, stop in windows:
+            for match in self._search(text, max(start, pos), stop, deadline, runs):
+                yield match
+                pos = match.end()
+
+    def _search(
+        self, text: str, pos: int, stop: int, deadline: Optional[float], runs: Runs
+    ) -> Iterator[re.Match]:
+        """Yields matches of the rules which start in text[pos:stop],
+        checking deadline between searches of at most _BUDGET_BLOCK chars
+        """
+        if pos >= stop:
+            return
+        if deadline is None:
+            # matches starting before stop are the same as for the whole text
+            endpos = self._reach(text, runs, pos, stop)
+            for match in self.matcher.finditer(self.rules, text, pos, endpos):
+                if match.start() >= stop:
+                    break
+                yield match
+            return
+        while pos < stop:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError("time budget of the document is exhausted")
+            # matches starting before block are the same as for the whole text
+            block = min(pos + _BUDGET_BLOCK, stop)
+            limit = self._reach(text, runs, pos, block)
+            for match in self.matcher.finditer(
+                self.rules, text, pos, limit, timeout=remaining
+            ):
+                if match.start() >= block:
+                    break
+                yield match
+                pos = match.end()
+            pos = max(pos, block)
+
+    def _find_routed_matches(
+        self, text: str, pos: int = 0, deadline: Optional[float] = None
+    ) -> Iterator[re.Match]:
+        """Merges matches of all countries in order of their position.
+        Of overlapping matches the one starting first, then the longest one
+        is kept, and other countries continue scanning after it.
+        """
+        # looked for once, scans are restarted after overlapping matches
+        runs = [route._long_runs(text) for route in self.routes]
+        scans = [
+            route._find_matches(text, pos, deadline, runs[index])
+            for index, route in enumerate(self.routes)
+        ]
+        heads = [next(scan, None) for scan in scans]
+        while True:
+            found = [
+                (head.start(), -head.end(), index)
+                for index, head in enumerate(heads)
+                if head is not None
+            ]
+            if not found:
+                return
+            index = min(found)[2]
+            match = heads[index]
+            assert match is not None
+            yield match
+            pos = match.end()
+            heads[index] = next(scans[index], None)
+            for index, head in enumerate(heads):
+                if head is not None and head.start() < pos:
+                    scans[index] = self.routes[index]._find_matches(
+                        text, pos, deadline, runs[index]
+                    )
+                    heads[index] = next(scans[index], None)
+
+    def _deadline(self) -> Optional[float]:
+        """Returns time.monotonic() at which the current document is cut short"""
+        if self.time_budget_ms is None:
+            return None
+        return time.monotonic() + self.time_budget_ms / 1000
+
+    def _candidate_windows(
+        self, text: str, pos: int = 0, runs: Optional[Runs] = None
+    ) -> Iterator[Tuple[int, int]]:
+        """Yields sorted non-overlapping (start, stop) ranges of text[pos:]
+        which every match of the rules starts in
+        """
+        assert self.anchor is not None
+        if runs is None:
+            runs = self._long_runs(text)
+        start, stop = pos, -1
+        for anchor in self.anchor.finditer(text, pos):
+            position = anchor.start()
+            # a match contains an anchor and starts at most max_length
+            # before it, or further if it goes through runs
+            if position - self.max_length > stop:
+                first = self._reach_back(runs, position, pos)
+                if first > stop:
+                    if stop >= 0:
+                        yield start, stop
+                    start = first
+            stop = position + 1
+        if stop >= 0:
+            yield start, stop
+
+    def _settled(self, text: str, pos: int, runs: Optional[Runs] = None) -> int:
+        """Returns up to where in text, which more text may follow, matches
+        starting from pos are known: the rules don't look past its end for
+        them. Runs at its end may go on, they count as long as they are.
+        """
+        if self.routes:
+            return min(route._settled(text, pos) for route in self.routes)
+        if runs is None:
+            runs = self._long_runs(text)
+        length = _run_length(runs, pos, len(text))
+        return (
+            len(text) - self.max_length - _LOOKBEHIND_CONTEXT - self.run_weight * length
+        )
+
+    def _long_runs(self, text: str) -> Runs:
+        """Returns sorted spans of runs in text which unbounded repeats of
+        the rules can take past max_length
+        """
+        if self.runs is None:
+            return []
+        return [run.span() for run in self.runs.finditer(text)]
+
+    def _reach(self, text: str, runs: Runs, start: int, stop: int) -> int:
+        """Returns the end of text the rules may look at when matching
+        at positions from start to stop
+        """
+        reach = end = stop + self.max_length + _LOOKBEHIND_CONTEXT
+        while end < len(text):
+            length = _run_length(runs, start, end)
+            if reach + self.run_weight * length == end:
+                return end
+            end = reach + self.run_weight * length
+        return len(text)
+
+    def _reach_back(self, runs: Runs, position: int, floor: int) -> int:
+        """Returns the first position, not before floor, a match of the
+        rules which contains position may start at
+        """
+        reach = start = position - self.max_length
+        while start > floor:
+            length = _run_length(runs, start, position)
+            if reach - self.run_weight * length == start:
+                return start
+            start = reach - self.run_weight * length
+        return floor
+
+    def _route(self, match: re.Match) -> "AddressParser":
+        """Returns the parser of the country whose rules found match"""
+        if not self.routes:
+            return self
+        # each country has its own compiled rules
+        return next(route for route in self.routes if route.rules is match.re)
+
+    def _parse_address(
+        self,
+        match: Union[re.Match, str],
+        offset: int = 0,
+        offsets: Optional[OffsetMap] = None,
+    ) -> Optional[address.Address]:
+        """Parses address into parts, offset is added to match positions
+        and offsets map them back to positions in the source text
+        """
+        if self.routes:
+            if not isinstance(match, str):
+                return self._route(match)._parse_address(match, offset, offsets)
+            for route in self.routes:
+                parsed = route._parse_address(match, offset, offsets)
+                if parsed:
+                    return parsed
+            return None
+        fields = self._address_fields(match, offset, offsets)
+        if fields is None:
+            return None
+        # create object containing results
+        return self.address_class(**fields)  # type: ignore[no-any-return]
+
+    def _address_fields(
+        self,
+        match: Union[re.Match, str],
+        offset: int = 0,
+        offsets: Optional[OffsetMap] = None,
+    ) -> Optional[Dict[str, Union[str, int, None]]]:
+        """Returns address parts of a match of the rules of this country"""
         if isinstance(match, str):
             # If the address is passed as a match it saves doing the match twice
-            match: Optional[re.Match] = utils.match(  # type: ignore[no-redef]
-                self.rules, match, flags=re.VERBOSE | re.U
+            match: Optional[re.Match] = self.matcher.match(  # type: ignore[no-redef]
+                self.rules, match
             )
-        if match:
-            if isinstance(match, re.Match):
-                match_as_dict = match.groupdict()
-                match_as_dict.update({"country_id": self.country})
-                # combine results
-                cleaned_dict = self._combine_results(match_as_dict)
-                cleaned_dict["match_start"] = match.start()
-                cleaned_dict["match_end"] = match.end()
-                # create object containing results
-                return address.Address(**cleaned_dict)
-
-        return None
+        if not match or isinstance(match, str):
+            return None
+        match_as_dict = self.matcher.groupdict(match)
+        for name in self._extra_groups:
+            del match_as_dict[name]
+        match_as_dict.update({"country_id": self.country})
+        # combine results
+        cleaned_dict = self._combine_results(match_as_dict)
+        start = match.start() + offset
+        end = match.end() + offset
+        cleaned_dict["match_start"] = start
+        cleaned_dict["match_end"] = end
+        # source span covers the address itself without separators
+        # around it, those may have been collapsed by normalization
+        matched = match.group()
+        start += len(matched) - len(matched.lstrip(address.STRIP_CHARS))
+        end -= len(matched) - len(matched.rstrip(address.STRIP_CHARS))
+        if offsets is not None:
+            start = offsets.to_source(start)
+            # map the last character, the one after it may be a
+            # separator shortened by normalization
+            end = offsets.to_source(end - 1) + 1
+        cleaned_dict["source_start"] = start
+        cleaned_dict["source_end"] = end
+        return cleaned_dict
 
     @staticmethod
     def _combine_results(
@@ -117,23 +724,46 @@ class AddressParser:
         """Prepares incoming text for parsing:
         removes excessive spaces, tabs, newlines, etc.
         """
-        conversion = {
-            # newlines
-            r"\r*(\n\r*)+": ", ",
-            r"\s*(\,\s*)+": ", ",
-            # replace excessive empty spaces
-            r"\s+": " ",
-            # convert all types of hyphens/dashes to a
-            # simple old-school dash
-            # from http://utf8-chartable.de/unicode-utf8-table.pl?
-            # start=8192&number=128&utf8=string-literal
-            "‐": "-",
-            "‑": "-",
-            "‒": "-",
-            "–": "-",
-            "—": "-",
-            "―": "-",
-        }
-        for find, replace in conversion.items():
-            text = re.sub(find, replace, text, flags=re.UNICODE)
-        return text
+        text = _SEPARATOR_RUN.sub(_replace_separator_run, text)
+        return text.translate(_DASHES)
+
+    @staticmethod
+    def _normalize_with_offsets(text: str) -> Tuple[str, OffsetMap]:
+        """Same as _normalize_string, also returns map from positions
+        in normalized text to positions in text
+        """
+        offsets = OffsetMap()
+        shift = 0  # how much shorter normalized text is so far
+
+        def replace(match: re.Match) -> str:
+            nonlocal shift
+            replacement = _replace_separator_run(match)
+            start, end = match.span()
+            if end - start != len(replacement):
+                offsets.add_replacement(
+                    start - shift, start, len(replacement), end - start
+                )
+                shift += end - start - len(replacement)
+            return replacement
+
+        text = _SEPARATOR_RUN.sub(replace, text)
+        return text.translate(_DASHES), offsets
+
+
+def _run_length(runs: Runs, start: int, end: int) -> int:
+    """Returns how many chars between start and end are in runs, sorted
+    non-overlapping spans
+    """
+    length = 0
+    # the run before the first one starting after start may reach into it
+    for index in range(max(bisect.bisect_left(runs, (start,)) - 1, 0), len(runs)):
+        run_start, run_end = runs[index]
+        if run_start >= end:
+            break
+        length += max(min(run_end, end) - max(run_start, start), 0)
+    return length
+
+
+def _replace_separator_run(match: re.Match) -> str:
+    run = match.group()
+    return ", " if "," in run or "\n" in run else " "
@@ -0,0 +1,137 @@
+"""
+    pyap.registry
+    ~~~~~~~~~~~~~~~~
+
+    This module contains a process-wide registry of compiled country
+    detection rules, so that each `source_XX.data.full_address` is
+    imported and compiled once per process instead of once per parser.
+
+    :copyright: (c) 2015 by Vladimir Goncharov.
+    :license: MIT, see LICENSE for more details.
+"""
+import importlib
+import threading
+from re import Pattern, RegexFlag
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from .backends import DEFAULT_BACKEND, get_backend
+from .utils import (
+    DEFAULT_FLAGS,
+    capture_only,
+    compile_anchor,
+    compile_runs,
+    max_match_length,
+)
+
+RulesKey = Tuple[str, int, str, Optional[str], Optional[Tuple[str, ...]]]
+
+
+class CompiledRules(NamedTuple):
+    """Compiled detection rules for a single country"""
+
+    country: str
+    # compiled by the backend the rules were requested for
+    pattern: Any
+    # longest text a single match can span, used to size overlap windows
+    max_length: int
+    # matches where a part every address contains starts,
+    # used to find candidate regions quickly
+    anchor: Optional[Pattern] = None
+    # finds runs of chars which unbounded repeats can take past max_length,
+    # a match can span more by the length of runs in it times run_weight
+    runs: Optional[Pattern] = None
+    run_weight: int = 1
+
+
+class RulesRegistry:
+    """Thread-safe cache of compiled detection rules keyed by
+    country and compilation options
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._rules: Dict[RulesKey, CompiledRules] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(
+        self,
+        country: str,
+        flags: RegexFlag = DEFAULT_FLAGS,
+        backend: str = DEFAULT_BACKEND,
+        tuning: Optional[str] = None,
+        fields: Optional[Tuple[str, ...]] = None,
+    ) -> CompiledRules:
+        """Returns compiled rules for country, compiling them on first use.
+        With tuning, a profile of bench.alternations, words of word lists
+        are tried in order of their frequency. With fields, only groups of
+        those address fields capture.
+        Raises ImportError if there are no detection rules for country,
+        KeyError if backend is not available and OSError or ValueError if
+        tuning can't be read.
+        """
+        key = (country, int(flags), backend, tuning, fields)
+        with self._lock:
+            rules = self._rules.get(key)
+            if rules is not None:
+                self.hits += 1
+                return rules
+            self.misses += 1
+            # import detection rules
+            package = "pyap_beauhurst" + ".source_" + country + ".data"
+            data = importlib.import_module(package)
+            if tuning is not None:
+                # not imported with the package, it is runnable with python -m
+                from . import grammar
+
+                counts = grammar.load_counts(tuning, country)
+                if counts:
+                    # a copy of the rules, the imported ones stay as they are
+                    data = grammar.render(country, counts)
+            anchor = getattr(data, "anchor", None)
+            regex = data.full_address
+            if fields is not None:
+                regex = capture_only(regex, fields)
+            runs, run_weight = compile_runs(data.full_address, flags)
+            rules = CompiledRules(
+                country=country,
+                pattern=get_backend(backend).compile(regex, flags),
+                max_length=max_match_length(data.full_address, flags),
+                # anchors only tell where to look, stdlib re is fast at that
+                anchor=None if anchor is None else compile_anchor(anchor, flags),
+                runs=runs,
+                run_weight=run_weight,
+            )
+            self._rules[key] = rules
+            return rules
+
+    def stats(self) -> Dict[str, int]:
+        """Returns hit/miss counters and number of cached rule sets"""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._rules)}
+
+    def clear(self) -> None:
+        """Drops all compiled rules and resets counters"""
+        with self._lock:
+            self._rules.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+registry = RulesRegistry()
+
+
+def get_rules(
+    country: str,
+    flags: RegexFlag = DEFAULT_FLAGS,
+    backend: str = DEFAULT_BACKEND,
+    tuning: Optional[str] = None,
+    fields: Optional[Tuple[str, ...]] = None,
+) -> CompiledRules:
+    """Returns compiled rules for country from the process-wide registry"""
+    return registry.get(country, flags, backend, tuning, fields)
+
+
+def stats() -> Dict[str, int]:
+    """Returns hit/miss counters of the process-wide registry"""
+    return registry.stats()
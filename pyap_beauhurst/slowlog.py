@@ -0,0 +1,162 @@
+"""
+    pyap.slowlog
+    ~~~~~~~~~~~~~~~~
+
+    This module contains a hook which records documents that took longer
+    than a threshold to parse: hash of the text, its length, country,
+    time taken and the stage which took longest, see hooks.py. Records
+    are kept in memory and logged as warnings.
+
+    With a spool directory a sample of slow documents is also written to
+    it, text included, so that they can be parsed again. The directory
+    keeps the latest max_files documents. Spooled documents are run by
+    the benchmark suite with `python -m pyap_beauhurst.bench --slow DIR`.
+
+    :copyright: (c) 2015 by Vladimir Goncharov.
+    :license: MIT, see LICENSE for more details.
+"""
+import collections
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Deque, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from . import hooks
+
+logger = logging.getLogger(__name__)
+
+SUFFIX = ".json"
+
+
+class SlowDocument(NamedTuple):
+    # SHA-256 of the document encoded as UTF-8
+    sha256: str
+    characters: int
+    country: str
+    # durations are in seconds
+    elapsed: float
+    # stage which took longest, one of hooks.STAGES
+    stage: str
+    stage_elapsed: float
+    truncated: bool
+    # when the document was parsed, seconds since the epoch
+    timestamp: float
+    # file the document was written to, None if it wasn't spooled
+    path: Optional[str]
+
+
+class SlowDocumentRecorder(hooks.Hook):
+    """Records documents which took longer than threshold_ms to parse.
+    A sample_rate fraction of them is written to spool, chosen by hash so
+    that a document is either always spooled or never.
+    """
+
+    def __init__(
+        self,
+        threshold_ms: float = 500.0,
+        spool: Union[str, Path, None] = None,
+        sample_rate: float = 1.0,
+        max_files: int = 1000,
+        max_records: int = 1000,
+    ) -> None:
+        self.threshold = threshold_ms / 1000
+        self.spool = Path(spool) if spool is not None else None
+        self.sample_rate = sample_rate
+        self.max_files = max_files
+        # latest records, oldest first
+        self.records: Deque[SlowDocument] = collections.deque(maxlen=max_records)
+        self._lock = threading.Lock()
+        if self.spool is not None:
+            self.spool.mkdir(parents=True, exist_ok=True)
+
+    def on_document(self, text: str, stats: hooks.ParseStats) -> None:
+        elapsed = stats.total
+        if elapsed < self.threshold:
+            return
+        digest = hashlib.sha256(text.encode("utf-8", "surrogatepass")).hexdigest()
+        stage = max(hooks.STAGES, key=lambda name: getattr(stats, name))
+        record = SlowDocument(
+            sha256=digest,
+            characters=stats.characters,
+            country=stats.country,
+            elapsed=elapsed,
+            stage=stage,
+            stage_elapsed=getattr(stats, stage),
+            truncated=stats.truncated,
+            timestamp=time.time(),
+            path=None,
+        )
+        with self._lock:
+            if self.spool is not None and sampled(digest, self.sample_rate):
+                record = record._replace(path=str(self.spool / (digest + SUFFIX)))
+                self._write(record, text)
+            self.records.append(record)
+        logger.warning(
+            "slow document %s: %d characters of %s took %.1f ms, "
+            "%.1f ms of it in %s",
+            digest[:12],
+            record.characters,
+            record.country,
+            elapsed * 1000,
+            record.stage_elapsed * 1000,
+            stage,
+        )
+
+    def _write(self, record: SlowDocument, text: str) -> None:
+        assert self.spool is not None and record.path is not None
+        content = json.dumps({"record": record._asdict(), "text": text})
+        # written under another name first, readers never see part of a file
+        descriptor, temporary = tempfile.mkstemp(dir=self.spool, suffix=".tmp")
+        with os.fdopen(descriptor, "w", encoding="utf-8") as spooled:
+            spooled.write(content)
+        os.replace(temporary, record.path)
+        # the oldest documents go, apart from the one just written
+        others = sorted(
+            (
+                path
+                for path in self.spool.glob("*" + SUFFIX)
+                if str(path) != record.path
+            ),
+            key=_modified,
+        )
+        for path in others[: max(len(others) + 1 - self.max_files, 0)]:
+            path.unlink()
+
+
+def _modified(path: Path) -> int:
+    try:
+        return path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def sampled(digest: str, rate: float) -> bool:
+    """Whether the document of a hex digest falls in a sample of rate"""
+    return int(digest[:8], 16) < rate * (1 << 32)
+
+
+def read_spool(spool: Union[str, Path]) -> Iterator[Tuple[SlowDocument, str]]:
+    """Yields (record, text) of documents in spool, oldest first"""
+    documents = []
+    for path in Path(spool).glob("*" + SUFFIX):
+        try:
+            content = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            # removed by a recorder in the meantime
+            continue
+        documents.append((SlowDocument(**content["record"]), content["text"]))
+    documents.sort(key=lambda document: document[0].timestamp)
+    yield from documents
+
+
+def documents_by_country(spool: Union[str, Path]) -> Dict[str, List[str]]:
+    """Returns texts of documents in spool by country of their parser"""
+    documents: Dict[str, List[str]] = {}
+    for record, text in read_spool(spool):
+        documents.setdefault(record.country, []).append(text)
+    return documents
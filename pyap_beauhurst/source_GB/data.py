@@ -6,69 +6,27 @@
     detecting British/GB/UK addresses.
 
     The module is expected to always contain 'full_address' variable containing
-    all address parsing definitions.
+    all address parsing definitions. An optional 'anchor' variable holds
+    a part of 'full_address' which every address contains, it is used to
+    find candidate regions before running 'full_address'.
 
     :copyright: (c) 2015 by Vladimir Goncharov.
     :license: MIT, see LICENSE for more details.
 """
 
-
-"""Numerals from one to nine
-Note: here and below we use syntax like '[Oo][Nn][Ee]'
-instead of '(one)(?i)' to match 'One' or 'oNe' because
-Python Regexps don't seem to support turning On/Off
-case modes for subcapturing groups.
-"""
-zero_to_nine = r"""
-(?:
-    [Zz][Ee][Rr][Oo]\s|[Oo][Nn][Ee]\s|[Tt][Ww][Oo]\s|
-    [Tt][Hh][Rr][Ee][Ee]\s|[Ff][Oo][Uu][Rr]\s|
-    [Ff][Ii][Vv][Ee]\s|[Ss][Ii][Xx]\s|
-    [Ss][Ee][Vv][Ee][Nn]\s|[Ee][Ii][Gg][Hh][Tt]\s|
-    [Nn][Ii][Nn][Ee]\s|[Tt][Ee][Nn]\s|
-    [Ee][Ll][Ee][Vv][Ee][Nn]\s|
-    [Tt][Ww][Ee][Ll][Vv][Ee]\s|
-    [Tt][Hh][Ii][Rr][Tt][Ee][Ee][Nn]\s|
-    [Ff][Oo][Uu][Rr][Tt][Ee][Ee][Nn]\s|
-    [Ff][Ii][Ff][Tt][Ee][Ee][Nn]\s|
-    [Ss][Ii][Xx][Tt][Ee][Ee][Nn]\s|
-    [Ss][Ee][Vv][Ee][Nn][Tt][Ee][Ee][Nn]\s|
-    [Ee][Ii][Gg][Hh][Tt][Ee][Ee][Nn]\s|
-    [Nn][Ii][Nn][Ee][Tt][Ee][Ee][Nn]\s
-)
-"""
-
-# Numerals - 10, 20, 30 ... 90
-ten_to_ninety = r"""
-(?:
-    [Tt][Ee][Nn]\s|[Tt][Ww][Ee][Nn][Tt][Yy]\s|
-    [Tt][Hh][Ii][Rr][Tt][Yy]\s|
-    [Ff][Oo][Rr][Tt][Yy]\s|
-    [Ff][Oo][Uu][Rr][Tt][Yy]\s|
-    [Ff][Ii][Ff][Tt][Yy]\s|[Ss][Ii][Xx][Tt][Yy]\s|
-    [Ss][Ee][Vv][Ee][Nn][Tt][Yy]\s|
-    [Ee][Ii][Gg][Hh][Tt][Yy]\s|
-    [Nn][Ii][Nn][Ee][Tt][Yy]\s
-)
-"""
-
-# One hundred
-hundred = r"""
-(?:
-    [Hh][Uu][Nn][Dd][Rr][Ee][Dd]\s
-)
-"""
-
-# One thousand
-thousand = r"""
-(?:
-    [Tt][Hh][Oo][Uu][Ss][Aa][Nn][Dd]\s
-)
-"""
+from .. import numerals
+from ..grammar import Raw, WordList
+from ..numerals import number_words
 
 part_divider = r"(?: [\,\s\.\-]{0,3}\,[\,\s\.\-]{0,3} )"
 space_pattern = r"(?: [\s\t]{1,3} )"  # TODO: use \b for word boundary
 
+# numerals are shared by all countries, see numerals.py
+zero_to_nine = str(numerals.zero_to_nine)
+ten_to_ninety = str(numerals.ten_to_ninety)
+hundred = str(numerals.hundred)
+thousand = str(numerals.thousand)
+
 """
 Regexp for matching street number.
 Street number can be written 2 ways:
@@ -90,17 +48,7 @@ street_number = r"""
         {space}?
     )?
     (?:
-        (?:
-            [Aa][Nn][Dd]\s
-            |
-            {thousand} 
-            |
-            {hundred} 
-            |
-            {zero_to_nine} 
-            |
-            {ten_to_ninety} 
-        ){from_to}
+        {number_words}{from_to}
         |
         (?:
             \d{from_to}
@@ -112,10 +60,7 @@ street_number = r"""
     {space}?
 )  # end street_number
 """.format(
-    thousand=thousand,
-    hundred=hundred,
-    zero_to_nine=zero_to_nine,
-    ten_to_ninety=ten_to_ninety,
+    number_words=number_words,
     space=space_pattern,
     from_to="{1,5}",
 )
@@ -140,82 +85,82 @@ street_name = r"""
 
 post_direction = r"""
 (?P<post_direction>
-    (?:
-        [Nn][Oo][Rr][Tt][Hh]\s|
-        [Ss][Oo][Uu][Tt][Hh]\s|
-        [Ee][Aa][Ss][Tt]\s |
-        [Ww][Ee][Ss][Tt]\s 
-    )
+    {directions}
     |
-    (?:
-        NW\s|NE\s|SW\s|SE\s
-    )
+    {direction_abbreviations}
     |
     (?:
         N\.?\s|S\.?\s|E\.?\s|W\.?\s
     )
 )  # end post_direction
-"""
+""".format(
+    directions=WordList(["north", "south", "east", "west"], suffix=r"\s"),
+    direction_abbreviations=WordList(
+        ["NW", "NE", "SW", "SE"], suffix=r"\s", case_sensitive=True
+    ),
+)
 
 # Regexp for matching street type
+street_types = WordList(
+    [
+        "street",
+        Raw(r"S[Tt]\.?(?![A-Za-z])"),
+        "boulevard",
+        Raw(r"[Bb][Ll][Vv][Dd]\.?"),
+        "highway",
+        Raw(r"H[Ww][Yy]\.?"),
+        "broadway",
+        "freeway",
+        "causeway",
+        Raw(r"C[Ss][Ww][Yy]\.?"),
+        "expressway",
+        "way",
+        "walk",
+        "lane",
+        Raw(r"L[Nn]\.?"),
+        "road",
+        Raw(r"R[Dd]\.?"),
+        "avenue",
+        Raw(r"A[Vv][Ee]\.?"),
+        "circle",
+        Raw(r"C[Ii][Rr]\.?"),
+        "cove",
+        Raw(r"C[Vv]\.?"),
+        "drive",
+        Raw(r"D[Rr]\.?"),
+        "parkway",
+        Raw(r"P[Kk][Ww][Yy]\.?"),
+        "park",
+        "court",
+        Raw(r"C[Tt]\.?"),
+        "square",
+        Raw(r"S[Qq]\.?"),
+        "loop",
+        Raw(r"L[Pp]\.?"),
+        "place",
+        Raw(r"P[Ll]\.?"),
+        "parade",
+        "estate",
+    ]
+)
+
 street_type = r"""
 (?:
     (?P<street_type>
-        # Street
-        [Ss][Tt][Rr][Ee][Ee][Tt]|S[Tt]\.?(?![A-Za-z])|
-        # Boulevard
-        [Bb][Oo][Uu][Ll][Ee][Vv][Aa][Rr][Dd]|[Bb][Ll][Vv][Dd]\.?|
-        # Highway
-        [Hh][Ii][Gg][Hh][Ww][Aa][Yy]|H[Ww][Yy]\.?|
-        # Broadway
-        [Bb][Rr][Oo][Aa][Dd][Ww][Aa][Yy]|
-        # Freeway
-        [Ff][Rr][Ee][Ee][Ww][Aa][Yy]|
-        # Causeway
-        [Cc][Aa][Uu][Ss][Ee][Ww][Aa][Yy]|C[Ss][Ww][Yy]\.?|
-        # Expressway
-        [Ee][Xx][Pp][Rr][Ee][Ss][Ss][Ww][Aa][Yy]|
-        # Way
-        [Ww][Aa][Yy]|
-        # Walk
-        [Ww][Aa][Ll][Kk]|
-        # Lane
-        [Ll][Aa][Nn][Ee]|L[Nn]\.?|
-        # Road
-        [Rr][Oo][Aa][Dd]|R[Dd]\.?|
-        # Avenue
-        [Aa][Vv][Ee][Nn][Uu][Ee]|A[Vv][Ee]\.?|
-        # Circle
-        [Cc][Ii][Rr][Cc][Ll][Ee]|C[Ii][Rr]\.?|
-        # Cove
-        [Cc][Oo][Vv][Ee]|C[Vv]\.?|
-        # Drive
-        [Dd][Rr][Ii][Vv][Ee]|D[Rr]\.?|
-        # Parkway
-        [Pp][Aa][Rr][Kk][Ww][Aa][Yy]|P[Kk][Ww][Yy]\.?|
-        # Park
-        [Pp][Aa][Rr][Kk]|
-        # Court
-        [Cc][Oo][Uu][Rr][Tt]|C[Tt]\.?|
-        # Square
-        [Ss][Qq][Uu][Aa][Rr][Ee]|S[Qq]\.?|
-        # Loop
-        [Ll][Oo][Oo][Pp]|L[Pp]\.?|
-        # Place
-        [Pp][Ll][Aa][Cc][Ee]|P[Ll]\.?|
-        # Parade
-        [Pp][Aa][Rr][Aa][Dd][Ee]|P[Ll]\.?|
-        # Estate
-        [Ee][Ss][Tt][Aa][Tt][Ee]
+        {street_types}
     )
     (?P<route_id>)
 )  # end street_type
-"""
+""".format(
+    street_types=street_types
+)
 
 floor = r"""
 (?P<floor>
     (?:
-    \d+[A-Za-z]{0,2}\.?\s[Ff][Ll][Oo][Oo][Rr]\s
+    # digits are taken from the start of a number, so that a search doesn't
+    # scan the rest of a long number again from each of its digits
+    (?<!\d)\d+[A-Za-z]{0,2}\.?\s[Ff][Ll][Oo][Oo][Rr]\s
     )
     |
     (?:
@@ -233,27 +178,14 @@ building = r"""
     )
     \s
     (?:
-        (?:
-            [Aa][Nn][Dd]\s
-            |
-            {thousand}
-            |
-            {hundred}
-            |
-            {zero_to_nine}
-            |
-            {ten_to_ninety}
-        ){{1,5}}
+        {number_words}{{1,5}}
         |
         \d{{0,4}}[A-Za-z]?
     )
     \s ?
 )  # end building_id
 """.format(
-    thousand=thousand,
-    hundred=hundred,
-    zero_to_nine=zero_to_nine,
-    ten_to_ninety=ten_to_ninety,
+    number_words=number_words,
 )
 
 occupancy = r"""
@@ -399,3 +331,6 @@ full_address = r"""
     country=country,
     postal_code=postal_code,
 )
+
+# every address has a postcode, so addresses are only searched for around one
+anchor = postal_code
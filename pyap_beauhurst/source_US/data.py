@@ -6,58 +6,24 @@
     detecting US addresses.
 
     The module is expected to always contain 'full_address' variable containing
-    all address parsing definitions.
+    all address parsing definitions. An optional 'anchor' variable holds
+    a part of 'full_address' which every address contains, it is used to
+    find candidate regions before running 'full_address'.
 
     :copyright: (c) 2015 by Vladimir Goncharov.
     :license: MIT, see LICENSE for more details.
 """
-import string
 from typing import List
 
-"""Numerals from one to nine
-Note: here and below we use syntax like '[Oo][Nn][Ee]'
-instead of '(one)(?i)' to match 'One' or 'oNe' because
-Python Regexps don't seem to support turning On/Off
-case modes for subcapturing groups.
-"""
-zero_to_nine = r"""(?:
-    [Zz][Ee][Rr][Oo]\s|[Oo][Nn][Ee]\s|[Tt][Ww][Oo]\s|
-    [Tt][Hh][Rr][Ee][Ee]\s|[Ff][Oo][Uu][Rr]\s|
-    [Ff][Ii][Vv][Ee]\s|[Ss][Ii][Xx]\s|
-    [Ss][Ee][Vv][Ee][Nn]\s|[Ee][Ii][Gg][Hh][Tt]\s|
-    [Nn][Ii][Nn][Ee]\s|[Tt][Ee][Nn]\s|
-    [Ee][Ll][Ee][Vv][Ee][Nn]\s|
-    [Tt][Ww][Ee][Ll][Vv][Ee]\s|
-    [Tt][Hh][Ii][Rr][Tt][Ee][Ee][Nn]\s|
-    [Ff][Oo][Uu][Rr][Tt][Ee][Ee][Nn]\s|
-    [Ff][Ii][Ff][Tt][Ee][Ee][Nn]\s|
-    [Ss][Ii][Xx][Tt][Ee][Ee][Nn]\s|
-    [Ss][Ee][Vv][Ee][Nn][Tt][Ee][Ee][Nn]\s|
-    [Ee][Ii][Gg][Hh][Tt][Ee][Ee][Nn]\s|
-    [Nn][Ii][Nn][Ee][Tt][Ee][Ee][Nn]\s
-    )"""
-
-# Numerals - 10, 20, 30 ... 90
-ten_to_ninety = r"""(?:
-    [Tt][Ee][Nn]\s|[Tt][Ww][Ee][Nn][Tt][Yy]\s|
-    [Tt][Hh][Ii][Rr][Tt][Yy]\s|
-    [Ff][Oo][Rr][Tt][Yy]\s|
-    [Ff][Oo][Uu][Rr][Tt][Yy]\s|
-    [Ff][Ii][Ff][Tt][Yy]\s|[Ss][Ii][Xx][Tt][Yy]\s|
-    [Ss][Ee][Vv][Ee][Nn][Tt][Yy]\s|
-    [Ee][Ii][Gg][Hh][Tt][Yy]\s|
-    [Nn][Ii][Nn][Ee][Tt][Yy]\s
-    )"""
+from .. import numerals
+from ..grammar import WordList
+from ..numerals import number_words
 
-# One hundred
-hundred = r"""(?:
-    [Hh][Uu][Nn][Dd][Rr][Ee][Dd]\s
-    )"""
-
-# One thousand
-thousand = r"""(?:
-    [Tt][Hh][Oo][Uu][Ss][Aa][Nn][Dd]\s
-    )"""
+# numerals are shared by all countries, see numerals.py
+zero_to_nine = str(numerals.zero_to_nine)
+ten_to_ninety = str(numerals.ten_to_ninety)
+hundred = str(numerals.hundred)
+thousand = str(numerals.thousand)
 
 """
 Regexp for matching street number.
@@ -69,27 +35,14 @@ Street number can be written 2 ways:
    c) - "85 1190"
 """
 street_number = r"""(?P<street_number>
-                        (?:
-                            [Aa][Nn][Dd]\s
-                            |
-                            {thousand}
-                            |
-                            {hundred}
-                            |
-                            {zero_to_nine}
-                            |
-                            {ten_to_ninety}
-                        ){from_to}
+                        {number_words}{from_to}
                         |
                         (?:\d{from_to}
                             (?:\s?\-?\s?\d{from_to})?\s
                         )
                     )
                 """.format(
-    thousand=thousand,
-    hundred=hundred,
-    zero_to_nine=zero_to_nine,
-    ten_to_ninety=ten_to_ninety,
+    number_words=number_words,
     from_to="{1,5}",
 )
 
@@ -107,22 +60,20 @@ street_name = r"""(?P<street_name>
 
 post_direction = r"""
                     (?P<post_direction>
-                        (?:
-                            [Nn][Oo][Rr][Tt][Hh]\s|
-                            [Ss][Oo][Uu][Tt][Hh]\s|
-                            [Ee][Aa][Ss][Tt]\s|
-                            [Ww][Ee][Ss][Tt]\s
-                        )
+                        {directions}
                         |
-                        (?:
-                            NW\s|NE\s|SW\s|SE\s
-                        )
+                        {direction_abbreviations}
                         |
                         (?:
                             N\.?\s|S\.?\s|E\.?\s|W\.?\s
                         )
                     )
-                """
+                """.format(
+    directions=WordList(["north", "south", "east", "west"], suffix=r"\s"),
+    direction_abbreviations=WordList(
+        ["NW", "NE", "SW", "SE"], suffix=r"\s", case_sensitive=True
+    ),
+)
 
 # This list was taken from: https://pe.usps.com/text/pub28/28apc_002.htm
 # Broadway and Lp (abbreviation for Loop) were added to the list
@@ -683,15 +634,18 @@ street_type_list = [
 
 def street_type_list_to_regex(list_of_street_types: List[str]) -> str:
     """Converts a list of street types into a regex"""
-    street_types = "|".join(set(list_of_street_types)).lower()
-    for letter in string.ascii_lowercase:
-        street_types = street_types.replace(letter, f"[{letter.upper()}{letter}]")
+    # Street types are merged into a trie: Av, Ave and Avenue share the "av" branch.
+    # Street types are letters only, so just one of them fits between the word
+    # boundaries and the order they are tried in doesn't change the match.
+    # Longer ones go first to skip backtracking when a longer one is found.
+    street_types = WordList(
+        sorted(set(list_of_street_types), key=str.lower, reverse=True)
+    )
 
     # Use \b to check that there are word boundaries before and after the street type
     # Optionally match zero to two of " ", ",", or "." after the street name
-    street_types = street_types.replace("|", r"\b{div}|\b")
-    street_types = r"\b" + street_types + r"\b{div}"
-    return street_types.format(
+    return r"\b{street_types}\b{div}".format(
+        street_types=street_types,
         div=r"[\.\s,]{0,2}",
     )
 
@@ -733,27 +687,14 @@ building = r"""
                 )
                 \s
                 (?:
-                    (?:
-                        [Aa][Nn][Dd]\s
-                        |
-                        {thousand}
-                        |
-                        {hundred}
-                        |
-                        {zero_to_nine}
-                        |
-                        {ten_to_ninety}
-                    ){{1,5}}
+                    {number_words}{{1,5}}
                     |
                     \d{{0,4}}[A-Za-z]?
                 )
                 \s?
             )
             """.format(
-    thousand=thousand,
-    hundred=hundred,
-    zero_to_nine=zero_to_nine,
-    ten_to_ninety=ten_to_ninety,
+    number_words=number_words,
 )
 
 occupancy = r"""
@@ -811,82 +752,91 @@ full_street = r"""
     po_box=po_box,
 )
 
+# US states and their abbreviations
+state_abbreviations = WordList(
+    # states
+    "AL AK AZ AR CA CO CT DE DC FL GA HI ID IL IN IA KS KY LA ME MD MA MI MN "
+    "MS MO MT NE NV NH NJ NM NY NC ND OH OK OR PA RI SC SD TN TX UT VT VA WA "
+    "WV WI WY "
+    # unincorporated & commonwealth territories
+    "AS GU MP PR VI".split(),
+    case_sensitive=True,
+)
+states = WordList(
+    [
+        "alabama",
+        "alaska",
+        "arizona",
+        "arkansas",
+        "california",
+        "colorado",
+        "connecticut",
+        "delaware",
+        "district of columbia",
+        "florida",
+        "georgia",
+        "hawaii",
+        "idaho",
+        "illinois",
+        "indiana",
+        "iowa",
+        "kansas",
+        "kentucky",
+        "louisiana",
+        "maine",
+        "maryland",
+        "massachusetts",
+        "michigan",
+        "minnesota",
+        "mississippi",
+        "missouri",
+        "montana",
+        "nebraska",
+        "nevada",
+        "new hampshire",
+        "new jersey",
+        "new mexico",
+        "new york",
+        "north carolina",
+        "north dakota",
+        "ohio",
+        "oklahoma",
+        "oregon",
+        "pennsylvania",
+        "rhode island",
+        "south carolina",
+        "south dakota",
+        "tennessee",
+        "texas",
+        "utah",
+        "vermont",
+        "virginia",
+        "washington",
+        "west virginia",
+        "wisconsin",
+        "wyoming",
+        # unincorporated & commonwealth territories
+        "american samoa",
+        "guam",
+        "northern mariana islands",
+        "puerto rico",
+        "virgin islands",
+    ]
+)
+
 # region1 is actually a "state"
 region1 = r"""
         (?P<region1>
-            (?:
-                # states abbreviations
-                AL|AK|AZ|AR|CA|CO|CT|DE|DC|FL|GA|HI|ID|IL|IN|IA|KS|KY|LA|ME|MD|MA|MI|
-                MN|MS|MO|MT|NE|NV|NH|NJ|NM|NY|NC|ND|OH|OK|OR|PA|RI|SC|SD|TN|TX|UT|VT|
-                VA|WA|WV|WI|WY|
-                # unincorporated & commonwealth territories
-                AS|GU|MP|PR|VI
-            )
+            # states abbreviations
+            {state_abbreviations}
             |
-            (?:
-                # states full
-                [Aa][Ll][Aa][Bb][Aa][Mm][Aa]|
-                [Aa][Ll][Aa][Ss][Kk][Aa]|
-                [Aa][Rr][Ii][Zz][Oo][Nn][Aa]|
-                [Aa][Rr][Kk][Aa][Nn][Ss][Aa][Ss]|
-                [Cc][Aa][Ll][Ii][Ff][Oo][Rr][Nn][Ii][Aa]|
-                [Cc][Oo][Ll][Oo][Rr][Aa][Dd][Oo]|
-                [Cc][Oo][Nn][Nn][Ee][Cc][Tt][Ii][Cc][Uu][Tt]|
-                [Dd][Ee][Ll][Aa][Ww][Aa][Rr][Ee]|
-                [Dd][Ii][Ss][Tt][Rr][Ii][Cc][Tt]\s[Oo][Ff]\s
-                [Cc][Oo][Ll][Uu][Mm][Bb][Ii][Aa]|
-                [Ff][Ll][Oo][Rr][Ii][Dd][Aa]|
-                [Gg][Ee][Oo][Rr][Gg][Ii][Aa]|
-                [Hh][Aa][Ww][Aa][Ii][Ii]|
-                [Ii][Dd][Aa][Hh][Oo]|
-                [Ii][Ll][Ll][Ii][Nn][Oo][Ii][Ss]|
-                [Ii][Nn][Dd][Ii][Aa][Nn][Aa]|
-                [Ii][Oo][Ww][Aa]|
-                [Kk][Aa][Nn][Ss][Aa][Ss]|
-                [Kk][Ee][Nn][Tt][Uu][Cc][Kk][Yy]|
-                [Ll][Oo][Uu][Ii][Ss][Ii][Aa][Nn][Aa]|
-                [Mm][Aa][Ii][Nn][Ee]|
-                [Mm][Aa][Rr][Yy][Ll][Aa][Nn][Dd]|
-                [Mm][Aa][Ss][Ss][Aa][Cc][Hh][Uu][Ss][Ee][Tt][Tt][Ss]|
-                [Mm][Ii][Cc][Hh][Ii][Gg][Aa][Nn]|
-                [Mm][Ii][Nn][Nn][Ee][Ss][Oo][Tt][Aa]|
-                [Mm][Ii][Ss][Ss][Ii][Ss][Ss][Ii][Pp][Pp][Ii]|
-                [Mm][Ii][Ss][Ss][Oo][Uu][Rr][Ii]|
-                [Mm][Oo][Nn][Tt][Aa][Nn][Aa]|
-                [Nn][Ee][Bb][Rr][Aa][Ss][Kk][Aa]|
-                [Nn][Ee][Vv][Aa][Dd][Aa]|
-                [Nn][Ee][Ww]\s[Hh][Aa][Mm][Pp][Ss][Hh][Ii][Rr][Ee]|
-                [Nn][Ee][Ww]\s[Jj][Ee][Rr][Ss][Ee][Yy]|
-                [Nn][Ee][Ww]\s[Mm][Ee][Xx][Ii][Cc][Oo]|
-                [Nn][Ee][Ww]\s[Yy][Oo][Rr][Kk]|
-                [Nn][Oo][Rr][Tt][Hh]\s[Cc][Aa][Rr][Oo][Ll][Ii][Nn][Aa]|
-                [Nn][Oo][Rr][Tt][Hh]\s[Dd][Aa][Kk][Oo][Tt][Aa]|
-                [Oo][Hh][Ii][Oo]|
-                [Oo][Kk][Ll][Aa][Hh][Oo][Mm][Aa]|
-                [Oo][Rr][Ee][Gg][Oo][Nn]|
-                [Pp][Ee][Nn][Nn][Ss][Yy][Ll][Vv][Aa][Nn][Ii][Aa]|
-                [Rr][Hh][Oo][Dd][Ee]\s[Ii][Ss][Ll][Aa][Nn][Dd]|
-                [Ss][Oo][Uu][Tt][Hh]\s[Cc][Aa][Rr][Oo][Ll][Ii][Nn][Aa]|
-                [Ss][Oo][Uu][Tt][Hh]\s[Dd][Aa][Kk][Oo][Tt][Aa]|
-                [Tt][Ee][Nn][Nn][Ee][Ss][Ss][Ee][Ee]|
-                [Tt][Ee][Xx][Aa][Ss]|
-                [Uu][Tt][Aa][Hh]|
-                [Vv][Ee][Rr][Mm][Oo][Nn][Tt]|
-                [Vv][Ii][Rr][Gg][Ii][Nn][Ii][Aa]|
-                [Ww][Aa][Ss][Hh][Ii][Nn][Gg][Tt][Oo][Nn]|
-                [Ww][Ee][Ss][Tt]\s[Vv][Ii][Rr][Gg][Ii][Nn][Ii][Aa]|
-                [Ww][Ii][Ss][Cc][Oo][Nn][Ss][Ii][Nn]|
-                [Ww][Yy][Oo][Mm][Ii][Nn][Gg]|
-                # unincorporated & commonwealth territories
-                [Aa][Mm][Ee][Rr][Ii][Cc][Aa][Nn]\s[Ss][Aa][Mm][Oo][Aa]
-                |[Gg][Uu][Aa][Mm]|
-                [Nn][Oo][Rr][Tt][Hh][Ee][Rr][Nn]\s[Mm][Aa][Rr][Ii][Aa][Nn][Aa]\s
-                [Ii][Ss][Ll][Aa][Nn][Dd][Ss]|
-                [Pp][Uu][Ee][Rr][Tt][Oo]\s[Rr][Ii][Cc][Oo]|
-                [Vv][Ii][Rr][Gg][Ii][Nn]\s[Ii][Ss][Ll][Aa][Nn][Dd][Ss]
-            )
+            # states full
+            {states}
         )
-        """
+        """.format(
+    state_abbreviations=state_abbreviations,
+    states=states,
+)
 
 # TODO: doesn't catch cities containing French characters
 city = r"""
@@ -925,3 +875,6 @@ full_address = r"""
     country=country,
     postal_code=postal_code,
 )
+
+# every address has a state, so addresses are only searched for around one
+anchor = region1
@@ -8,24 +8,297 @@ This module provides some utility functions.
 :license: MIT, see LICENSE for more details.
 """
 import re
-from re import Match, RegexFlag
-from typing import List, Optional
+from re import Match, Pattern, RegexFlag
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+try:
+    from re import _compiler as sre_compile  # type: ignore[attr-defined]
+    from re import _parser as sre_parse  # type: ignore[attr-defined]
+except ImportError:  # Python < 3.11
+    import sre_compile
+    import sre_parse
 
 DEFAULT_FLAGS = re.VERBOSE | re.UNICODE
+# How many times unbounded repeats (`+`, `*`, `{n,}`) are assumed to
+# repeat when estimating the longest possible match
+UNBOUNDED_REPEAT = 32
+
+# opcodes of parsed regexes: items matching a single character, and repeats
+SINGLE_CHAR_OPS = (
+    sre_parse.LITERAL,
+    sre_parse.NOT_LITERAL,
+    sre_parse.IN,
+    sre_parse.ANY,
+)
+REPEAT_OPS = (
+    sre_parse.MAX_REPEAT,
+    sre_parse.MIN_REPEAT,
+    getattr(sre_parse, "POSSESSIVE_REPEAT", sre_parse.MAX_REPEAT),
+)
+_ATOMIC_GROUP = getattr(sre_parse, "ATOMIC_GROUP", None)
+_ANY_CHAR = sre_parse.parse(r"[\s\S]")[0]
+_NAMED_GROUP = re.compile(r"\(\?P<(\w+)>")
+_GROUP_REFERENCE = re.compile(r"\(\?(?:\(|P=)(\w+)\)")
 
 
-def match(regex: str, string: str, flags: RegexFlag = DEFAULT_FLAGS) -> Optional[Match]:
+def match(
+    regex: Union[str, Pattern], string: str, flags: RegexFlag = DEFAULT_FLAGS
+) -> Optional[Match]:
     """Utility function for re.match"""
+    if not isinstance(regex, str):
+        # patterns compiled by any backend, flags are already baked in
+        return regex.match(string)
     return re.match(regex, string, flags=flags)
 
 
 def findall(
-    regex: str, string: str, flags: RegexFlag = DEFAULT_FLAGS
+    regex: Union[str, Pattern], string: str, flags: RegexFlag = DEFAULT_FLAGS
 ) -> List[Optional[Match]]:
     """Utility function for re.findall"""
+    if not isinstance(regex, str):
+        return regex.findall(string)
     return re.findall(regex, string, flags=flags)
 
 
-def finditer(regex: str, string: str, flags: RegexFlag = DEFAULT_FLAGS) -> List[Match]:
+def finditer(
+    regex: Union[str, Pattern], string: str, flags: RegexFlag = DEFAULT_FLAGS
+) -> List[Match]:
     """Utility function for re.finditer"""
+    if not isinstance(regex, str):
+        return list(regex.finditer(string))
     return list(re.finditer(regex, string, flags=flags))
+
+
+def max_match_length(
+    regex: str, flags: RegexFlag = DEFAULT_FLAGS, unbounded: int = UNBOUNDED_REPEAT
+) -> int:
+    """Returns the longest text a regex can inspect from where its match
+    starts. Unbounded repeats like `\\d+` are counted as `unbounded`
+    repetitions, lookaheads are counted as if they consumed text.
+    """
+    return _max_width(sre_parse.parse(regex, flags), unbounded)
+
+
+def compile_runs(
+    regex: str, flags: RegexFlag = DEFAULT_FLAGS, unbounded: int = UNBOUNDED_REPEAT
+) -> Tuple[Optional[Pattern], int]:
+    """Compiles a pattern which finds runs of more than `unbounded` chars
+    that unbounded repeats of regex can consume, max_match_length() assumes
+    there are none. Each char of such runs can make a match look further by
+    the returned weight: one, and one more for each lookahead reading it
+    again. The pattern is None if regex has no unbounded repeats.
+    """
+    parsed = sre_parse.parse(regex, flags)
+    # items by their repr, and whether they ignore case
+    items: Dict[str, Tuple[Any, bool]] = {}
+    weight = _run_items(parsed, items, 1, False, bool(flags & re.IGNORECASE))
+    if not items:
+        return None, 1
+    ignorecase = any(ignored for _, ignored in items.values())
+    # one set of chars is much faster to repeat than a branch of items,
+    # negated sets stay apart
+    charset: List[Any] = []
+    others = []
+    for (op, av), _ in items.values():
+        if op is sre_parse.LITERAL:
+            charset.append((op, av))
+        elif op is sre_parse.IN and av[0][0] is not sre_parse.NEGATE:
+            charset.extend(av)
+        else:
+            others.append((op, av))
+    if charset:
+        others.append((sre_parse.IN, charset))
+    # `(?<!x)(?:x){n,}` with x replaced by the collected items, runs are only
+    # tried where they start
+    runs = sre_parse.parse("(?<!x)(?:x){{{count},}}".format(count=unbounded + 1), flags)
+    if len(others) == 1:
+        unit = others
+    else:
+        alternatives = [sre_parse.SubPattern(runs.state, [item]) for item in others]
+        unit = [(sre_parse.BRANCH, (None, alternatives))]
+    runs.data[0][1][1].data = unit
+    runs.data[1][1][2].data = unit
+    # slower, so only if items of regex ignore case
+    if ignorecase:
+        flags |= re.IGNORECASE
+    pattern = sre_compile.compile(runs, flags)
+    return pattern, weight
+
+
+def _run_items(
+    pattern: Any,
+    items: Dict[str, Tuple[Any, bool]],
+    reads: int,
+    repeated: bool,
+    ignorecase: bool,
+) -> int:
+    """Collects single-char items of unbounded repeats in pattern, returns
+    how many times the text they consume can be read, 0 if there are none
+    """
+    weight = 0
+    for op, av in pattern:
+        # subpatterns of the item, and how they are read
+        inner: List[Any] = []
+        inner_reads, inner_repeated, inner_ignorecase = reads, repeated, ignorecase
+        if op in SINGLE_CHAR_OPS:
+            if repeated:
+                # ANY may match newlines under an inline flag, take any char
+                item = _ANY_CHAR if op is sre_parse.ANY else (op, av)
+                ignored = items.get(repr(item), (item, False))[1]
+                items[repr(item)] = (item, ignored or ignorecase)
+        elif op is sre_parse.GROUPREF:
+            # a backreference repeats text of a group, whatever it is
+            items[repr(_ANY_CHAR)] = (_ANY_CHAR, False)
+            weight = max(weight, reads)
+        elif op is sre_parse.SUBPATTERN:
+            _, add_flags, del_flags, item = av
+            inner = [item]
+            if add_flags & re.IGNORECASE:
+                inner_ignorecase = True
+            elif del_flags & re.IGNORECASE:
+                inner_ignorecase = False
+        elif op is sre_parse.BRANCH:
+            inner = av[1]
+        elif op in REPEAT_OPS:
+            low, high, item = av
+            inner = [item]
+            if high == sre_parse.MAXREPEAT:
+                inner_repeated = True
+                weight = max(weight, reads)
+        elif op is sre_parse.ASSERT or op is sre_parse.ASSERT_NOT:
+            direction, item = av
+            inner = [item]
+            # lookaheads read text which the rest of the pattern reads again
+            if direction > 0:
+                inner_reads += 1
+        elif op is sre_parse.GROUPREF_EXISTS:
+            _, yes, no = av
+            inner = [yes, no] if no else [yes]
+        elif op is _ATOMIC_GROUP:
+            inner = [av]
+        for item in inner:
+            weight = max(
+                weight,
+                _run_items(item, items, inner_reads, inner_repeated, inner_ignorecase),
+            )
+    return weight
+
+
+def group_field(name: str) -> str:
+    """Returns the address field a named group of the rules is for: variants
+    of a rule have their groups renamed with a suffix like _b or _c
+    """
+    if name[-2:-1] == "_" and "a" <= name[-1:] <= "m":
+        return name[:-2]
+    return name
+
+
+def capture_only(regex: str, fields: Iterable[str]) -> str:
+    """Turns named groups of regex which aren't for one of fields into
+    non-capturing groups, so that matches of the regex don't change. Groups
+    which conditionals or backreferences refer to are kept.
+    """
+    keep = set(fields)
+    referenced = set(_GROUP_REFERENCE.findall(regex))
+
+    def replace(group: Match) -> str:
+        name = group.group(1)
+        if name in referenced or group_field(name) in keep:
+            return group.group()
+        return "(?:"
+
+    return _NAMED_GROUP.sub(replace, regex)
+
+
+def compile_anchor(regex: str, flags: RegexFlag = DEFAULT_FLAGS) -> Pattern:
+    """Compiles regex into a zero-width pattern which matches at every
+    position regex matches at. Alternatives starting with the same item are
+    merged, so that a position is rejected after a few checks instead of
+    one check per alternative.
+
+    Merged alternatives may change order, so the pattern only tells where
+    regex matches, not which of its alternatives would match.
+    """
+    parsed = sre_parse.parse("(?={regex})".format(regex=regex), flags)
+    _factor_branches(parsed)
+    return sre_compile.compile(parsed, flags)  # type: ignore[no-any-return]
+
+
+def _factor_branches(pattern: Any) -> None:
+    """Merges alternatives with a common first item everywhere in pattern"""
+    for index, (op, av) in enumerate(pattern.data):
+        if op is sre_parse.BRANCH:
+            alternatives = _factor_alternatives(pattern.state, av[1])
+            pattern.data[index] = (op, (av[0], alternatives))
+        elif op is sre_parse.SUBPATTERN:
+            _factor_branches(av[-1])
+        elif op in REPEAT_OPS:
+            _factor_branches(av[2])
+        elif op is sre_parse.ASSERT or op is sre_parse.ASSERT_NOT:
+            _factor_branches(av[1])
+
+
+def _factor_alternatives(state: Any, alternatives: List[Any]) -> List[Any]:
+    flat = []
+    for alternative in alternatives:
+        # `(?:a|b)|c` is the same set of alternatives as `a|b|c`
+        if len(alternative.data) == 1:
+            op, av = alternative.data[0]
+            if op is sre_parse.SUBPATTERN and av[:3] == (None, 0, 0):
+                inner = av[-1].data
+                if len(inner) == 1 and inner[0][0] is sre_parse.BRANCH:
+                    flat.extend(inner[0][1][1])
+                    continue
+        flat.append(alternative)
+
+    groups: Dict[str, List[Any]] = {}
+    for alternative in flat:
+        key = repr(alternative.data[0]) if alternative.data else ""
+        groups.setdefault(key, []).append(alternative)
+
+    factored = []
+    for key, group in groups.items():
+        if not key or len(group) == 1:
+            alternative = group[0]
+        else:
+            rest = [sre_parse.SubPattern(state, item.data[1:]) for item in group]
+            branch = sre_parse.SubPattern(state, [(sre_parse.BRANCH, (None, rest))])
+            alternative = sre_parse.SubPattern(
+                state,
+                [group[0].data[0], (sre_parse.SUBPATTERN, (None, 0, 0, branch))],
+            )
+        _factor_branches(alternative)
+        factored.append(alternative)
+    return factored
+
+
+def _max_width(pattern: Any, unbounded: int) -> int:
+    """Walks parsed regex and sums up widths of its items"""
+    width = 0
+    for op, av in pattern:
+        if op in SINGLE_CHAR_OPS:
+            width += 1
+        elif op is sre_parse.BRANCH:
+            width += max(_max_width(item, unbounded) for item in av[1])
+        elif op is sre_parse.SUBPATTERN:
+            width += _max_width(av[-1], unbounded)
+        elif op in REPEAT_OPS:
+            low, high, item = av
+            if high == sre_parse.MAXREPEAT:
+                high = max(low, unbounded)
+            width += high * _max_width(item, unbounded)
+        elif op is sre_parse.ASSERT or op is sre_parse.ASSERT_NOT:
+            direction, item = av
+            if direction > 0:
+                # lookaheads inspect text past the end of the match
+                width += _max_width(item, unbounded)
+        elif op is sre_parse.GROUPREF_EXISTS:
+            _, yes, no = av
+            width += max(
+                _max_width(yes, unbounded), _max_width(no, unbounded) if no else 0
+            )
+        elif op is sre_parse.GROUPREF:
+            width += unbounded
+        elif op is _ATOMIC_GROUP:
+            width += _max_width(av, unbounded)
+    return width
@@ -0,0 +1,36 @@
+""" Fixtures shared by tests of hooks """
+from typing import Any, Callable
+
+import pytest
+
+from pyap_beauhurst import hooks
+from pyap_beauhurst.parser import AddressParser
+
+HookedParser = Callable[..., AddressParser]
+
+# a document with two US addresses
+TEXT = """
+    Lorem ipsum
+    225 E. John Carpenter Freeway,
+    Suite 1500 Irving, Texas 75062
+    Dorem sit amet 123 Main Street, Nowhere, TX
+    """
+
+
+@pytest.fixture
+def text() -> str:
+    return TEXT
+
+
+@pytest.fixture
+def hooked_parser() -> HookedParser:
+    """Returns a function making parsers which call the hooks it is given,
+    of US addresses unless other options say otherwise
+    """
+
+    def make(*parser_hooks: hooks.Hook, **options: Any) -> AddressParser:
+        if "countries" not in options:
+            options.setdefault("country", "US")
+        return AddressParser(hooks=list(parser_hooks), **options)
+
+    return make
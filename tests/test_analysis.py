@@ -0,0 +1,80 @@
+""" Test for backtracking analysis of detection rules """
+
+import re
+
+import pytest
+
+from pyap_beauhurst import analysis
+
+
+def test_exponential() -> None:
+    regex = r"(?P<words>(?:\w+\s?)+)$"
+    (finding,) = analysis.analyze(regex)
+    assert finding.kind == "exponential"
+    assert finding.component == "words"
+    assert finding.attack(3) == "aaa!"
+    assert re.match(regex, finding.attack(20)) is None
+
+
+@pytest.mark.parametrize(
+    "regex",
+    [
+        # a separator ends every repetition
+        r"(?:[a-z]+\s)+",
+        # fixed count can't give characters back
+        r"\d{5}\d?",
+        # optional characters next to each other
+        r"\s?,?\s?",
+    ],
+)
+def test_no_findings(regex: str) -> None:
+    assert analysis.analyze(regex) == []
+
+
+def test_polynomial() -> None:
+    regex = r"(?P<street_name>[a-z\s\.]*?)\,?(?P<div>\s{1,3})x"
+    findings = analysis.analyze(regex)
+    assert [(f.kind, f.component, f.pump) for f in findings] == [
+        ("polynomial", "street_name + div", " "),
+    ]
+    assert findings[0].description == r"[a-z\s\.]{0,}? then [\s]{1,3}"
+
+
+def test_bounded() -> None:
+    # bounded repeats only backtrack over a few characters
+    assert analysis.analyze(r"(?P<street_type>[\s,\.]{0,2})[\s,\(]{0,3}x") == []
+    # unless they repeat along with the text
+    findings = analysis.analyze(r"(?:[\s,\.]{0,2}[\s,\(]{0,3}x)+")
+    assert [f.kind for f in findings] == ["polynomial"]
+
+
+def test_grows() -> None:
+    # searching takes linear time at least
+    assert not analysis.grows([0.001, 0.002, 0.004])
+    assert analysis.grows([0.001, 0.004, 0.016])
+
+
+def test_ambiguous() -> None:
+    findings = analysis.analyze(r"(?P<city>[a-z\s]{2,20})\s?(?P<state>[A-Z]{2})")
+    assert [(f.kind, f.component) for f in findings] == [("ambiguous", "city")]
+
+
+def test_scoped_flags() -> None:
+    # (?a:...) keeps \w to ASCII, so é can't be split between repeats
+    assert analysis.analyze(r"(?a:\w+)é{1,3}") == []
+    assert analysis.analyze(r"\w+é{1,3}")[0].pump == "é"
+
+
+@pytest.mark.parametrize("country", analysis.COUNTRIES)
+def test_country_rules(country: str) -> None:
+    findings = analysis.analyze_country(country)
+    assert not [f for f in findings if f.kind == "exponential"]
+    assert all(f.component for f in findings)
+
+
+def test_gb_street_name() -> None:
+    findings = analysis.analyze_country("GB")
+    found = [(f.kind, f.component) for f in findings]
+    assert ("polynomial", "full_street + street_name") in found
+    # bounded street names next to bounded separators are fine
+    assert ("polynomial", "street_name + full_street") not in found
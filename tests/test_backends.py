@@ -0,0 +1,60 @@
+""" Test for matcher backends """
+
+import pytest
+
+import pyap_beauhurst as ap
+from pyap_beauhurst import backends, exceptions as e, parser, registry, utils
+
+TEST_TEXTS = {
+    "US": "xxx 225 E. John Carpenter Freeway, Suite 1500 Irving, Texas 75062 xxx "
+    "1500 Westlake Avenue North Suite 108 Seattle, WA 98109",
+    "CA": "xxx 1111 West Hastings Street, Vancouver, BC V6E 2J3 xxx "
+    "3000 Steeles Avenue East, Suite 700 Markham, Ontario Canada",
+    "GB": "xxx 10 Downing Street, London SW1A 2AA xxx "
+    "Flat 2, 32 High Street, Manchester M1 1AE",
+}
+
+
+def test_default_backend() -> None:
+    address_parser = parser.AddressParser(country="US")
+    assert address_parser.matcher is backends.get_backend()
+    assert address_parser.matcher.name == "re"
+    with pytest.raises(KeyError):
+        backends.get_backend("no-such-backend")
+
+
+def test_backend_missing() -> None:
+    with pytest.raises(e.BackendMissing):
+        parser.AddressParser(country="US", backend="no-such-backend")
+
+
+@pytest.mark.parametrize("country", ["US", "CA", "GB"])
+def test_regex_backend(country: str) -> None:
+    pytest.importorskip("regex")
+    address_parser = parser.AddressParser(country=country, backend="regex")
+    addresses = address_parser.parse(TEST_TEXTS[country])
+    assert len(addresses) == 2
+    assert addresses == ap.parse(TEST_TEXTS[country], country=country)
+    # rules are cached separately for each backend
+    assert address_parser.rules is not registry.get_rules(country).pattern
+    assert utils.match(address_parser.rules, str(addresses[0])) is not None
+
+
+def test_regex_backend_timeout() -> None:
+    pytest.importorskip("regex")
+    matcher = backends.get_backend("regex")
+    assert matcher.supports_timeout
+    rules = registry.get_rules("GB", backend="regex").pattern
+    with pytest.raises(TimeoutError):
+        list(matcher.finditer(rules, "lorem ipsum " * 10000, timeout=0.001))
+
+
+def test_regex_backend_time_budget() -> None:
+    pytest.importorskip("regex")
+    # the regex backend also interrupts a search which runs out of time
+    address_parser = parser.AddressParser(
+        country="GB", backend="regex", prefilter=False, time_budget_ms=1
+    )
+    addresses = address_parser.parse("lorem ipsum " * 10000 + TEST_TEXTS["GB"])
+    assert addresses.truncated
+    assert addresses == []
@@ -0,0 +1,88 @@
+""" Test for batch parsing """
+
+from typing import Any
+
+import pytest
+
+import pyap_beauhurst as ap
+from pyap_beauhurst import batch, exceptions as e
+from pyap_beauhurst.hooks import HistogramHook
+
+US_ADDRESS = "225 E. John Carpenter Freeway, Suite 1500 Irving, Texas 75062"
+GB_ADDRESS = "71 Wilson Avenue Rochester Kent ME1 2SJ"
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_parse_many_keeps_input_order(workers: int) -> None:
+    texts = ["xxx " + US_ADDRESS + " xxx", "No address here", US_ADDRESS] * 5
+    results = ap.parse_many(texts, country="US", workers=workers, chunksize=2)
+    assert [result.position for result in results] == list(range(len(texts)))
+    for result, text in zip(results, texts):
+        assert result.error is None
+        assert [str(a) for a in result.addresses] == [
+            str(a) for a in ap.parse(text, country="US")
+        ]
+
+
+def test_parse_many_deduplicates(mocker: Any) -> None:
+    parse_one = mocker.spy(batch, "_parse_one")
+    results = ap.parse_many([GB_ADDRESS] * 10, country="GB", workers=1)
+    assert parse_one.call_count == 1
+    assert len(results) == 10
+    assert all(str(result.addresses[0]) == GB_ADDRESS for result in results)
+
+
+def test_parse_many_isolates_errors() -> None:
+    texts: Any = [US_ADDRESS, None, US_ADDRESS + " "]
+    results = ap.parse_many(texts, country="US", workers=1)
+    assert results[0].error is None
+    assert results[1].error is not None
+    assert results[1].addresses == []
+    assert str(results[2].addresses[0]) == US_ADDRESS
+
+
+def test_parse_many_reuses_pool() -> None:
+    texts = [US_ADDRESS + " " * i for i in range(40)]
+    ap.parse_many(texts, country="US", workers=2)
+    pools = dict(batch._pools)
+    ap.parse_many(texts, country="US", workers=2)
+    assert batch._pools == pools
+    batch.shutdown()
+    assert not batch._pools
+
+
+def test_parse_many_countries() -> None:
+    texts = [US_ADDRESS, GB_ADDRESS, US_ADDRESS + ", " + GB_ADDRESS]
+    results = ap.parse_many(texts, countries=["US", "GB"], workers=2, chunksize=1)
+    assert [[a.country_id for a in result.addresses] for result in results] == [
+        ["US"],
+        ["GB"],
+        ["US", "GB"],
+    ]
+
+
+def test_parse_many_fields() -> None:
+    texts = [US_ADDRESS, "xxx " + US_ADDRESS] * 4
+    results = ap.parse_many(
+        texts, country="US", workers=2, chunksize=1, fields=["postal_code"]
+    )
+    for result in results:
+        assert result.error is None
+        assert [(a.postal_code, a.city) for a in result.addresses] == [("75062", None)]
+
+    hook = HistogramHook()
+    ap.parse_many(texts, country="US", workers=1, hooks=[hook])
+    assert hook.histograms["US"]["scan"].count == 2
+    with pytest.raises(TypeError):
+        ap.parse_many(texts, country="US", tuning={"US": {}})
+
+
+def test_parse_many_wrong_country() -> None:
+    with pytest.raises(e.CountryDetectionMissing):
+        ap.parse_many([US_ADDRESS], country="TheMoon")
+
+
+def test_auto_chunksize() -> None:
+    assert batch._auto_chunksize(0.001, 10_000, 4) == 50
+    assert batch._auto_chunksize(10.0, 10_000, 4) == 1
+    assert batch._auto_chunksize(0.0, 10, 4) == 1
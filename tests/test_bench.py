@@ -0,0 +1,244 @@
+""" Test for the benchmark suite """
+import itertools
+import json
+import pathlib
+
+import pytest
+
+import pyap_beauhurst as pyap
+import pyap_beauhurst.source_GB.data as data_gb
+import pyap_beauhurst.source_US.data as data_us
+from pyap_beauhurst import exceptions as e
+from pyap_beauhurst.bench import __main__ as bench_main
+from pyap_beauhurst.bench import (
+    alternations,
+    components,
+    corpus,
+    differential,
+    street_type,
+    suite,
+)
+from pyap_beauhurst.parser import AddressParser
+
+
+def test_make_documents() -> None:
+    documents = suite.make_documents("GB", 3, 2000, 2.0, seed=1)
+    assert documents == suite.make_documents("GB", 3, 2000, 2.0, seed=1)
+    assert documents != suite.make_documents("GB", 3, 2000, 2.0, seed=2)
+    for document in documents:
+        assert len(document) >= 2000
+        assert sum(document.count(sample) for sample in suite.SAMPLES["GB"]) == 4
+
+
+@pytest.mark.parametrize(
+    ("percent", "expected"), [(50, 5), (95, 10), (99, 10), (10, 1), (0, 1)]
+)
+def test_percentile(percent: float, expected: float) -> None:
+    assert suite.percentile(list(range(10, 0, -1)), percent) == expected
+
+
+def test_compare() -> None:
+    baseline = {"US/size=1000/density=1": {"docs_per_s": 100.0, "p95_ms": 10.0}}
+    assert not suite.compare(
+        baseline, {"US/size=1000/density=1": {"docs_per_s": 95.0, "p95_ms": 10.5}}
+    )
+    regressions = suite.compare(
+        baseline,
+        {
+            "US/size=1000/density=1": {"docs_per_s": 80.0, "p95_ms": 12.0},
+            "GB/size=1000/density=1": {"docs_per_s": 1.0, "p95_ms": 1000.0},
+        },
+        threshold=0.1,
+    )
+    assert regressions == [
+        "US/size=1000/density=1: docs_per_s 100 -> 80 (-20%)",
+        "US/size=1000/density=1: p95_ms 10 -> 12 (+20%)",
+    ]
+
+
+def test_main(tmp_path: pathlib.Path, capsys: pytest.CaptureFixture) -> None:
+    args = ["--country", "US", "--sizes", "500", "--densities", "2", "--docs", "3"]
+    baseline = tmp_path / "baseline.json"
+    assert bench_main.main(args + ["--save", str(baseline)]) == 0
+    results = json.loads(baseline.read_text())
+    result = results["US/size=500/density=2"]
+    assert result["addresses"] == 3
+    assert set(result) >= {"p50_ms", "p95_ms", "p99_ms", "mb_per_s", "scan_ms"}
+
+    # every case is slower than a baseline which is 1000 times faster
+    for result in results.values():
+        result["docs_per_s"] *= 1000
+    baseline.write_text(json.dumps(results))
+    assert bench_main.main(args + ["--baseline", str(baseline)]) == 1
+    assert "regression: US/size=500/density=2: docs_per_s" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("country", corpus.COUNTRIES)
+def test_generate(country: str) -> None:
+    documents = list(itertools.islice(corpus.generate(country, 1, 2.0), 5))
+    assert documents == list(itertools.islice(corpus.generate(country, 1, 2.0), 5))
+    size = sum(len(document.text) for document in documents)
+    spans = sum(len(document.spans) for document in documents)
+    assert abs(spans - size * 2.0 / 1000) <= 2
+    for document in documents:
+        assert len(document.text) >= 2000
+        assert "\x00" not in document.text and "\x01" not in document.text
+
+
+@pytest.mark.parametrize("country", ["US", "CA"])
+def test_generated_addresses_are_found(country: str) -> None:
+    """generated addresses are found by the parser where they were placed"""
+    for document in itertools.islice(corpus.generate(country, 0, 3.0), 10):
+        found = [
+            (parsed.source_start, parsed.source_end)
+            for parsed in pyap.parse(document.text, country=country)
+        ]
+        assert found == document.spans
+
+
+def test_write_corpus(tmp_path: pathlib.Path) -> None:
+    count = corpus.write_corpus(tmp_path, "GB", 10000, seed=2, density=1.0)
+    documents = list(corpus.read_corpus(tmp_path))
+    assert len(documents) == count
+    assert sum(len(text) for _, text in documents) >= 10000
+    truth = list(corpus.read_truth(tmp_path))
+    assert truth
+    for doc, start, end in truth:
+        country, text = documents[doc]
+        assert country == "GB"
+        assert text[start:end].count(",") == 2
+
+
+@pytest.mark.parametrize(
+    ("size", "expected"), [("1000", 1000), ("2K", 2048), ("1.5M", 1572864)]
+)
+def test_parse_size(size: str, expected: int) -> None:
+    assert corpus.parse_size(size) == expected
+
+
+def test_shrink() -> None:
+    text = "first line\nabc X def\nthird Y line\n"
+    assert differential.shrink(text, lambda t: "X" in t and "Y" in t) == "XY"
+
+
+def test_differential_equivalent() -> None:
+    documents = differential.generated_documents("CA", 3) + ["", "no address"]
+    report = differential.run("CA", documents, candidate={"prefilter": True})
+    assert report.documents == 5
+    assert not report.mismatches
+    assert report.speedup > 0
+    assert "equivalent" in str(report)
+
+
+def test_differential_mismatch() -> None:
+    text = "Lorem ipsum\n" * 5 + "1015 South Western Avenue, Chicago, IL 60649\nfin"
+    # a parser out of time finds nothing
+    report = differential.run("US", ["Lorem", text], candidate={"time_budget_ms": 0})
+    (mismatch,) = report.mismatches
+    assert mismatch.document == 1
+    assert mismatch.text == text
+    assert len(mismatch.minimal) < len("1015 South Western Avenue, Chicago, IL")
+    assert len(mismatch.reference) == 1
+    assert mismatch.candidate == []
+
+
+def test_street_type_mismatch(monkeypatch: pytest.MonkeyPatch) -> None:
+    inputs = ["Main Street", "Main St", "Main Avenue"]
+    assert [name for name, *_ in street_type.run(inputs, number=1)] == ["flat", "trie"]
+    monkeypatch.setattr(street_type, "flat_street_type", lambda types: r"\bStreet\b")
+    with pytest.raises(ValueError, match="in 2 inputs: 'Main St', 'Main Avenue'"):
+        street_type.run(inputs)
+    with pytest.raises(SystemExit, match="different matches"):
+        street_type.main([])
+
+
+def test_no_test_modules(
+    tmp_path: pathlib.Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture,
+) -> None:
+    assert len(differential.fixture_documents()) > 100
+    # an installed package has no tests next to it
+    monkeypatch.setattr(street_type, "TESTS", tmp_path)
+    with pytest.raises(SystemExit, match="only in a source checkout"):
+        street_type.main([])
+    with pytest.raises(SystemExit):
+        differential.main(["--country", "US", "--docs", "1"])
+    assert "pass --corpus instead" in capsys.readouterr().err
+    with pytest.raises(SystemExit):
+        alternations.main(["--country", "US", "--docs", "1", "--check"])
+    assert "--check needs them" in capsys.readouterr().err
+
+
+def test_parse_options() -> None:
+    assert differential.parse_options(
+        ["prefilter=false", "backend=regex", "time_budget_ms=2.5", "result_type=none"]
+    ) == {
+        "prefilter": False,
+        "backend": "regex",
+        "time_budget_ms": 2.5,
+        "result_type": None,
+    }
+
+
+def test_compile_component() -> None:
+    # refers to street_number, which is another component
+    pattern = components.compile_component(data_gb.street_name)
+    assert pattern.match("High Street").group("street_name") == "High Street"
+
+
+@pytest.mark.parametrize("prefilter", [True, False])
+def test_profile_components(prefilter: bool) -> None:
+    documents = suite.make_documents("GB", 2, 500, 4.0)
+    profiles = components.profile("GB", documents, prefilter=prefilter)
+    by_name = {p.component: p for p in profiles}
+    assert set(by_name) == set(components.components("GB")) | {"full_address"}
+    assert [p.seconds for p in profiles] == sorted(
+        (p.seconds for p in profiles), reverse=True
+    )
+    assert by_name["postal_code"].successes == 4
+    assert by_name["full_address"].successes >= 4
+    if not prefilter:
+        assert by_name["city"].attempts == sum(
+            len(AddressParser._normalize_string(d)) for d in documents
+        )
+    lines = components.report("GB", profiles)
+    assert len(lines) == len(profiles) + 1
+    assert lines[0].split()[:2] == ["GB", "component"]
+
+
+def test_alternations(tmp_path: pathlib.Path) -> None:
+    documents = suite.make_documents("US", 3, 1000, 5.0)
+    result = alternations.coverage("US", documents)
+    assert result.documents == 3
+    assert result.matches == 15
+    states = result.counts[data_us.state_abbreviations.key]
+    words = result.counts[data_us.states.key]
+    # every match went through a state
+    assert sum(states.values()) + sum(words.values()) == 15
+    assert set(states) | set(words) <= {"texas", "IL", "FL", "WA"}
+    lines = alternations.report(result)
+    assert lines[0] == "US: 3 documents, 15 matches"
+    assert len(lines) == len(result.word_lists) + 1
+
+    path = tmp_path / "profile.json"
+    assert (
+        alternations.main(
+            ["--country", "US", "--docs", "5", "--save", str(path), "--check"]
+        )
+        == 0
+    )
+    tuned = AddressParser(country="US", tuning=str(path))
+    assert tuned.rules is not AddressParser(country="US").rules
+    for document in documents:
+        assert differential.fields(tuned.parse(document)) == differential.fields(
+            AddressParser(country="US").parse(document)
+        )
+
+
+def test_tuning_invalid(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "profile.json"
+    path.write_text("{}")
+    for tuning in (path, tmp_path / "missing.json"):
+        with pytest.raises(e.TuningProfileInvalid):
+            AddressParser(country="US", tuning=tuning)
@@ -0,0 +1,117 @@
+""" Test for capture of parsed documents and their replay """
+import hashlib
+import pathlib
+from typing import Callable
+
+import pytest
+
+import pyap_beauhurst as pyap
+from pyap_beauhurst import capture
+from pyap_beauhurst.bench import replay
+from pyap_beauhurst.parser import AddressParser
+
+
+def test_capture(
+    tmp_path: pathlib.Path, text: str, hooked_parser: Callable[..., AddressParser]
+) -> None:
+    with capture.CaptureHook(tmp_path, sample_rate=1.0) as hook:
+        ap = hooked_parser(hook)
+        ap.parse(text)
+        ap.parse(text + " call +44 20 7946 0958 or mail jo.bloggs@example.co.uk")
+        # an open segment is read as far as it was written
+        written = list(capture.read_segments(tmp_path))
+    captured = list(capture.read_segments(tmp_path))
+    assert written == captured[: len(written)]
+    assert hook.captured == 2
+
+    first, second = captured
+    assert first == capture.CapturedDocument(
+        "US", hashlib.sha256(text.encode()).hexdigest(), text
+    )
+    assert second.text == text + " call " + "0" * 16 + " or mail " + "x" * 23
+    assert second.sha256 != hashlib.sha256(second.text.encode()).hexdigest()
+
+
+def test_capture_sample(
+    tmp_path: pathlib.Path, text: str, hooked_parser: Callable[..., AddressParser]
+) -> None:
+    texts = [text + str(number) for number in range(200)]
+    for run in ("first", "second"):
+        with capture.CaptureHook(tmp_path / run, sample_rate=0.25) as hook:
+            ap = hooked_parser(hook)
+            for document in texts:
+                ap.parse(document)
+    first = list(capture.read_segments(tmp_path / "first"))
+    # the same documents are sampled every time
+    assert first == list(capture.read_segments(tmp_path / "second"))
+    assert 20 < len(first) < 80
+
+
+def test_capture_segments(
+    tmp_path: pathlib.Path, text: str, hooked_parser: Callable[..., AddressParser]
+) -> None:
+    hook = capture.CaptureHook(
+        tmp_path, sample_rate=1.0, redactors=(), segment_documents=2, max_segments=2
+    )
+    ap = hooked_parser(hook)
+    texts = [text + str(number) for number in range(7)]
+    for document in texts:
+        ap.parse(document)
+    hook.close()
+    assert len(list(tmp_path.glob("*" + capture.SEGMENT_SUFFIX))) == 2
+    # the oldest segments are removed
+    assert [document.text for document in capture.read_segments(tmp_path)] == texts[4:]
+
+
+def test_capture_open_segment(
+    tmp_path: pathlib.Path, hooked_parser: Callable[..., AddressParser]
+) -> None:
+    hook = capture.CaptureHook(tmp_path, sample_rate=1.0, redactors=())
+    ap = hooked_parser(hook)
+    # text which doesn't compress well, so some of it is written already
+    texts = [hashlib.sha256(bytes(number)).hexdigest() * 8 for number in range(500)]
+    for text in texts:
+        ap.parse(text)
+    written = [document.text for document in capture.read_segments(tmp_path)]
+    assert 0 < len(written) < len(texts)
+    assert written == texts[: len(written)]
+    hook.close()
+    assert [document.text for document in capture.read_segments(tmp_path)] == texts
+
+
+def test_enable(tmp_path: pathlib.Path, text: str) -> None:
+    hook = capture.enable(tmp_path, sample_rate=1.0)
+    try:
+        pyap.parse(text, country="US")
+        pyap.parse(text, countries=["US", "GB"])
+    finally:
+        capture.disable(hook)
+    assert AddressParser.hooks == []
+    pyap.parse(text + "after", country="US")
+    assert [document.country for document in capture.read_segments(tmp_path)] == [
+        "US",
+        "US,GB",
+    ]
+
+
+def test_replay(
+    tmp_path: pathlib.Path,
+    capsys: pytest.CaptureFixture,
+    text: str,
+    hooked_parser: Callable[..., AddressParser],
+) -> None:
+    with capture.CaptureHook(tmp_path, sample_rate=1.0) as hook:
+        hooked_parser(hook).parse(text)
+        AddressParser(country="GB", hooks=[hook]).parse("32 London Bridge St, SE1 9SG")
+
+    documents = replay.load(tmp_path)
+    assert sorted(documents) == ["GB", "US"]
+    assert list(replay.load(tmp_path, ["US"])) == ["US"]
+    results = replay.replay(documents, repeat=3, backend="regex")
+    assert sorted(results) == ["GB/replay", "US/replay"]
+    assert results["US/replay"]["addresses"] == 6
+
+    baseline = tmp_path / "baseline.json"
+    assert replay.main([str(tmp_path), "--repeat", "2", "--save", str(baseline)]) == 0
+    assert "US/replay" in capsys.readouterr().out
+    assert replay.main([str(tmp_path / "empty")]) == 1
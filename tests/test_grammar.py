@@ -0,0 +1,150 @@
+""" Test for rules building blocks """
+
+import importlib
+import pathlib
+import re
+from typing import List
+
+import pytest
+
+from pyap_beauhurst import grammar, numerals
+from pyap_beauhurst.grammar import Raw, WordList, rename_groups
+
+WORD_LISTS = [
+    numerals.number_words,
+    WordList(["ave", "avenue", "bay", "av", "boulevard"], suffix=r"[\.\s,]{0,2}"),
+    WordList(["allée", "alley", "new york", "new jersey", "nord-est"]),
+    WordList(["NW", "NE", "SW", "SE"], suffix=r"\s", case_sensitive=True),
+    WordList(["street", Raw(r"S[Tt]\.?(?![A-Za-z])"), "square", "sq"]),
+]
+
+TEXTS = [
+    "One Hundred and twenty two ",
+    "FOURTY four ",
+    "Avenue, ",
+    "ave.",
+    "av ",
+    "bAY,,",
+    "ALLÉE",
+    "allÉe",
+    "New  York",
+    "new\nJersey",
+    "New\xa0York",
+    "Nord-Est",
+    "NW ",
+    "nw ",
+    "St. ",
+    "st ",
+    "Stop",
+    "SQ",
+    # Kelvin sign and long s aren't letters k and s
+    "Key",
+    "ſtreet",
+]
+
+
+@pytest.mark.parametrize("word_list", WORD_LISTS)
+def test_word_list(word_list: WordList) -> None:
+    """optimized word list matches same text as the one spelled out"""
+    optimized = re.compile(word_list.regex(optimize=True), re.VERBOSE)
+    spelled = re.compile(word_list.regex(optimize=False), re.VERBOSE)
+    for text in TEXTS:
+        expected = spelled.match(text)
+        found = optimized.match(text)
+        assert (found and found.group()) == (expected and expected.group())
+
+
+def test_word_list_quantifier() -> None:
+    regex = "{words}{{2}}$".format(words=WordList(["one", "two"], suffix=r"\s"))
+    assert re.match(regex, "One TWO ")
+    assert not re.match(regex, "One ")
+
+
+def test_rename_groups() -> None:
+    regex = r"(?P<street>\w+)(?(street)x|y)(?P=street)(?<=a)"
+    assert (
+        rename_groups(regex, "_b")
+        == r"(?P<street_b>\w+)(?(street_b)x|y)(?P=street_b)(?<=a)"
+    )
+
+
+def test_size_report() -> None:
+    for country, before, after in grammar.size_report():
+        assert country in grammar.COUNTRIES
+        assert 0 < after < before
+    # data modules are left rendered with optimizations
+    assert grammar.OPTIMIZE
+    assert "(?ai:" in numerals.number_words.regex()
+
+
+@pytest.mark.parametrize("word_list", WORD_LISTS)
+def test_reorder(word_list: WordList) -> None:
+    """reordered word list matches same text as the original one"""
+    # the least frequent words in the original order are the most frequent
+    counts = {word: index for index, word in enumerate(word_list.words)}
+    words = grammar.reorder(word_list.words, counts, word_list.case_sensitive)
+    assert sorted(words) == sorted(word_list.words)
+    reordered = WordList(words, word_list.suffix, word_list.case_sensitive)
+    for regex in ("{}", r"{}\b", "{}$"):
+        original = re.compile(regex.format(word_list), re.VERBOSE)
+        tuned = re.compile(regex.format(reordered), re.VERBOSE)
+        for text in TEXTS:
+            expected = original.match(text)
+            found = tuned.match(text)
+            assert (found and found.group()) == (expected and expected.group())
+
+
+def test_reorder_order() -> None:
+    words = ["ave", "avenue", "bay", "av", "boulevard", "blvd"]
+    counts = {"bay": 5, "avenue": 9, "blvd": 3}
+    # av is a prefix of ave and avenue, ave of avenue: they keep their order
+    assert grammar.reorder(words, counts) == [
+        "ave",
+        "avenue",
+        "av",
+        "bay",
+        "blvd",
+        "boulevard",
+    ]
+    # raw entries stay in place, words are reordered around them
+    raw = Raw("x")
+    assert grammar.reorder(["b", "a", raw, "d", "c"], {"a": 1, "c": 1}) == [
+        "a",
+        "b",
+        raw,
+        "c",
+        "d",
+    ]
+    # only the same case is a prefix of case sensitive words
+    assert grammar.reorder(["NE", "N"], {"N": 1}, case_sensitive=True) == ["NE", "N"]
+    assert grammar.reorder(["ne", "N"], {"N": 1}, case_sensitive=True) == ["N", "ne"]
+
+
+def test_render() -> None:
+    data = importlib.import_module("pyap_beauhurst.source_US.data")
+    assert grammar.render("US").full_address == data.full_address
+
+    profiled: List[WordList] = []
+    rendered = grammar.render("US", profiled=profiled)
+    states = [word_list.key for word_list in profiled].index(data.states.key)
+    pattern = re.compile(rendered.full_address, re.VERBOSE)
+    match = pattern.search("225 E. John Carpenter Freeway, Irving, Texas 75062")
+    index = data.states.words.index("texas")
+    assert match.group("_alt{}_{}".format(states, index)) == "Texas"
+
+    counts = {data.states.key: {"texas": 1}}
+    assert "(?ai:(?:te(?:xas|nnessee)|" in grammar.render("US", counts).region1
+    # the imported module is left alone
+    assert "(?ai:texas" not in data.full_address
+    with pytest.raises(ImportError):
+        grammar.render("THEMOON")
+
+
+def test_counts(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "profile.json"
+    grammar.save_counts(path, {"US": {"abc": {"texas": 2}}})
+    assert grammar.load_counts(path, "US") == {"abc": {"texas": 2}}
+    assert grammar.load_counts(path, "GB") is None
+    path.write_text("[]")
+    with pytest.raises(ValueError):
+        grammar.load_counts(path, "US")
@@ -0,0 +1,132 @@
+""" Test for parser hooks """
+import io
+from typing import Callable, List
+
+import pytest
+
+from pyap_beauhurst import hooks, parser
+from pyap_beauhurst.parser import AddressParser
+
+
+class Recorder(hooks.Hook):
+    def __init__(self) -> None:
+        self.calls: List[hooks.ParseStats] = []
+
+    def on_parse(self, stats: hooks.ParseStats) -> None:
+        self.calls.append(stats)
+
+
+def test_hook(text: str, hooked_parser: Callable[..., AddressParser]) -> None:
+    recorder = Recorder()
+    ap = hooked_parser(recorder)
+    addresses = ap.parse(text)
+    assert addresses == AddressParser(country="US").parse(text)
+
+    (stats,) = recorder.calls
+    assert stats.country == "US"
+    assert stats.characters == len(text)
+    assert stats.bytes == len(text)
+    assert stats.matches == 2
+    assert stats.addresses == len(addresses) == 2
+    assert not stats.truncated
+    for stage in hooks.STAGES:
+        assert getattr(stats, stage) > 0
+    assert stats.total == pytest.approx(sum(stats[-4:]))
+
+    ap.parse("ü")
+    assert recorder.calls[-1].bytes == 2
+    assert recorder.calls[-1].matches == 0
+
+
+def test_hook_partial(text: str, hooked_parser: Callable[..., AddressParser]) -> None:
+    recorder = Recorder()
+    ap = hooked_parser(recorder)
+    assert len(list(ap.iparse(text, max_results=1))) == 1
+    assert recorder.calls[-1].matches == 1
+
+    # a hook is called when parsing is abandoned too
+    next(ap.iparse(text))
+    assert len(recorder.calls) == 2
+
+
+def test_hook_truncated(text: str, hooked_parser: Callable[..., AddressParser]) -> None:
+    recorder = Recorder()
+    ap = hooked_parser(recorder, time_budget_ms=0)
+    assert ap.parse(text).truncated
+    assert recorder.calls[-1].truncated
+
+
+def test_hook_countries(text: str, hooked_parser: Callable[..., AddressParser]) -> None:
+    recorder = Recorder()
+    ap = hooked_parser(recorder, countries=["US", "GB"])
+    document = text + " 32 London Bridge St, London SE1 9SG"
+    assert ap.parse(document) == AddressParser(countries=["US", "GB"]).parse(document)
+    assert recorder.calls[-1].country == "US,GB"
+    assert recorder.calls[-1].addresses == 3
+
+
+def test_hook_stream(text: str, hooked_parser: Callable[..., AddressParser]) -> None:
+    recorder = Recorder()
+    documents: List[str] = []
+
+    class Documents(hooks.Hook):
+        def on_document(self, text: str, stats: hooks.ParseStats) -> None:
+            documents.append(text)
+
+    ap = hooked_parser(recorder, Documents(), countries=["US", "GB"])
+    document = text + " 32 London Bridge St, London SE1 9SG ü"
+    addresses = list(ap.parse_stream(io.StringIO(document), chunk_size=16))
+    assert addresses == list(AddressParser(countries=["US", "GB"]).parse(document))
+
+    # the stream is a single document, whose text isn't kept
+    (stats,) = recorder.calls
+    assert documents == []
+    assert stats.country == "US,GB"
+    assert stats.characters == len(document)
+    assert stats.bytes == len(document) + 1
+    assert stats.matches == stats.addresses == 3
+    assert stats.country_addresses == (("US", 2), ("GB", 1))
+    assert not stats.truncated
+    for stage in hooks.STAGES:
+        assert getattr(stats, stage) > 0
+
+
+def test_no_hooks(monkeypatch: pytest.MonkeyPatch, text: str) -> None:
+    """stages aren't measured without hooks"""
+    ap = AddressParser(country="US")
+    monkeypatch.setattr(
+        AddressParser, "_iparse_measured", lambda *args: pytest.fail("measured")
+    )
+    assert len(ap.parse(text)) == 2
+    # hooks of parsers are separate lists
+    AddressParser(country="US", hooks=[Recorder()])
+    assert parser.AddressParser.hooks == []
+    ap.hooks.append(Recorder())
+    assert AddressParser(country="US").hooks == []
+
+
+def test_histogram() -> None:
+    histogram = hooks.Histogram([1, 2, 5])
+    assert histogram.quantile(0.5) is None
+    for value in (0.5, 1, 1.5, 3, 10):
+        histogram.observe(value)
+    assert histogram.counts == [2, 1, 1, 1]
+    assert histogram.count == 5
+    assert histogram.sum == 16
+    assert histogram.quantile(0.4) == 1
+    assert histogram.quantile(0.5) == 2
+    assert histogram.quantile(0.99) == float("inf")
+
+
+def test_histogram_hook(text: str, hooked_parser: Callable[..., AddressParser]) -> None:
+    hook = hooks.HistogramHook()
+    ap = hooked_parser(hook)
+    for _ in range(3):
+        ap.parse(text)
+    histograms = hook.histograms["US"]
+    assert histograms["scan"].count == 3
+    assert histograms["total"].sum >= histograms["scan"].sum
+    assert histograms["matches"].sum == 6
+    assert histograms["bytes"].quantile(0.5) == 256
+    assert len(hook.summary()) == len(histograms)
+    assert hook.summary()[0].startswith("US normalize: count=3 ")
@@ -0,0 +1,139 @@
+""" Test for metrics registry """
+import threading
+from typing import Callable, Iterator
+
+import pytest
+
+import pyap_beauhurst as pyap
+from pyap_beauhurst import hooks, metrics
+from pyap_beauhurst.parser import AddressParser
+
+
+@pytest.fixture
+def registry() -> Iterator[metrics.MetricsRegistry]:
+    registry = metrics.MetricsRegistry()
+    yield registry
+    metrics.disable(registry)
+
+
+def test_registry(
+    registry: metrics.MetricsRegistry,
+    text: str,
+    hooked_parser: Callable[..., AddressParser],
+) -> None:
+    ap = hooked_parser(registry)
+    for _ in range(3):
+        ap.parse(text)
+    hooked_parser(registry, time_budget_ms=0).parse(text)
+
+    values = registry.as_dict()["US"]
+    assert values["documents_total"] == 4
+    assert values["bytes_total"] == 4 * len(text)
+    assert values["matches_total"] == 6
+    assert values["addresses_total"] == 6
+    assert values["truncated_total"] == 1
+    parse_seconds = values["parse_seconds"]
+    assert parse_seconds["count"] == 4
+    assert parse_seconds["sum"] >= values["scan_seconds"]["sum"] > 0
+    buckets = list(parse_seconds["buckets"].values())
+    assert buckets == sorted(buckets)
+    assert parse_seconds["buckets"]["+Inf"] == 4
+
+    registry.reset()
+    assert registry.as_dict() == {}
+
+
+def test_prometheus(
+    registry: metrics.MetricsRegistry,
+    text: str,
+    hooked_parser: Callable[..., AddressParser],
+) -> None:
+    assert registry.to_prometheus().count("# TYPE ") == len(metrics.COUNTERS) + len(
+        metrics.HISTOGRAMS
+    )
+    hooked_parser(registry).parse(text)
+    AddressParser(country="GB", hooks=[registry]).parse("no address")
+
+    lines = registry.to_prometheus().splitlines()
+    assert "# TYPE pyap_documents_total counter" in lines
+    assert "# TYPE pyap_parse_seconds histogram" in lines
+    assert 'pyap_addresses_total{country="US"} 2' in lines
+    assert 'pyap_addresses_total{country="GB"} 0' in lines
+    assert 'pyap_bytes_total{country="GB"} 10' in lines
+    assert 'pyap_scan_seconds_bucket{country="US",le="+Inf"} 1' in lines
+    assert 'pyap_scan_seconds_count{country="US"} 1' in lines
+    assert 'pyap_parse_seconds_bucket{country="US",le="10"} 1' in lines
+    # every sample is a name with labels and a number
+    for line in lines:
+        if not line.startswith("#"):
+            name, value = line.split("} ")
+            assert name.startswith("pyap_") and "{country=" in name
+            float(value)
+
+
+def test_countries(
+    registry: metrics.MetricsRegistry,
+    text: str,
+    hooked_parser: Callable[..., AddressParser],
+) -> None:
+    ap = hooked_parser(registry, countries=["US", "CA", "GB"])
+    ap.parse(text + " 32 London Bridge St, London SE1 9SG")
+    ap.parse("no address")
+
+    values = registry.as_dict()
+    # documents are counted under the parser, addresses by their country
+    assert values["US,CA,GB"]["documents_total"] == 2
+    assert values["US,CA,GB"]["parse_seconds"]["count"] == 2
+    assert values["US,CA,GB"]["addresses_total"] == 0
+    assert values["US"]["addresses_total"] == 2
+    assert values["GB"]["addresses_total"] == 1
+    assert values["US"]["documents_total"] == 0
+    assert "CA" not in values
+    lines = registry.to_prometheus().splitlines()
+    assert 'pyap_addresses_total{country="GB"} 1' in lines
+    assert 'pyap_documents_total{country="US,CA,GB"} 2' in lines
+
+
+def test_enable(
+    registry: metrics.MetricsRegistry,
+    text: str,
+    hooked_parser: Callable[..., AddressParser],
+) -> None:
+    assert metrics.enable(registry) is registry
+    metrics.enable(registry)
+    assert AddressParser.hooks == [registry]
+
+    pyap.parse(text, country="US")
+    # hooks of the class are called along with ones of the parser
+    recorder = hooks.HistogramHook()
+    hooked_parser(recorder).parse(text)
+    assert registry.as_dict()["US"]["documents_total"] == 2
+    assert recorder.histograms["US"]["scan"].count == 1
+
+    metrics.disable(registry)
+    assert AddressParser.hooks == []
+    pyap.parse(text, country="US")
+    assert registry.as_dict()["US"]["documents_total"] == 2
+
+
+def test_threads(
+    registry: metrics.MetricsRegistry,
+    text: str,
+    hooked_parser: Callable[..., AddressParser],
+) -> None:
+    ap = hooked_parser(registry)
+
+    def parse() -> None:
+        for _ in range(50):
+            ap.parse(text)
+
+    threads = [threading.Thread(target=parse) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    values = registry.as_dict()["US"]
+    assert values["documents_total"] == 400
+    assert values["addresses_total"] == 800
+    assert values["parse_seconds"]["count"] == 400
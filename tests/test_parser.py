@@ -1,9 +1,16 @@
 """ Test for parser classes """
 
+import io
+import random
+import re
+import subprocess
+import sys
+from typing import List, Tuple
+
 import pytest
 
 import pyap_beauhurst as ap
-from pyap_beauhurst import address, exceptions as e, parser
+from pyap_beauhurst import address, exceptions as e, hooks, parser, utils
 
 
 def test_api_parse() -> None:
@@ -50,6 +57,8 @@ def test_address_class_init() -> None:
         "street_name": None,
         "street_number": None,
         "street_type": None,
+        "source_start": None,
+        "source_end": None,
     }
 
     assert str(addr) == "Street 1b CityVille USA"
@@ -74,6 +83,47 @@ def test_normalize_string() -> None:
     assert address_parser._normalize_string(raw_string) == clean_string
 
 
+def _legacy_normalize_string(text: str) -> str:
+    """Normalization as it used to be done: one re.sub per pattern"""
+    conversion = {
+        r"\r*(\n\r*)+": ", ",
+        r"\s*(\,\s*)+": ", ",
+        r"\s+": " ",
+        "‐": "-",
+        "‑": "-",
+        "‒": "-",
+        "–": "-",
+        "—": "-",
+        "―": "-",
+    }
+    for find, replace in conversion.items():
+        text = re.sub(find, replace, text, flags=re.UNICODE)
+    return text
+
+
+def test_normalize_string_matches_legacy() -> None:
+    alphabet = ["a", "B", " ", " ", ",", ";", "\n", "\r", "\t", "\x0b", "\x1c"]
+    alphabet += ["\x85", "\xa0", "\u3000", "‐", "—", "-"]
+    rnd = random.Random(0)
+    for _ in range(5000):
+        text = "".join(rnd.choice(alphabet) for _ in range(rnd.randint(0, 24)))
+        assert parser.AddressParser._normalize_string(text) == _legacy_normalize_string(
+            text
+        )
+
+
+def test_prenormalized() -> None:
+    test_address = "225 E. John Carpenter Freeway,\n Suite 1500 Irving, Texas 75062"
+    clean_text = parser.AddressParser._normalize_string(test_address)
+    address_parser = parser.AddressParser(country="US", prenormalized=True)
+    addresses = address_parser.parse(clean_text)
+    assert [a.full_address for a in addresses] == [
+        a.full_address for a in ap.parse(test_address, country="US")
+    ]
+    assert addresses[0].source_end == len(clean_text)
+    assert address_parser.clean_text is clean_text
+
+
 def test_combine_results() -> None:
     address_parser = parser.AddressParser(country="US")
     raw_dict = {"test_one": None, "test_one_a": 1, "test_two": None, "test_two_b": "2"}
@@ -100,3 +150,372 @@ def test_parse_address() -> None:
         addresses[0].full_address
         == "225 E. John Carpenter Freeway, Suite 1500 Irving, Texas 75062"
     )
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 4096])
+def test_parse_stream(chunk_size: int) -> None:
+    address_parser = parser.AddressParser(country="US")
+    test_text = (
+        "xxx 225 E. John Carpenter Freeway,\n\n Suite 1500 Irving, Texas 75062 xxx "
+        + " ,,  \t lorem ipsum \n" * 50
+        + "1500 Westlake Avenue North Suite 108 Seattle, WA 98109 \n\n\n"
+        + "xxx 225 E. John Carpenter Freeway, Suite 1500 Irving, Texas 75062"
+    )
+    addresses = list(
+        address_parser.parse_stream(io.StringIO(test_text), chunk_size=chunk_size)
+    )
+    assert len(addresses) == 3
+    assert addresses == address_parser.parse(test_text)
+
+
+def test_max_match_length() -> None:
+    assert utils.max_match_length(r"\d{1,5}\s(?=[A-Z]{2})") == 8
+    assert utils.max_match_length(r"(?<=x)\d+", unbounded=10) == 10
+    assert parser.AddressParser(country="GB").max_length > 0
+
+
+def test_compile_runs() -> None:
+    runs, weight = utils.compile_runs(r"[a-c]\d+(?=x(?i:[a-z]*))", unbounded=3)
+    # digits are read again by the lookahead
+    assert weight == 2
+    assert runs is not None
+    assert [run.group() for run in runs.finditer("1234 12 abcd A1B2C3 x")] == [
+        "1234",
+        "abcd",
+        "A1B2C3",
+    ]
+    assert utils.compile_runs(r"\d{1,5}") == (None, 1)
+
+
+def test_iparse() -> None:
+    address_parser = parser.AddressParser(country="US")
+    test_address = "225 E. John Carpenter Freeway, Suite 1500 Irving, Texas 75062"
+    test_text = " xxx ".join([test_address] * 3)
+
+    addresses = address_parser.iparse(test_text)
+    assert not isinstance(addresses, list)
+    assert list(addresses) == address_parser.parse(test_text)
+
+    first = list(address_parser.iparse(test_text, max_results=1))
+    assert [str(a) for a in first] == [test_address]
+    assert first[0].match_end == len(test_address)
+    assert not list(address_parser.iparse(test_text, max_results=0))
+
+
+def test_slots_address_matches_pydantic() -> None:
+    fields = {
+        "state": "USA ",
+        "city": "CityVille, ",
+        "street": " Street 1b ",
+        "full_address": "Street 1b CityVille USA",
+        "match_start": 0,
+        "match_end": 23,
+        "not_an_address_field": "ignored",
+    }
+    slots_addr = address.SlotsAddress(**fields)
+    assert slots_addr.dict() == address.Address(**fields).dict()
+    assert slots_addr.model_dump()["match_start"] is None
+    assert str(slots_addr) == "Street 1b CityVille USA"
+    with pytest.raises(TypeError):
+        address.SlotsAddress(city="CityVille")
+
+
+def test_result_type() -> None:
+    test_address = "225 E. John Carpenter Freeway, Suite 1500 Irving, Texas 75062"
+    addresses = ap.parse(test_address, country="US", result_type="slots")
+    assert isinstance(addresses[0], address.SlotsAddress)
+    assert addresses[0].dict() == ap.parse(test_address, country="US")[0].dict()
+
+    with pytest.raises(e.ResultTypeMissing):
+        parser.AddressParser(country="US", result_type="namedtuple")
+
+
+def test_parse_without_pydantic() -> None:
+    code = (
+        "import sys; sys.modules['pydantic'] = None\n"
+        "import pyap_beauhurst as ap\n"
+        "from pyap_beauhurst import address\n"
+        "assert not address.HAS_PYDANTIC\n"
+        "found = ap.parse('71 Wilson Avenue Rochester Kent ME1 2SJ', country='GB')\n"
+        "assert isinstance(found[0], address.SlotsAddress)\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_source_offsets() -> None:
+    test_address = "225 E. John Carpenter Freeway,\n\n  Suite 1500 Irving,\tTexas 75062"
+    test_text = "xxx\r\n\n " + test_address + " ,, \n xxx  " + test_address
+    addresses = ap.parse(test_text, country="US")
+    assert len(addresses) == 2
+    for found in addresses:
+        assert found.source_start is not None and found.source_end is not None
+        assert test_text[found.source_start : found.source_end] == test_address
+
+
+def test_offset_map() -> None:
+    clean_text, offset_map = parser.AddressParser._normalize_with_offsets(
+        "a \n\n b\nc,d"
+    )
+    assert clean_text == "a, b, c, d"
+    assert len(offset_map) == 6
+    # content characters map exactly, separators to their replaced run
+    source = [offset_map.to_source(i) for i in range(len(clean_text))]
+    assert source == [0, 1, 2, 5, 6, 7, 7, 8, 9, 9]
+
+
+def test_interleaved_documents() -> None:
+    test_address = "225 E. John Carpenter Freeway, Suite 1500 Irving, Texas 75062"
+    # separators collapsed by normalization shift source offsets
+    texts = [
+        "lorem,\n\n\n  ".join([test_address] * 3),
+        " ".join([test_address] * 3),
+    ]
+    address_parser = parser.AddressParser(country="US")
+    expected = [
+        [(a.source_start, a.source_end) for a in address_parser.iparse(text)]
+        for text in texts
+    ]
+    for hooks in ([], [parser.h.Hook()]):
+        address_parser = parser.AddressParser(country="US", hooks=hooks)
+        first, second = (address_parser.iparse(text) for text in texts)
+        # addresses of both documents in turns
+        spans = [
+            [(found.source_start, found.source_end) for found in pair]
+            for pair in zip(first, second)
+        ]
+        assert [list(document) for document in zip(*spans)] == expected
+
+
+@pytest.mark.parametrize(
+    "country,test_address",
+    [
+        ("US", "225 E. John Carpenter Freeway, Suite 1500 Irving, Texas 75062"),
+        ("US", "1500 Westlake Avenue North Suite 108 Seattle, WA 98109"),
+        ("CA", "1111 West Hastings Street, Vancouver, BC V6E 2J3"),
+        ("CA", "3000 Steeles Avenue East, Suite 700 Markham, Ontario Canada"),
+        ("GB", "10 Downing Street, London SW1A 2AA"),
+        ("GB", "Flat 2, 32 High Street, Manchester M1 1AE"),
+    ],
+)
+def test_prefilter(country: str, test_address: str) -> None:
+    rnd = random.Random(country + test_address)
+    words = test_address.replace(",", "").split() + ["lorem", "ipsum", "12"]
+    seps = [" ", " ", ", ", "\n", " - "]
+    texts = ["lorem ipsum " * 500 + test_address + " lorem ipsum" * 500]
+    for _ in range(20):
+        texts.append(
+            "".join(rnd.choice(words) + rnd.choice(seps) for _ in range(60))
+            + rnd.choice(seps).join([test_address] * rnd.randint(1, 3))
+        )
+    with_prefilter = parser.AddressParser(country=country)
+    without_prefilter = parser.AddressParser(country=country, prefilter=False)
+    for text in texts:
+        expected = without_prefilter.parse(text)
+        assert with_prefilter.parse(text) == expected
+        assert list(with_prefilter.parse_stream(io.StringIO(text), 97)) == expected
+    assert with_prefilter.parse(texts[0])[0].full_address == test_address
+
+
+LONG_RUNS = [
+    (
+        "Call us at 123 Main Street P.O. Box " + "1" * 600 + ", Springfield, CA 90210",
+        (11, 659),
+    ),
+    ("Call 12 Main Street (Route " + "A" * 700 + ") Springfield, CA 90210", (5, 750)),
+]
+
+
+@pytest.mark.parametrize("test_text,span", LONG_RUNS)
+def test_prefilter_long_runs(test_text: str, span: Tuple[int, int]) -> None:
+    # unbounded repeats of the rules take runs longer than max_length
+    addresses = parser.AddressParser(country="US").parse(test_text)
+    assert [(found.match_start, found.match_end) for found in addresses] == [span]
+    without_prefilter = parser.AddressParser(country="US", prefilter=False)
+    assert addresses == without_prefilter.parse(test_text)
+    assert (
+        addresses
+        == ap.parse(" lorem ipsum ".join([test_text] * 3), countries=["US", "GB"])[:1]
+    )
+
+
+@pytest.mark.parametrize("test_text,span", LONG_RUNS)
+@pytest.mark.parametrize("prefilter", [True, False])
+def test_parse_stream_long_runs(
+    test_text: str, span: Tuple[int, int], prefilter: bool
+) -> None:
+    address_parser = parser.AddressParser(country="US", prefilter=prefilter)
+    # longer than the text kept between chunks without runs
+    assert span[1] - span[0] > address_parser.max_length
+    for chunk_size in (7, 64, 4096):
+        addresses = list(
+            address_parser.parse_stream(io.StringIO(test_text), chunk_size)
+        )
+        assert [(found.match_start, found.match_end) for found in addresses] == [span]
+
+
+def test_compile_anchor() -> None:
+    regex = r"(?:AL|AK|[Aa][Ll][Aa][Bb][Aa][Mm][Aa])|(?:A[Ll][Aa][Ss][Kk][Aa]|\d+)"
+    anchor = utils.compile_anchor(regex)
+    plain = re.compile(regex, utils.DEFAULT_FLAGS)
+    text = "ALABAMA Alaska AL, AK 35004 alabama ALaska ala"
+    expected = [i for i in range(len(text) + 1) if plain.match(text, i)]
+    assert [found.start() for found in anchor.finditer(text)] == expected
+
+
+def test_countries() -> None:
+    test_text = (
+        "Offices: 225 E. John Carpenter Freeway, Suite 1500 Irving, Texas 75062, "
+        "at 1111 West Hastings Street, Vancouver, BC V6E 2J3 and at 10 Downing "
+        "Street, London SW1A 2AA. Also 3000 Steeles Avenue East, Suite 700 "
+        "Markham, Ontario Canada"
+    )
+    address_parser = parser.AddressParser(countries=["us", "CA", "GB", "US"])
+    assert address_parser.countries == ["US", "CA", "GB"]
+    addresses = address_parser.parse(test_text)
+    assert [(a.country_id, a.full_address) for a in addresses] == [
+        ("US", "225 E. John Carpenter Freeway, Suite 1500 Irving, Texas 75062"),
+        ("CA", "1111 West Hastings Street, Vancouver, BC V6E 2J3"),
+        ("GB", "10 Downing Street, London SW1A 2AA"),
+        ("CA", "3000 Steeles Avenue East, Suite 700 Markham, Ontario Canada"),
+    ]
+    # on its own CA finds an address overlapping the US one
+    assert len(ap.parse(test_text, country="CA")) == 2
+    assert list(address_parser.parse_stream(io.StringIO(test_text), 50)) == addresses
+
+
+def test_countries_missing() -> None:
+    with pytest.raises(e.CountryDetectionMissing):
+        parser.AddressParser(countries=["US", "XX"])
+    with pytest.raises(e.NoCountrySelected):
+        parser.AddressParser(countries=[])
+
+
+@pytest.mark.parametrize(
+    "country, text",
+    [
+        ("US", "Offices: 225 E. John Carpenter Freeway, Suite 1500 Irving, TX 75062"),
+        (
+            "CA",
+            "20 Fleeceline Road, Toronto, Ontario M8V 2K3 and 2600 Rue Paul, H3Z 2Y5",
+        ),
+        ("GB", "Flat 2, 32 High Street, Manchester M1 1AE, UK"),
+    ],
+)
+def test_fields(country: str, text: str) -> None:
+    wanted = ["postal_code", "region1"]
+    address_parser = parser.AddressParser(country=country, fields=wanted)
+    assert address_parser.fields == ("full_address", "postal_code", "region1")
+    # other groups don't capture, apart from ones conditionals refer to
+    assert set(address_parser.rules.groupindex) - set(address_parser._extra_groups) <= {
+        "full_address",
+        "postal_code",
+        "postal_code_b",
+        "postal_code_c",
+        "region1",
+    }
+
+    expected = ap.parse(text, country=country)
+    assert expected
+    found = address_parser.parse(text)
+    kept = wanted + ["full_address", "country_id", "match_start", "match_end"]
+    kept += ["source_start", "source_end"]
+    assert [{f: getattr(a, f) for f in kept} for a in found] == [
+        {f: getattr(a, f) for f in kept} for a in expected
+    ]
+    for parsed in found:
+        assert parsed.city is None
+        assert parsed.street_number is None
+    assert any(parsed.postal_code for parsed in found)
+
+
+def test_fields_unknown() -> None:
+    with pytest.raises(e.FieldMissing):
+        parser.AddressParser(country="US", fields=["postal_code", "zip"])
+
+
+def test_capture_only() -> None:
+    regex = r"(?P<a>x)(?P<b>y)(?P<a_b>z)(?(b)1|2)(?P<full_address>w)"
+    assert (
+        utils.capture_only(regex, ["a"]) == r"(?P<a>x)(?P<b>y)(?P<a_b>z)(?(b)1|2)(?:w)"
+    )
+    assert utils.capture_only(regex, []) == r"(?:x)(?P<b>y)(?:z)(?(b)1|2)(?:w)"
+    assert utils.group_field("postal_code_b") == "postal_code"
+    assert utils.group_field("building_id") == "building_id"
+
+
+@pytest.mark.parametrize("prefilter", [True, False])
+def test_time_budget(monkeypatch: pytest.MonkeyPatch, prefilter: bool) -> None:
+    # small blocks, so that matches cross block boundaries
+    monkeypatch.setattr(parser, "_BUDGET_BLOCK", 40)
+    test_text = " lorem ipsum ".join(
+        [
+            "225 E. John Carpenter Freeway, Suite 1500 Irving, Texas 75062",
+            "1111 West Hastings Street, Vancouver, BC V6E 2J3",
+            "10 Downing Street, London SW1A 2AA",
+        ]
+        * 4
+    )
+    for options in [{"country": "US"}, {"countries": ["US", "CA", "GB"]}]:
+        expected = parser.AddressParser(prefilter=prefilter, **options).parse(test_text)
+        address_parser = parser.AddressParser(
+            prefilter=prefilter, time_budget_ms=60000, **options
+        )
+        addresses = address_parser.parse(test_text)
+        assert addresses == expected
+        assert not addresses.truncated
+        assert list(address_parser.parse_stream(io.StringIO(test_text), 97)) == expected
+        assert not address_parser.truncated
+
+
+@pytest.mark.parametrize("test_text,span", LONG_RUNS)
+def test_time_budget_long_runs(
+    monkeypatch: pytest.MonkeyPatch, test_text: str, span: Tuple[int, int]
+) -> None:
+    monkeypatch.setattr(parser, "_BUDGET_BLOCK", 40)
+    for prefilter in (True, False):
+        address_parser = parser.AddressParser(
+            country="US", prefilter=prefilter, time_budget_ms=60000
+        )
+        addresses = address_parser.parse(test_text)
+        assert [(found.match_start, found.match_end) for found in addresses] == [span]
+        assert not addresses.truncated
+
+
+def test_time_budget_exhausted(monkeypatch: pytest.MonkeyPatch) -> None:
+    test_text = "225 E. John Carpenter Freeway, Suite 1500 Irving, Texas 75062 " * 50
+    monkeypatch.setattr(parser, "_BUDGET_BLOCK", 40)
+    address_parser = parser.AddressParser(country="US", time_budget_ms=10)
+    clock = iter(range(10**6))
+    # every reading of the clock is a millisecond later
+    monkeypatch.setattr(parser.time, "monotonic", lambda: next(clock) / 1000)
+    addresses = address_parser.parse(test_text)
+    assert addresses.truncated
+    assert 0 < len(addresses) < 50
+    assert addresses == ap.parse(test_text, country="US")[: len(addresses)]
+    assert not ap.parse(test_text, country="US").truncated
+
+
+def test_time_budget_interleaved(monkeypatch: pytest.MonkeyPatch) -> None:
+    test_address = "225 E. John Carpenter Freeway, Suite 1500 Irving, Texas 75062 "
+    monkeypatch.setattr(parser, "_BUDGET_BLOCK", 40)
+    monkeypatch.setattr(parser.time, "monotonic", lambda: 0.0)
+    truncated: List[bool] = []
+
+    class Recorder(hooks.Hook):
+        def on_parse(self, stats: hooks.ParseStats) -> None:
+            truncated.append(stats.truncated)
+
+    address_parser = parser.AddressParser(
+        country="US", time_budget_ms=10, hooks=[Recorder()]
+    )
+    short = address_parser.iparse(test_address * 2)
+    next(short)
+    # a document runs out of time while another one is being parsed, every
+    # reading of the clock is a millisecond later
+    clock = iter(range(10**6))
+    monkeypatch.setattr(parser.time, "monotonic", lambda: next(clock) / 1000)
+    assert address_parser.parse(test_address * 50).truncated
+    monkeypatch.setattr(parser.time, "monotonic", lambda: 0.0)
+    assert len(list(short)) == 1
+    assert truncated == [True, False]
+    assert not address_parser.truncated
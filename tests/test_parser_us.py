@@ -1,8 +1,11 @@
 """ Test for USA address parser """
 
+import re
+
 import pytest
 
 import pyap_beauhurst.source_US.data as data_us
+from pyap_beauhurst.bench import street_type
 from test_utils import execute_matching_test
 
 
@@ -198,6 +201,17 @@ def test_street_type(input_data: str, is_match_expected: bool) -> None:
     execute_matching_test(input_data, is_match_expected, data_us.street_type)
 
 
+def test_street_type_trie() -> None:
+    """trie of street types matches same as one branch per street type"""
+    inputs = street_type.load_inputs()
+    trie = re.compile(data_us.street_type_list_to_regex(data_us.street_type_list))
+    flat = re.compile(street_type.flat_street_type(data_us.street_type_list))
+    for text in inputs + [s.upper() for s in inputs]:
+        assert [m.span() for m in trie.finditer(text)] == [
+            m.span() for m in flat.finditer(text)
+        ]
+
+
 @pytest.mark.parametrize(
     ("input_data", "is_match_expected"),
     [
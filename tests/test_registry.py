@@ -0,0 +1,72 @@
+""" Test for compiled rules registry """
+
+import importlib
+import pathlib
+import re
+
+import pytest
+
+from pyap_beauhurst import grammar, parser, registry
+
+
+@pytest.mark.parametrize("country", ["US", "CA", "GB"])
+def test_rules_are_compiled(country: str) -> None:
+    rules = registry.get_rules(country)
+    assert rules.country == country
+    assert isinstance(rules.pattern, re.Pattern)
+
+
+def test_rules_are_reused() -> None:
+    rules_registry = registry.RulesRegistry()
+    first = rules_registry.get("US")
+    second = rules_registry.get("US")
+    assert first is second
+    assert rules_registry.stats() == {"hits": 1, "misses": 1, "size": 1}
+
+    rules_registry.clear()
+    assert rules_registry.stats() == {"hits": 0, "misses": 0, "size": 0}
+
+
+def test_parsers_share_rules() -> None:
+    first = parser.AddressParser(country="US")
+    second = parser.AddressParser(country="us")
+    assert first.rules is second.rules
+
+
+def test_missing_rules_are_not_cached() -> None:
+    rules_registry = registry.RulesRegistry()
+    with pytest.raises(ImportError):
+        rules_registry.get("THEMOON")
+    assert rules_registry.stats()["size"] == 0
+
+
+def test_tuned_rules_are_cached_apart(tmp_path: pathlib.Path) -> None:
+    data = importlib.import_module("pyap_beauhurst.source_US.data")
+    path = tmp_path / "profile.json"
+    grammar.save_counts(path, {"US": {data.states.key: {"texas": 5}}})
+    rules_registry = registry.RulesRegistry()
+    stock = rules_registry.get("US")
+    tuned = rules_registry.get("US", tuning=str(path))
+    assert tuned is rules_registry.get("US", tuning=str(path))
+    assert tuned.pattern is not stock.pattern
+    assert "(?ai:(?:te(?:xas|" in tuned.pattern.pattern
+    assert rules_registry.stats() == {"hits": 1, "misses": 2, "size": 2}
+    # a profile without the country gives stock rules
+    assert rules_registry.get("GB", tuning=str(path)).pattern.pattern == (
+        rules_registry.get("GB").pattern.pattern
+    )
+
+
+def test_rules_are_cached_by_fields() -> None:
+    rules_registry = registry.RulesRegistry()
+    stock = rules_registry.get("CA")
+    narrow = rules_registry.get("CA", fields=("full_address", "postal_code"))
+    assert narrow is rules_registry.get("CA", fields=("full_address", "postal_code"))
+    assert narrow is not stock
+    assert sorted(narrow.pattern.groupindex) == [
+        "full_address",
+        "postal_code",
+        "postal_code_b",
+        "postal_code_c",
+    ]
+    assert narrow.max_length == stock.max_length
@@ -0,0 +1,86 @@
+""" Test that parse time grows linearly with size of adversarial inputs
+
+Timings take a while and depend on the machine, so these tests only run
+when asked for with `pytest -m slow`.
+"""
+import math
+import os
+import re
+import timeit
+from typing import Callable, Dict, Sequence
+
+import pytest
+
+from pyap_beauhurst.parser import AddressParser
+
+pytestmark = pytest.mark.slow
+
+SIZES = (1000, 2000, 4000, 8000)
+# parse time is fitted to c * size ** exponent, linear growth is 1 and
+# quadratic is 2, there is some slack for noise of timings
+MAX_EXPONENT = float(os.environ.get("PYAP_MAX_SCALING_EXPONENT", "1.5"))
+
+
+def _repeat(unit: str) -> Callable[[int], str]:
+    return lambda size: (unit * (size // len(unit) + 1))[:size]
+
+
+# families of inputs which almost match, by size of input
+FAMILIES: Dict[str, Callable[[int], str]] = {
+    "digit_flood": _repeat("1234 "),
+    "digit_run": _repeat("7"),
+    "street_types": _repeat("Street Avenue Road "),
+    # separators collapsed by _normalize_string
+    "comma_storm": _repeat(", ,\t,\n, "),
+    # aimed at city and region of GB
+    "capitalized_words": _repeat("Abcdef "),
+    "capitalized_run": _repeat("Abcdef"),
+    "lowercase_words": _repeat("abc "),
+    "street_without_region": _repeat("12 Main Street Springfield "),
+    "street_without_postcode": _repeat("Main Street, Springfield, TX "),
+    "postcodes": _repeat("SW1A 1AA "),
+}
+
+
+def growth_exponent(sizes: Sequence[int], seconds: Sequence[float]) -> float:
+    """Returns slope of least squares fit of log(seconds) by log(sizes)"""
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(second) for second in seconds]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / sum(
+        (x - mean_x) ** 2 for x in xs
+    )
+
+
+def measure(func: Callable[[], object]) -> float:
+    """Returns the least time func takes, in seconds, calls are repeated
+    until they take long enough for the timer to be precise
+    """
+    timer = timeit.Timer(func)
+    number = 1
+    while True:
+        seconds = min(timer.repeat(repeat=3, number=number)) / number
+        if seconds * number >= 0.002:
+            return seconds
+        number *= 10
+
+
+def test_growth_exponent() -> None:
+    """a quadratic search is caught"""
+    quadratic = re.compile(r"\d+x")
+    seconds = [measure(lambda: quadratic.search("1" * size)) for size in SIZES]
+    assert growth_exponent(SIZES, seconds) > MAX_EXPONENT
+    assert growth_exponent(SIZES, [size * 1e-6 for size in SIZES]) == pytest.approx(1)
+
+
+@pytest.mark.parametrize("prefilter", [True, False])
+@pytest.mark.parametrize("family", FAMILIES)
+@pytest.mark.parametrize("country", ["US", "CA", "GB"])
+def test_scaling(country: str, family: str, prefilter: bool) -> None:
+    parser = AddressParser(country=country, prefilter=prefilter)
+    seconds = [measure(lambda: parser.parse(FAMILIES[family](size))) for size in SIZES]
+    exponent = growth_exponent(SIZES, seconds)
+    assert exponent <= MAX_EXPONENT, "parse time grows as size ** {:.2f}".format(
+        exponent
+    )
@@ -0,0 +1,88 @@
+""" Test for slow document recorder """
+import hashlib
+import logging
+import pathlib
+from typing import Callable
+
+import pytest
+
+from pyap_beauhurst import hooks, slowlog
+from pyap_beauhurst.bench import suite
+from pyap_beauhurst.parser import AddressParser
+
+
+def test_recorder(
+    caplog: pytest.LogCaptureFixture,
+    text: str,
+    hooked_parser: Callable[..., AddressParser],
+) -> None:
+    recorder = slowlog.SlowDocumentRecorder(threshold_ms=0)
+    ap = hooked_parser(recorder)
+    with caplog.at_level(logging.WARNING, logger="pyap_beauhurst.slowlog"):
+        ap.parse(text)
+
+    (record,) = recorder.records
+    assert record.sha256 == hashlib.sha256(text.encode()).hexdigest()
+    assert record.characters == len(text)
+    assert record.country == "US"
+    assert record.stage in hooks.STAGES
+    assert 0 < record.stage_elapsed <= record.elapsed
+    assert record.path is None
+    assert "slow document " + record.sha256[:12] in caplog.text
+
+
+def test_recorder_threshold(
+    text: str, hooked_parser: Callable[..., AddressParser]
+) -> None:
+    recorder = slowlog.SlowDocumentRecorder(threshold_ms=60000)
+    hooked_parser(recorder).parse(text)
+    assert not recorder.records
+
+
+def test_spool(
+    tmp_path: pathlib.Path, text: str, hooked_parser: Callable[..., AddressParser]
+) -> None:
+    spool = tmp_path / "spool"
+    recorder = slowlog.SlowDocumentRecorder(threshold_ms=0, spool=spool, max_files=3)
+    ap = hooked_parser(recorder)
+    texts = [text + str(number) for number in range(5)]
+    for document in texts:
+        ap.parse(document)
+    # the same document is spooled once
+    ap.parse(texts[-1])
+
+    assert len(list(spool.iterdir())) == 3
+    spooled = list(slowlog.read_spool(spool))
+    assert [text for _, text in spooled] == texts[2:]
+    assert all(
+        record.path and pathlib.Path(record.path).exists() for record, _ in spooled
+    )
+
+    results = suite.run_documents(slowlog.documents_by_country(spool))
+    assert list(results) == ["US/slow"]
+    assert results["US/slow"]["addresses"] == 6
+
+
+def test_spool_sample(
+    tmp_path: pathlib.Path, text: str, hooked_parser: Callable[..., AddressParser]
+) -> None:
+    recorder = slowlog.SlowDocumentRecorder(
+        threshold_ms=0, spool=tmp_path, sample_rate=0.5
+    )
+    ap = hooked_parser(recorder)
+    for number in range(200):
+        ap.parse(text + str(number))
+    spooled = [record for record in recorder.records if record.path]
+    assert 60 < len(spooled) < 140
+    assert len(list(tmp_path.iterdir())) == len(spooled)
+    for record in recorder.records:
+        assert bool(record.path) == slowlog.sampled(record.sha256, 0.5)
+
+
+@pytest.mark.parametrize(
+    "digest, rate, expected",
+    [("00000000", 0.0, False), ("00000000", 0.01, True), ("ffffffff", 0.99, False)],
+)
+def test_sampled(digest: str, rate: float, expected: bool) -> None:
+    assert slowlog.sampled(digest, rate) is expected
+    assert slowlog.sampled(digest, 1.0)